@@ -1,9 +1,202 @@
 import time
 import math
+import threading
+from concurrent.futures import Future, InvalidStateError, wait
 from dynamixel_sdk import *  # Dynamixel SDK
+from arm_kinematics import JOINT_ORDER, ReachabilityMap, solve_ik
+from arm_trajectory import CartesianTrajectory, TrajectoryExecutor
+from dynamixel_metrics import InstrumentedPacketHandler, decode_hardware_error
+
+class ArmState:
+    """Timestamped snapshot of present position (and optionally velocity/load) for every servo.
+
+    Values are raw register units keyed by servo ID: position in ticks (0-4095),
+    velocity in 0.229 rpm, load in 0.1 % of max torque. ``comm_result`` is the
+    Dynamixel result of the sync read that produced the snapshot.
+    """
+
+    def __init__(self, arm, timestamp, positions, velocities=None, loads=None, comm_result=COMM_SUCCESS):
+        self._arm = arm
+        self.timestamp = timestamp
+        self.positions = positions
+        self.velocities = velocities or {}
+        self.loads = loads or {}
+        self.comm_result = comm_result
+
+    @property
+    def ok(self):
+        return self.comm_result == COMM_SUCCESS
+
+    @property
+    def age(self):
+        return time.time() - self.timestamp
+
+    def joint_degrees(self, joint):
+        """Angle of a joint in degrees, read from its primary servo."""
+        joint_id = self._arm.JOINT_IDS[joint]
+        servo_id = joint_id[0] if isinstance(joint_id, tuple) else joint_id
+        return self._arm.position_to_degrees(self.positions[servo_id])
+
+    def joints(self):
+        """{joint_name: degrees} for every joint in the snapshot."""
+        return {joint: self.joint_degrees(joint) for joint in self._arm.JOINT_IDS
+                if self._arm.servo_ids([joint])[0] in self.positions}
+
+class MotionHandle(Future):
+    """Completion handle for one move command.
+
+    Resolves with the ArmState in which every moved joint was within ``tolerance``
+    ticks of its goal. Fails with TimeoutError if that has not happened within
+    ``timeout`` seconds, and is cancelled when a later move retargets one of its
+    joints first.
+    """
+
+    def __init__(self, goals, tolerance, timeout):
+        super().__init__()
+        self.goals = goals
+        self.tolerance = tolerance
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+
+    def reached(self, state):
+        return all(servo_id in state.positions and abs(state.positions[servo_id] - goal) <= self.tolerance
+                   for servo_id, goal in self.goals.items())
+
+class MotionMonitor:
+    """Background thread that resolves MotionHandles from batched state reads.
+
+    Each cycle reads every servo's position in one sync read and checks all
+    pending handles against that snapshot. The thread only runs while at least
+    one handle is pending. With ``threaded`` off no thread is started and the
+    owner of the bus feeds snapshots to ``update()`` itself.
+    """
+
+    def __init__(self, arm, poll_interval=0.02, threaded=True):
+        self.arm = arm
+        self.poll_interval = poll_interval
+        self.threaded = threaded
+        self.polls = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def watch(self, handle):
+        """Track a handle, cancelling pending ones whose servos it retargets."""
+        with self._lock:
+            for other in self._pending:
+                if other.goals.keys() & handle.goals.keys():
+                    other.cancel()
+            self._pending = [h for h in self._pending if not h.done()]
+            self._pending.append(handle)
+            if self.threaded and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="arm-motion-monitor", daemon=True)
+                self._thread.start()
+        return handle
+
+    def pending(self):
+        with self._lock:
+            return [h for h in self._pending if not h.done()]
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    self._pending = [h for h in self._pending if not h.done()]
+                    if not self._pending:
+                        self._thread = None
+                        return
+                try:
+                    state = self.arm.read_state()
+                except Exception as e:
+                    print(f"Error: Motion monitor state read failed: {e}")
+                    state = None
+                self.update(state)
+                time.sleep(self.poll_interval)
+        finally:
+            # If the loop died, let the next watch() start a new thread.
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def update(self, state):
+        """Resolve pending handles against one ArmState snapshot (None if the read failed)."""
+        now = time.monotonic()
+        # Resolve under the lock so watch() cannot cancel a handle mid-update.
+        with self._lock:
+            self.polls += 1
+            for handle in self._pending:
+                if handle.done():
+                    continue
+                try:
+                    if state is not None and state.ok and handle.reached(state):
+                        handle.set_result(state)
+                    elif now > handle.deadline:
+                        handle.set_exception(TimeoutError(
+                            f"Joints did not reach their goals within {handle.timeout} s"))
+                except InvalidStateError:
+                    pass  # cancelled by its caller since the done() check
+
+class RegisterShadow:
+    """Last value written to each servo register, plus the writes staged for the next flush.
+
+    ``stage()`` drops a value that the servo already holds, so a flush only
+    transmits registers that changed. Several stages of the same register before
+    a flush collapse into one write.
+    """
+
+    def __init__(self):
+        self.values = {}   # (servo_id, addr) -> last value written
+        self.pending = {}  # (servo_id, addr) -> value to write on the next flush
+        self.staged = 0
+        self.written = 0
+        self.discarded = 0
+        self.packets = 0
+        self.flushes = 0
+
+    def stage(self, servo_id, addr, value):
+        key = (servo_id, addr)
+        self.staged += 1
+        if self.values.get(key) == value:
+            self.pending.pop(key, None)
+        else:
+            self.pending[key] = value
+
+    def pending_for(self, addr):
+        """{servo_id: value} staged for one register address."""
+        return {servo_id: value for (servo_id, a), value in self.pending.items() if a == addr}
+
+    def commit(self, addr, servo_ids):
+        """Mark the staged values of ``addr`` for these servos as written."""
+        for servo_id in servo_ids:
+            self.values[(servo_id, addr)] = self.pending.pop((servo_id, addr))
+            self.written += 1
+
+    def discard(self, addr, servo_ids):
+        """Drop staged values after a failed write; the servo state is unknown now."""
+        for servo_id in servo_ids:
+            if self.pending.pop((servo_id, addr), None) is not None:
+                self.discarded += 1
+            self.values.pop((servo_id, addr), None)
+
+    def invalidate(self, addr=None, servo_ids=None):
+        """Forget shadowed values (all, or one register and/or some servos) so they are rewritten next time."""
+        for key in [key for key in self.values
+                    if (addr is None or key[1] == addr) and (servo_ids is None or key[0] in servo_ids)]:
+            del self.values[key]
+
+    def stats(self):
+        return {
+            "staged": self.staged,
+            "written": self.written,
+            "discarded": self.discarded,
+            "saved": self.staged - self.written - self.discarded - len(self.pending),
+            "packets": self.packets,
+            "flushes": self.flushes,
+        }
 
 class WidowX200Arm:
-    def __init__(self, dev_port="/dev/ttyUSB1", baud_rate=1000000, protocol_version=2.0):
+    def __init__(self, dev_port="/dev/ttyUSB1", baud_rate=1000000, protocol_version=2.0,
+                 port_handler=None, packet_handler=None, instrument=True):
         # Configuration Constants
         self.DEV_PORT = dev_port
         self.BAUD_RATE = baud_rate
@@ -23,12 +216,23 @@ class WidowX200Arm:
 
         # Addresses for Dynamixel protocol
         self.ADDR_TORQUE_ENABLE = 64
+        self.ADDR_HARDWARE_ERROR_STATUS = 70
         self.ADDR_GOAL_VELOCITY = 112
         self.ADDR_GOAL_POSITION = 116
+        self.ADDR_PRESENT_LOAD = 126
+        self.ADDR_PRESENT_VELOCITY = 128
         self.ADDR_PRESENT_POSITION = 132
+        # Present load, velocity and position are adjacent (126-135): one read covers all three.
+        self.LEN_PRESENT_STATE = 10
+        # Goal velocity and goal position are adjacent (112-119), so one write covers both.
+        self.LEN_GOAL_VELOCITY_POSITION = 8
         self.TORQUE_ENABLE = 1
         self.TORQUE_DISABLE = 0
 
+        # A move counts as finished once its servos are this close to their goal (ticks)
+        self.MOTION_TOLERANCE = 20
+        self.MOTION_TIMEOUT = 10.0  # seconds
+
         # Conversion Constants
         self.DYNAMIXEL_MIN = 0
         self.DYNAMIXEL_MAX = 4095
@@ -53,8 +257,12 @@ class WidowX200Arm:
             "Camera_Wrist": (-90, 45),
         }
 
-        self.port_handler = PortHandler(self.DEV_PORT)
-        self.packet_handler = PacketHandler(self.PROTOCOL_VERSION)
+        # Handlers can be injected, e.g. dynamixel_sim's simulated bus for running without hardware.
+        self.port_handler = port_handler if port_handler is not None else PortHandler(self.DEV_PORT)
+        self.packet_handler = packet_handler if packet_handler is not None else PacketHandler(self.PROTOCOL_VERSION)
+        if instrument:
+            # Times every transaction and counts comm/hardware errors per operation and servo.
+            self.packet_handler = InstrumentedPacketHandler(self.packet_handler)
 
         if not self.port_handler.openPort():
             print("Error: Failed to open serial port!")
@@ -64,6 +272,33 @@ class WidowX200Arm:
             exit()
         print(f"Serial port opened at {self.BAUD_RATE} bps.")
 
+        # Sync-write packets: one bus transaction for any number of servos.
+        self.sync_write_motion = GroupSyncWrite(self.port_handler, self.packet_handler,
+                                                self.ADDR_GOAL_VELOCITY, self.LEN_GOAL_VELOCITY_POSITION)
+        self.sync_write_velocity = GroupSyncWrite(self.port_handler, self.packet_handler,
+                                                  self.ADDR_GOAL_VELOCITY, 4)
+        self.sync_write_position = GroupSyncWrite(self.port_handler, self.packet_handler,
+                                                  self.ADDR_GOAL_POSITION, 4)
+        self.sync_write_torque = GroupSyncWrite(self.port_handler, self.packet_handler,
+                                                self.ADDR_TORQUE_ENABLE, 1)
+        self.sync_read_position = GroupSyncRead(self.port_handler, self.packet_handler,
+                                                self.ADDR_PRESENT_POSITION, 4)
+        self.sync_read_state = GroupSyncRead(self.port_handler, self.packet_handler,
+                                             self.ADDR_PRESENT_LOAD, self.LEN_PRESENT_STATE)
+        for servo_id in self.servo_ids():
+            self.sync_read_position.addParam(servo_id)
+            self.sync_read_state.addParam(servo_id)
+        self.last_state = None
+
+        # The motion monitor reads the bus from its own thread, so every bus
+        # transaction is serialized through this lock.
+        self.bus_lock = threading.RLock()
+        self.motion_monitor = MotionMonitor(self)
+
+        # Writes are staged here and only changed registers go out on flush().
+        self.register_shadow = RegisterShadow()
+        self._reachability_maps = {}
+
     def degrees_to_position(self, degrees):
         return int((degrees + 180) * self.DEGREE_TO_POSITION)
 
@@ -71,121 +306,314 @@ class WidowX200Arm:
         return (position * self.POSITION_TO_DEGREE) - 180
 
     def set_all_speed(self, speed):
-        for joint_name, joint_id in self.JOINT_IDS.items():
-            if isinstance(joint_id, tuple):  
-                for id in joint_id:
-                    self.packet_handler.write4ByteTxRx(
-                        self.port_handler, id, self.ADDR_GOAL_VELOCITY, int(speed)
-                    )
-            else:
-                self.packet_handler.write4ByteTxRx(
-                    self.port_handler, joint_id, self.ADDR_GOAL_VELOCITY, int(speed)
-                )
+        with self.bus_lock:
+            for servo_id in self.servo_ids():
+                self.register_shadow.stage(servo_id, self.ADDR_GOAL_VELOCITY, int(speed))
+            return self.flush()
 
     def set_speed(self, servo_id, speed):
-        self.packet_handler.write4ByteTxRx(self.port_handler, servo_id, self.ADDR_GOAL_VELOCITY, int(speed))
+        with self.bus_lock:
+            self.register_shadow.stage(servo_id, self.ADDR_GOAL_VELOCITY, int(speed))
+            return self.flush()
 
     def set_position(self, servo_id, position):
-        self.packet_handler.write4ByteTxRx(self.port_handler, servo_id, self.ADDR_GOAL_POSITION, position)
-
-    def move_joint(self, joint, degrees, speed):
+        with self.bus_lock:
+            self.register_shadow.stage(servo_id, self.ADDR_GOAL_POSITION, int(position))
+            return self.flush()
+
+    def servo_ids(self, joints=None):
+        """All servo IDs of the given joints (every joint if None), in joint order."""
+        ids = []
+        for joint in (self.JOINT_IDS if joints is None else joints):
+            joint_id = self.JOINT_IDS[joint]
+            ids.extend(joint_id if isinstance(joint_id, tuple) else (joint_id,))
+        return ids
+
+    def _to_bytes(self, value):
+        value = int(value)
+        return [DXL_LOBYTE(DXL_LOWORD(value)), DXL_HIBYTE(DXL_LOWORD(value)),
+                DXL_LOBYTE(DXL_HIWORD(value)), DXL_HIBYTE(DXL_HIWORD(value))]
+
+    def _sync_write(self, group, data):
+        """Send {servo_id: bytes} through a GroupSyncWrite as a single packet."""
+        with self.bus_lock:
+            group.clearParam()
+            for servo_id, payload in data.items():
+                group.addParam(servo_id, payload)
+            dxl_comm_result = group.txPacket()
+            group.clearParam()
+        if dxl_comm_result != COMM_SUCCESS:
+            print(f"Error: Sync write failed: {self.packet_handler.getTxRxResult(dxl_comm_result)}")
+        return dxl_comm_result
+
+    def _flush_register(self, group, addr, values):
+        shadow = self.register_shadow
+        dxl_comm_result = self._sync_write(group, {servo_id: self._to_bytes(value)[:group.data_length]
+                                                   for servo_id, value in values.items()})
+        shadow.packets += 1
+        if dxl_comm_result == COMM_SUCCESS:
+            shadow.commit(addr, values)
+        else:
+            shadow.discard(addr, values)
+        return dxl_comm_result
+
+    def flush(self):
+        """Send every staged register write that changed, in as few sync-write packets as possible.
+
+        Torque goes in one packet. Goal velocity and position share one packet
+        when only one of them changed, or when the other can be filled in from
+        the shadow; otherwise each goes in its own packet. Returns the first
+        failed Dynamixel result, or COMM_SUCCESS.
+        """
+        with self.bus_lock:
+            shadow = self.register_shadow
+            if not shadow.pending:
+                return COMM_SUCCESS
+            shadow.flushes += 1
+            results = []
+
+            torque = shadow.pending_for(self.ADDR_TORQUE_ENABLE)
+            if torque:
+                results.append(self._flush_register(self.sync_write_torque, self.ADDR_TORQUE_ENABLE, torque))
+                # A torque toggle makes the servo take its present position as the goal.
+                for addr in (self.ADDR_GOAL_VELOCITY, self.ADDR_GOAL_POSITION):
+                    shadow.invalidate(addr, torque)
+
+            velocity = shadow.pending_for(self.ADDR_GOAL_VELOCITY)
+            position = shadow.pending_for(self.ADDR_GOAL_POSITION)
+            if velocity and position:
+                # Servos whose other goal register is already known can go in one 8-byte packet.
+                combined = {}
+                for servo_id in set(velocity) | set(position):
+                    v = velocity.get(servo_id, shadow.values.get((servo_id, self.ADDR_GOAL_VELOCITY)))
+                    p = position.get(servo_id, shadow.values.get((servo_id, self.ADDR_GOAL_POSITION)))
+                    if v is not None and p is not None:
+                        combined[servo_id] = (v, p)
+                if combined:
+                    dxl_comm_result = self._sync_write(self.sync_write_motion, {
+                        servo_id: self._to_bytes(v) + self._to_bytes(p) for servo_id, (v, p) in combined.items()})
+                    shadow.packets += 1
+                    for addr, values in ((self.ADDR_GOAL_VELOCITY, velocity), (self.ADDR_GOAL_POSITION, position)):
+                        written = [servo_id for servo_id in combined if servo_id in values]
+                        if dxl_comm_result == COMM_SUCCESS:
+                            shadow.commit(addr, written)
+                        else:
+                            shadow.discard(addr, written)
+                    results.append(dxl_comm_result)
+                    velocity = {k: v for k, v in velocity.items() if k not in combined}
+                    position = {k: v for k, v in position.items() if k not in combined}
+            if velocity:
+                results.append(self._flush_register(self.sync_write_velocity, self.ADDR_GOAL_VELOCITY, velocity))
+            if position:
+                results.append(self._flush_register(self.sync_write_position, self.ADDR_GOAL_POSITION, position))
+            return next((r for r in results if r != COMM_SUCCESS), COMM_SUCCESS)
+
+    def _clamp_joint(self, joint, degrees):
+        min_deg, max_deg = self.JOINT_LIMITS[joint]
+        if degrees < min_deg:
+            print(f"Warning: Clamped {joint} to {min_deg}° (out of range).")
+            return min_deg
+        if degrees > max_deg:
+            print(f"Warning: Clamped {joint} to {max_deg}° (out of range).")
+            return max_deg
+        return degrees
+
+    def joint_goals(self, joint, degrees):
+        """Goal positions per servo for a joint angle, mirroring the second shoulder servo."""
+        position = self.degrees_to_position(degrees)
+        if isinstance(self.JOINT_IDS[joint], tuple):
+            primary, mirror = self.JOINT_IDS[joint]
+            return {primary: position, mirror: self.DYNAMIXEL_MAX - position}
+        return {self.JOINT_IDS[joint]: position}
+
+    def _failed_motion(self, message):
+        handle = MotionHandle({}, 0, 0)
+        handle.set_exception(RuntimeError(message))
+        return handle
+
+    def _stage_motion(self, targets, speed):
+        """Stage goal velocity and position for each joint; returns the primary servo goals."""
+        watched = {}
+        for joint, degrees in targets.items():
+            if joint not in self.JOINT_LIMITS:
+                print(f"Error: No limits defined for joint {joint}.")
+                continue
+            degrees = self._clamp_joint(joint, degrees)
+            joint_speed = speed[joint] if isinstance(speed, dict) else speed
+            joint_speed = int(max(0, min(joint_speed, 1023)))
+            goals = self.joint_goals(joint, degrees)
+            for servo_id, position in goals.items():
+                self.register_shadow.stage(servo_id, self.ADDR_GOAL_VELOCITY, joint_speed)
+                self.register_shadow.stage(servo_id, self.ADDR_GOAL_POSITION, position)
+            # Only the primary servo is watched: the shoulder mirror just follows it.
+            primary = next(iter(goals))
+            watched[primary] = goals[primary]
+        return watched
+
+    def move_joints(self, targets, speed, tolerance=None, timeout=None):
+        """Move several joints at once: ``targets`` maps joint name to degrees.
+
+        ``speed`` is one value for all joints or a {joint: speed} dict. Goal velocity
+        and goal position for every servo go out in one sync-write packet, so all
+        joints start moving at the same moment. Registers that already hold the
+        requested value are not resent.
+
+        Returns a MotionHandle that resolves once every joint is within
+        ``tolerance`` ticks of its goal (defaults: MOTION_TOLERANCE, MOTION_TIMEOUT).
+        """
+        with self.bus_lock:
+            watched = self._stage_motion(targets, speed)
+            if not watched:
+                return self._failed_motion("No valid joints to move")
+            dxl_comm_result = self.flush()
+        if dxl_comm_result != COMM_SUCCESS:
+            return self._failed_motion(f"Sync write failed: {self.packet_handler.getTxRxResult(dxl_comm_result)}")
+        handle = MotionHandle(watched,
+                              self.MOTION_TOLERANCE if tolerance is None else tolerance,
+                              self.MOTION_TIMEOUT if timeout is None else timeout)
+        return self.motion_monitor.watch(handle)
+
+    def stream_joints(self, targets, speed):
+        """Send one setpoint like move_joints, without a completion handle.
+
+        For control loops that send a new goal every cycle; returns the Dynamixel
+        result of the flush.
+        """
+        with self.bus_lock:
+            if not self._stage_motion(targets, speed):
+                return COMM_NOT_AVAILABLE
+            return self.flush()
+
+    def follow_trajectory(self, waypoints, linear_speed=0.1, angular_speed=60.0, rate_hz=50.0):
+        """Move the gripper through (x, y, z, pitch, roll) waypoints along straight lines.
+
+        IK is solved for every control step up front and goals are streamed at
+        ``rate_hz``. Returns a TrajectoryReport; ``report.settled`` is the
+        MotionHandle of the final pose.
+        """
+        trajectory = CartesianTrajectory(waypoints, linear_speed, angular_speed)
+        return TrajectoryExecutor(self, rate_hz).run(trajectory)
+
+    def move_joint(self, joint, degrees, speed, tolerance=None, timeout=None):
         if joint in self.JOINT_LIMITS:
-            min_deg, max_deg = self.JOINT_LIMITS[joint]
-
-            if degrees < min_deg:
-                degrees = min_deg
-                print(f"Warning: Clamped {joint} to {min_deg}° (out of range).")
-            elif degrees > max_deg:
-                degrees = max_deg
-                print(f"Warning: Clamped {joint} to {max_deg}° (out of range).")
-
-            position = self.degrees_to_position(degrees)
+            degrees = self._clamp_joint(joint, degrees)
             speed = max(0, min(speed, 1023))
-
-            if isinstance(self.JOINT_IDS[joint], tuple):
-                mirror_position = self.DYNAMIXEL_MAX - position
-                for servo_id in self.JOINT_IDS[joint]:
-                    self.set_speed(servo_id, speed)
-                    if servo_id == self.JOINT_IDS[joint][0]:
-                        self.set_position(servo_id, position)
-                    else:
-                        self.set_position(servo_id, mirror_position)
-            else:
-                servo_id = self.JOINT_IDS[joint]
-                self.set_speed(servo_id, speed)
-                self.set_position(servo_id, position)
-
+            handle = self.move_joints({joint: degrees}, speed, tolerance, timeout)
             print(f"Joint {joint} moving to {degrees}° at speed {speed}.")
+            return handle
         else:
             print(f"Error: No limits defined for joint {joint}.")
+            return self._failed_motion(f"No limits defined for joint {joint}")
+
+    def wait_all(self, handles, timeout=None):
+        """Block until every handle has finished and return their ArmStates in order.
+
+        Raises the first handle's error (TimeoutError, CancelledError, ...) if any failed.
+        """
+        wait(handles, timeout)
+        return [handle.result(0) for handle in handles]
+
+    def _signed(self, value, bits):
+        return value - (1 << bits) if value & (1 << (bits - 1)) else value
+
+    def read_state(self, include_velocity_load=False):
+        """Read every servo's present position in one sync-read transaction.
+
+        With ``include_velocity_load`` the same transaction also returns present
+        velocity and load. Returns an ArmState, which is also kept in ``last_state``.
+        """
+        group = self.sync_read_state if include_velocity_load else self.sync_read_position
+        positions, velocities, loads = {}, {}, {}
+        with self.bus_lock:
+            dxl_comm_result = group.txRxPacket()
+            timestamp = time.time()
+            if dxl_comm_result != COMM_SUCCESS:
+                print(f"Error: Sync read failed: {self.packet_handler.getTxRxResult(dxl_comm_result)}")
+            else:
+                for servo_id in self.servo_ids():
+                    positions[servo_id] = self._signed(group.getData(servo_id, self.ADDR_PRESENT_POSITION, 4), 32)
+                    if include_velocity_load:
+                        velocities[servo_id] = self._signed(group.getData(servo_id, self.ADDR_PRESENT_VELOCITY, 4), 32)
+                        loads[servo_id] = self._signed(group.getData(servo_id, self.ADDR_PRESENT_LOAD, 2), 16)
+        state = ArmState(self, timestamp, positions, velocities, loads, dxl_comm_result)
+        if state.ok:
+            self.last_state = state
+        return state
+
+    def bus_stats(self):
+        """Latency histograms and error counters of every bus transaction so far (needs ``instrument``)."""
+        if not isinstance(self.packet_handler, InstrumentedPacketHandler):
+            return None
+        return self.packet_handler.stats()
+
+    def read_hardware_errors(self, servo_ids=None):
+        """{servo_id: [error names]} from the Hardware Error Status register of each servo that has one set."""
+        errors = {}
+        with self.bus_lock:
+            for servo_id in (self.servo_ids() if servo_ids is None else servo_ids):
+                value, dxl_comm_result, _ = self.packet_handler.read1ByteTxRx(
+                    self.port_handler, servo_id, self.ADDR_HARDWARE_ERROR_STATUS)
+                if dxl_comm_result == COMM_SUCCESS and value:
+                    errors[servo_id] = decode_hardware_error(value)
+        return errors
+
+    def reboot(self, servo_ids=None):
+        """Reboot servos (clears a hardware error); they come back with torque off. Returns {servo_id: comm result}."""
+        results = {}
+        with self.bus_lock:
+            servo_ids = self.servo_ids() if servo_ids is None else list(servo_ids)
+            for servo_id in servo_ids:
+                results[servo_id], _ = self.packet_handler.reboot(self.port_handler, servo_id)
+            # The servos reset their torque and goal registers, so nothing shadowed is valid anymore.
+            self.register_shadow.invalidate(servo_ids=servo_ids)
+        return results
 
     def read_joint_position(self, joint):
-        if isinstance(self.JOINT_IDS[joint], tuple):
-            position, _, _ = self.packet_handler.read2ByteTxRx(self.port_handler, self.JOINT_IDS[joint][0], self.ADDR_PRESENT_POSITION)
-        else:
-            position, _, _ = self.packet_handler.read2ByteTxRx(self.port_handler, self.JOINT_IDS[joint], self.ADDR_PRESENT_POSITION)
+        joint_id = self.JOINT_IDS[joint]
+        servo_id = joint_id[0] if isinstance(joint_id, tuple) else joint_id
+        with self.bus_lock:
+            position, _, _ = self.packet_handler.read4ByteTxRx(self.port_handler, servo_id, self.ADDR_PRESENT_POSITION)
         return self.position_to_degrees(position)
-    
+
     def read_all_joint_positions(self):
+        state = self.read_state()
+        if not state.ok:
+            return state
         for joint_name, joint_id in self.JOINT_IDS.items():
-            if isinstance(joint_id, tuple):  
+            if isinstance(joint_id, tuple):
                 for id in joint_id:
-                    position = self.read_joint_position(joint_name)
+                    position = self.position_to_degrees(state.positions[id])
                     print(f"{joint_name} (ID: {id}): {position} degrees")
             else:
-                position = self.read_joint_position(joint_name)
-                print(f"{joint_name}: {position} degrees")
+                print(f"{joint_name}: {state.joint_degrees(joint_name)} degrees")
+        return state
 
     def Zero(self):
-        for joint in ["waist", "shoulder", "elbow", "wrist_angle", "wrist_rotate"]:
-            self.move_joint(joint, 0, 1000)
+        return self.move_joints({joint: 0 for joint in JOINT_ORDER}, 1000)
 
     def inverse_kinematics(self, x, y, z, pitch_deg, roll_deg=0):
-        pitch = math.radians(pitch_deg)
-        roll  = math.radians(roll_deg)
-        
-        q1 = math.atan2(y, x)
-        r = math.sqrt(x**2 + y**2)
-        
-        d5 = 0.05  # End-effector offset in meters
-        L1 = 0.2   # Shoulder-to-elbow length (meters)
-        L2 = 0.2   # Elbow-to-wrist center length (meters)
-        
-        wrist_r = r - d5 * math.cos(pitch)
-        wrist_z = z - d5 * math.sin(pitch)
-        D = math.sqrt(wrist_r**2 + wrist_z**2)
-        
-        min_D = abs(L1 - L2)
-        max_D = L1 + L2
-        
-        if D > max_D or D < min_D:
-            if D > max_D:
-                ratio = max_D / D
-            else:
-                ratio = min_D / D
-            wrist_r *= ratio
-            wrist_z *= ratio
-            D = math.sqrt(wrist_r**2 + wrist_z**2)
-        
-        cos_angle = (wrist_r**2 + wrist_z**2 - L1**2 - L2**2) / (2 * L1 * L2)
-        cos_angle = max(min(cos_angle, 1), -1)
-        q3 = math.acos(cos_angle)
-        
-        q2 = math.atan2(wrist_z, wrist_r) - math.atan2(L2 * math.sin(q3), L1 + L2 * math.cos(q3))
-        
-        q4 = pitch - (q2 + q3)
-        
-        q5 = roll
-
-        q1_deg = math.degrees(q1)
-        q2_deg = math.degrees(q2)
-        q3_deg = math.degrees(q3)
-        q4_deg = math.degrees(q4)
-        q5_deg = math.degrees(q5)
-
-        print(f"Inverse Kinematics Solution: q1={q1_deg}, q2={q2_deg}, q3={q3_deg}, q4={q4_deg}, q5={q5_deg}")
-        return q1_deg, q2_deg, q3_deg, q4_deg, q5_deg
-    
+        solution = self.inverse_kinematics_batch([[x, y, z, pitch_deg, roll_deg]])
+        if not solution.reachable[0]:
+            print(f"Warning: Target ({x:.3f}, {y:.3f}, {z:.3f}) is out of reach, moving towards the nearest reachable point.")
+        return tuple(float(angle) for angle in solution.joints[0])
+
+    def inverse_kinematics_batch(self, targets):
+        """Solve IK for an (N, 5) array of (x, y, z, pitch, roll) targets at once.
+
+        Returns an IKSolution with (N, 5) joint angles in degrees (waist, shoulder,
+        elbow, wrist_angle, wrist_rotate) and per-target ``reachable``,
+        ``within_limits`` and ``feasible`` flags checked against JOINT_LIMITS.
+        """
+        return solve_ik(targets, self.JOINT_LIMITS)
+
+    def reachability_map(self, pitch=0, roll=0, resolution=0.01):
+        """Feasibility grid over WORKSPACE_LIMITS for one gripper pitch/roll, built once and cached."""
+        key = (float(pitch), float(roll), float(resolution))
+        if key not in self._reachability_maps:
+            self._reachability_maps[key] = ReachabilityMap(self.WORKSPACE_LIMITS, self.JOINT_LIMITS,
+                                                           pitch, roll, resolution)
+        return self._reachability_maps[key]
+
     def MoveArm(self, use_percent, x, y, z, pitch, roll, speed):
 
 
@@ -204,13 +632,13 @@ class WidowX200Arm:
 
         if ik_solution is None:
             print("No valid IK solution for the given target.")
+            return self._failed_motion("No valid IK solution for the given target")
         else:
             print("Computed joint angles (degrees):")
-            for joint, angle in zip(["waist", "shoulder", "elbow", "wrist_angle", "wrist_rotate"], ik_solution):
+            for joint, angle in zip(JOINT_ORDER, ik_solution):
                 print(f"  {joint}: {angle:.2f}")
 
-            for joint, angle in zip(["waist", "shoulder", "elbow", "wrist_angle", "wrist_rotate"], ik_solution):
-                self.move_joint(joint, angle, speed)
+            return self.move_joints(dict(zip(JOINT_ORDER, ik_solution)), speed)
 
     def Gripper(self, Position):
         if Position >= self.JOINT_LIMITS["gripper"][1]:
@@ -219,37 +647,42 @@ class WidowX200Arm:
             Position = self.JOINT_LIMITS["gripper"][0]
         else:
             Position = Position
-        self.move_joint("gripper", Position, 800)
+        return self.move_joint("gripper", Position, 800)
+
+    def tuck_stages(self):
+        """[(targets, speed), ...] moves that fold the arm under the camera, in order."""
+        return [
+            ({joint: 0 for joint in JOINT_ORDER}, 1000),
+            ({"waist": -1.8021978021977816}, 1000),
+            ({
+                "shoulder": -76.7032967032967,
+                "elbow": 96.74725274725279,
+                "wrist_angle": 30.373626373626394,
+                "wrist_rotate": 0,
+            }, 1000),
+        ]
 
     def Tuck(self):
-        self.Zero()
-        time.sleep(2)
-
-        self.move_joint("waist", -1.8021978021977816, 1000)
-        time.sleep(0.6)
-        self.move_joint("shoulder", -76.7032967032967, 1000)
-        self.move_joint("elbow", 96.74725274725279, 1000)
-        self.move_joint("wrist_angle", 30.373626373626394, 1000)
-        self.move_joint("wrist_rotate", 0, 1000)
+        # Each stage starts as soon as the previous one has arrived; the final
+        # stage's handle is returned so the caller decides whether to wait.
+        *stages, (targets, speed) = self.tuck_stages()
+        for stage_targets, stage_speed in stages:
+            self.move_joints(stage_targets, stage_speed).result()
+        return self.move_joints(targets, speed)
 
     def shutdown(self):
-        for joint, ids in self.JOINT_IDS.items():
-            if isinstance(ids, tuple):
-                for servo_id in ids:
-                    if servo_id == 3:
-                        self.packet_handler.write1ByteTxRx(self.port_handler, servo_id, self.ADDR_TORQUE_ENABLE, self.TORQUE_DISABLE)
-                    else:
-                        self.packet_handler.write1ByteTxRx(self.port_handler, servo_id, self.ADDR_TORQUE_ENABLE, self.TORQUE_DISABLE)
-            else:
-                self.packet_handler.write1ByteTxRx(self.port_handler, ids, self.ADDR_TORQUE_ENABLE, self.TORQUE_DISABLE)
+        with self.bus_lock:
+            # Always send torque: the servo may have changed it behind the shadow (reboot, overload).
+            self.register_shadow.invalidate(self.ADDR_TORQUE_ENABLE)
+            for servo_id in self.servo_ids():
+                self.register_shadow.stage(servo_id, self.ADDR_TORQUE_ENABLE, self.TORQUE_DISABLE)
+            return self.flush()
 
     def enable(self):
-        for joint, ids in self.JOINT_IDS.items():
-            if isinstance(ids, tuple):
-                for servo_id in ids:
-                    if servo_id == 3:
-                        self.packet_handler.write1ByteTxRx(self.port_handler, servo_id, self.ADDR_TORQUE_ENABLE, self.TORQUE_DISABLE)
-                    else:
-                        self.packet_handler.write1ByteTxRx(self.port_handler, servo_id, self.ADDR_TORQUE_ENABLE, self.TORQUE_ENABLE)
-            else:
-                self.packet_handler.write1ByteTxRx(self.port_handler, ids, self.ADDR_TORQUE_ENABLE, self.TORQUE_ENABLE)
+        with self.bus_lock:
+            self.register_shadow.invalidate(self.ADDR_TORQUE_ENABLE)
+            for servo_id in self.servo_ids():
+                # Servo 3 mirrors the shoulder and stays passive.
+                torque = self.TORQUE_DISABLE if servo_id == 3 else self.TORQUE_ENABLE
+                self.register_shadow.stage(servo_id, self.ADDR_TORQUE_ENABLE, torque)
+            return self.flush()
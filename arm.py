@@ -46,30 +46,31 @@ JOINT_LIMITS = {
 
 # -------------------- INITIALIZATION --------------------
 
-# Initialize Port Handler & Packet Handler
+# Initialize Port Handler & Packet Handler (the port is opened by init_arm())
 port_handler = PortHandler(DEV_PORT)
 packet_handler = PacketHandler(PROTOCOL_VERSION)
 
-# Open Serial Port
-if not port_handler.openPort():
-    print("Error: Failed to open serial port!")
-    exit()
-if not port_handler.setBaudRate(BAUD_RATE):
-    print("Error: Failed to set baud rate!")
-    exit()
-print(f"Serial port opened at {BAUD_RATE} bps.")
-
-# Enable torque for each joint
-for joint, ids in JOINT_IDS.items():
-    if isinstance(ids, tuple):
-        for servo_id in ids:
-            if servo_id == 3:
-                packet_handler.write1ByteTxRx(port_handler, servo_id, ADDR_TORQUE_ENABLE, TORQUE_DISABLE)
-            else:
-                packet_handler.write1ByteTxRx(port_handler, servo_id, ADDR_TORQUE_ENABLE, TORQUE_ENABLE)
-    else:
-        packet_handler.write1ByteTxRx(port_handler, ids, ADDR_TORQUE_ENABLE, TORQUE_ENABLE)
-print("Arm joints are enabled.")
+def init_arm():
+    """Open the serial port and enable torque; importing this module does neither."""
+    if not port_handler.openPort():
+        print("Error: Failed to open serial port!")
+        exit()
+    if not port_handler.setBaudRate(BAUD_RATE):
+        print("Error: Failed to set baud rate!")
+        exit()
+    print(f"Serial port opened at {BAUD_RATE} bps.")
+
+    # Enable torque for each joint
+    for joint, ids in JOINT_IDS.items():
+        if isinstance(ids, tuple):
+            for servo_id in ids:
+                if servo_id == 3:
+                    packet_handler.write1ByteTxRx(port_handler, servo_id, ADDR_TORQUE_ENABLE, TORQUE_DISABLE)
+                else:
+                    packet_handler.write1ByteTxRx(port_handler, servo_id, ADDR_TORQUE_ENABLE, TORQUE_ENABLE)
+        else:
+            packet_handler.write1ByteTxRx(port_handler, ids, ADDR_TORQUE_ENABLE, TORQUE_ENABLE)
+    print("Arm joints are enabled.")
 
 # -------------------- MOTOR CONTROL FUNCTIONS --------------------
 
@@ -152,6 +153,7 @@ def wait_for_movement(servo_id, target_position, tolerance=10):
 # -------------------- EXECUTION --------------------
 
 if __name__ == "__main__":
+    init_arm()
     while True:
         for servo_id in range(1, 10):  # Adjust range if necessary
             if True:
@@ -233,6 +235,6 @@ if __name__ == "__main__":
         else:
             print("Invalid choice, try again.")
 
-# Close Serial Connection
-port_handler.closePort()
-print("Serial port closed.")
+    # Close Serial Connection
+    port_handler.closePort()
+    print("Serial port closed.")
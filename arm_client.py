@@ -0,0 +1,284 @@
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from WidowX_Arm_Module import WidowX200Arm
+from arm_trajectory import CartesianTrajectory, TrajectoryExecutor
+
+# Command priorities: lower runs first; commands of equal priority run in order.
+PRIORITY_SAFETY = 0   # torque off / stop
+PRIORITY_MOTION = 1   # goal writes
+PRIORITY_DEFAULT = 2  # configuration, explicit reads
+
+
+class ArmClient:
+    """Owns a WidowX200Arm on a single serial I/O thread.
+
+    Every bus transaction runs on that thread, taken from a priority queue, so
+    callers never block on serial latency unless they ask for a result.
+    Between commands the thread refreshes one ArmState snapshot (one sync read)
+    that ``state()`` returns without touching the bus; the same reads resolve
+    the arm's MotionHandles. While the client runs, use the arm only through it.
+
+    The methods below are the thread-safe synchronous facade: they wait until
+    the command has been sent (not until the motion finishes) and return what
+    the arm method returns. ``aio()`` gives the asyncio equivalent.
+    """
+
+    def __init__(self, arm=None, poll_rate_hz=10.0, motion_poll_rate_hz=50.0, **arm_kwargs):
+        self.arm = arm if arm is not None else WidowX200Arm(**arm_kwargs)
+        self.poll_interval = 1.0 / poll_rate_hz
+        self.motion_poll_interval = 1.0 / motion_poll_rate_hz
+        self.commands = 0
+        self.polls = 0
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._thread = None
+        self._monitor_threaded = self.arm.motion_monitor.threaded
+        self._streams = set()  # TrajectoryExecutors streaming on the I/O thread
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                # The I/O thread does the monitor's reads; it must not start its own.
+                self._monitor_threaded = self.arm.motion_monitor.threaded
+                self.arm.motion_monitor.threaded = False
+                self._thread = threading.Thread(target=self._run, name="arm-io", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Finish the queued commands of higher priority and stop the I/O thread.
+
+        Commands still queued when the thread exits fail with RuntimeError, and the
+        arm's motion monitor goes back to running its own thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put((PRIORITY_DEFAULT + 1, next(self._seq), None, (), {}, None))
+            thread.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                self.arm.motion_monitor.threaded = self._monitor_threaded
+            self._fail_queued()
+
+    def _fail_queued(self):
+        while True:
+            try:
+                future = self._queue.get_nowait()[-1]
+            except queue.Empty:
+                return
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("ArmClient stopped before the command ran"))
+
+    def _loop(self):
+        next_poll = 0.0
+        while True:
+            try:
+                _, _, fn, args, kwargs, future = self._queue.get(timeout=max(0.0, next_poll - time.monotonic()))
+            except queue.Empty:
+                fn = future = None
+            else:
+                if fn is None:
+                    return
+            if future is not None and future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+                self.commands += 1
+
+            now = time.monotonic()
+            if future is not None and self.arm.motion_monitor.pending():
+                next_poll = min(next_poll, now + self.motion_poll_interval)
+            if now >= next_poll:
+                try:
+                    state = self.arm.read_state()
+                except Exception as e:
+                    print(f"Error: ArmClient state poll failed: {e}")
+                    state = None
+                self.arm.motion_monitor.update(state)
+                self.polls += 1
+                moving = bool(self.arm.motion_monitor.pending())
+                next_poll = now + (self.motion_poll_interval if moving else self.poll_interval)
+
+    def submit(self, fn, *args, priority=PRIORITY_DEFAULT, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` for the I/O thread; returns a Future of its result."""
+        future = Future()
+        # Under the lock, so nothing is queued after the I/O thread has drained the queue.
+        with self._lock:
+            if self._thread is None:
+                raise RuntimeError("ArmClient is not running; call start() first")
+            if priority == PRIORITY_SAFETY:
+                # A trajectory is one long command; end it so the safety command runs at its next step.
+                for executor in self._streams:
+                    executor.cancel()
+            self._queue.put((priority, next(self._seq), fn, args, kwargs, future))
+        return future
+
+    def call(self, fn, *args, priority=PRIORITY_DEFAULT, timeout=None, **kwargs):
+        return self.submit(fn, *args, priority=priority, **kwargs).result(timeout)
+
+    def state(self):
+        """Latest ArmState snapshot (None before the first read); never touches the bus."""
+        return self.arm.last_state
+
+    def read_state(self, include_velocity_load=False):
+        """Fresh ArmState read on the I/O thread."""
+        return self.call(self.arm.read_state, include_velocity_load)
+
+    def enable(self):
+        return self.call(self.arm.enable, priority=PRIORITY_SAFETY)
+
+    def shutdown(self):
+        return self.call(self.arm.shutdown, priority=PRIORITY_SAFETY)
+
+    def set_all_speed(self, speed):
+        return self.call(self.arm.set_all_speed, speed)
+
+    def move_joints(self, targets, speed, tolerance=None, timeout=None):
+        return self.call(self.arm.move_joints, targets, speed, tolerance, timeout, priority=PRIORITY_MOTION)
+
+    def move_joint(self, joint, degrees, speed, tolerance=None, timeout=None):
+        return self.call(self.arm.move_joint, joint, degrees, speed, tolerance, timeout, priority=PRIORITY_MOTION)
+
+    def stream_joints(self, targets, speed):
+        return self.call(self.arm.stream_joints, targets, speed, priority=PRIORITY_MOTION)
+
+    def MoveArm(self, use_percent, x, y, z, pitch, roll, speed):
+        return self.call(self.arm.MoveArm, use_percent, x, y, z, pitch, roll, speed, priority=PRIORITY_MOTION)
+
+    def Zero(self):
+        return self.call(self.arm.Zero, priority=PRIORITY_MOTION)
+
+    def Gripper(self, position):
+        return self.call(self.arm.Gripper, position, priority=PRIORITY_MOTION)
+
+    def Tuck(self):
+        # Waiting between stages happens here, not on the I/O thread that resolves the handles.
+        *stages, (targets, speed) = self.arm.tuck_stages()
+        for stage_targets, stage_speed in stages:
+            self.move_joints(stage_targets, stage_speed).result()
+        return self.move_joints(targets, speed)
+
+    def wait_all(self, handles, timeout=None):
+        return self.arm.wait_all(handles, timeout)
+
+    def follow_trajectory(self, waypoints, linear_speed=0.1, angular_speed=60.0, rate_hz=50.0):
+        """Plan on the caller's thread, then stream the whole trajectory as one I/O command.
+
+        A safety command (``enable()``, ``shutdown()``) cancels the stream at its next step.
+        """
+        executor = TrajectoryExecutor(self.arm, rate_hz)
+        times, joints = executor.plan(CartesianTrajectory(waypoints, linear_speed, angular_speed))
+        self.call(executor.approach, joints, priority=PRIORITY_MOTION).result()
+        return self.submit_stream(executor, times, joints).result()
+
+    def submit_stream(self, executor, times, joints):
+        """Queue ``executor.stream(times, joints)``; a safety command submitted meanwhile cancels it."""
+        with self._lock:
+            self._streams.add(executor)
+        try:
+            future = self.submit(executor.stream, times, joints, priority=PRIORITY_MOTION)
+        except BaseException:
+            with self._lock:
+                self._streams.discard(executor)
+            raise
+        future.add_done_callback(lambda _: self._end_stream(executor))
+        return future
+
+    def _end_stream(self, executor):
+        with self._lock:
+            self._streams.discard(executor)
+
+    def stats(self):
+        return {
+            "commands": self.commands,
+            "queued": self._queue.qsize(),
+            "polls": self.polls,
+            "state_age": None if self.arm.last_state is None else round(self.arm.last_state.age, 3),
+            "pending_motions": len(self.arm.motion_monitor.pending()),
+        }
+
+    def aio(self):
+        return AsyncArmClient(self)
+
+
+class AsyncArmClient:
+    """asyncio API over a running ArmClient.
+
+    Commands are awaited without blocking the event loop. Move methods wait for
+    the motion to finish and return the ArmState it finished in; pass
+    ``wait=False`` to get the MotionHandle back as soon as the goal is sent.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def call(self, fn, *args, priority=PRIORITY_DEFAULT, **kwargs):
+        return await asyncio.wrap_future(self.client.submit(fn, *args, priority=priority, **kwargs))
+
+    async def wait(self, handle):
+        return await asyncio.wrap_future(handle)
+
+    async def _move(self, fn, *args, wait=True):
+        handle = await self.call(fn, *args, priority=PRIORITY_MOTION)
+        return await self.wait(handle) if wait else handle
+
+    def state(self):
+        return self.client.state()
+
+    async def read_state(self, include_velocity_load=False):
+        return await self.call(self.client.arm.read_state, include_velocity_load)
+
+    async def enable(self):
+        return await self.call(self.client.arm.enable, priority=PRIORITY_SAFETY)
+
+    async def shutdown(self):
+        return await self.call(self.client.arm.shutdown, priority=PRIORITY_SAFETY)
+
+    async def set_all_speed(self, speed):
+        return await self.call(self.client.arm.set_all_speed, speed)
+
+    async def move_joints(self, targets, speed, tolerance=None, timeout=None, wait=True):
+        return await self._move(self.client.arm.move_joints, targets, speed, tolerance, timeout, wait=wait)
+
+    async def move_joint(self, joint, degrees, speed, tolerance=None, timeout=None, wait=True):
+        return await self._move(self.client.arm.move_joint, joint, degrees, speed, tolerance, timeout, wait=wait)
+
+    async def MoveArm(self, use_percent, x, y, z, pitch, roll, speed, wait=True):
+        return await self._move(self.client.arm.MoveArm, use_percent, x, y, z, pitch, roll, speed, wait=wait)
+
+    async def Zero(self, wait=True):
+        return await self._move(self.client.arm.Zero, wait=wait)
+
+    async def Gripper(self, position, wait=True):
+        return await self._move(self.client.arm.Gripper, position, wait=wait)
+
+    async def Tuck(self, wait=True):
+        *stages, (targets, speed) = self.client.arm.tuck_stages()
+        for stage_targets, stage_speed in stages:
+            await self.move_joints(stage_targets, stage_speed)
+        return await self.move_joints(targets, speed, wait=wait)
+
+    async def follow_trajectory(self, waypoints, linear_speed=0.1, angular_speed=60.0, rate_hz=50.0):
+        executor = TrajectoryExecutor(self.client.arm, rate_hz)
+        times, joints = executor.plan(CartesianTrajectory(waypoints, linear_speed, angular_speed))
+        await self._move(executor.approach, joints)
+        return await asyncio.wrap_future(self.client.submit_stream(executor, times, joints))
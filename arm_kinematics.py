@@ -0,0 +1,108 @@
+from collections import namedtuple
+import numpy as np
+
+# Joints solved by the IK, in column order of every joint array below.
+JOINT_ORDER = ("waist", "shoulder", "elbow", "wrist_angle", "wrist_rotate")
+
+# Link geometry of the WidowX 200 (meters), as used by WidowX200Arm.inverse_kinematics.
+D5 = 0.05  # End-effector offset
+L1 = 0.2   # Shoulder-to-elbow length
+L2 = 0.2   # Elbow-to-wrist center length
+
+# Result of a batched IK solve for N targets:
+#   joints        (N, 5) float64 degrees in JOINT_ORDER
+#   reachable     (N,) bool, wrist center within the arm's reach (otherwise the
+#                 solution points at the nearest reachable wrist position)
+#   within_limits (N,) bool, every joint inside JOINT_LIMITS
+#   feasible      (N,) bool, reachable and within_limits
+#   margin        (N,) float64 degrees to the closest joint limit (negative = violated)
+IKSolution = namedtuple("IKSolution", ["joints", "reachable", "within_limits", "feasible", "margin"])
+
+
+def _limit_arrays(joint_limits):
+    lower = np.array([joint_limits[joint][0] for joint in JOINT_ORDER], dtype=np.float64)
+    upper = np.array([joint_limits[joint][1] for joint in JOINT_ORDER], dtype=np.float64)
+    return lower, upper
+
+
+def solve_ik(targets, joint_limits):
+    """Inverse kinematics for an array of (x, y, z, pitch_deg[, roll_deg]) targets.
+
+    Same closed-form solution as WidowX200Arm.inverse_kinematics, evaluated for
+    all rows at once. Nothing is printed and unreachable targets are flagged in
+    ``reachable`` instead of being silently rescaled.
+    """
+    targets = np.atleast_2d(np.asarray(targets, dtype=np.float64))
+    if targets.shape[1] not in (4, 5):
+        raise ValueError(f"Expected (N, 4) or (N, 5) targets, got {targets.shape}")
+    x, y, z = targets[:, 0], targets[:, 1], targets[:, 2]
+    pitch = np.radians(targets[:, 3])
+    roll = np.radians(targets[:, 4]) if targets.shape[1] == 5 else np.zeros(len(targets))
+
+    q1 = np.arctan2(y, x)
+    r = np.hypot(x, y)
+    wrist_r = r - D5 * np.cos(pitch)
+    wrist_z = z - D5 * np.sin(pitch)
+    dist = np.hypot(wrist_r, wrist_z)
+    reachable = (dist >= abs(L1 - L2)) & (dist <= L1 + L2)
+
+    # Clipping the cosine is the same as moving the wrist center onto the edge of
+    # the reachable shell along its own direction, which is what the scalar IK does.
+    cos_angle = np.clip((wrist_r ** 2 + wrist_z ** 2 - L1 ** 2 - L2 ** 2) / (2 * L1 * L2), -1.0, 1.0)
+    q3 = np.arccos(cos_angle)
+    q2 = np.arctan2(wrist_z, wrist_r) - np.arctan2(L2 * np.sin(q3), L1 + L2 * np.cos(q3))
+    q4 = pitch - (q2 + q3)
+
+    joints = np.degrees(np.stack([q1, q2, q3, q4, roll], axis=1))
+    lower, upper = _limit_arrays(joint_limits)
+    margin = np.minimum(joints - lower, upper - joints).min(axis=1)
+    within_limits = margin >= 0
+    return IKSolution(joints, reachable, within_limits, reachable & within_limits, margin)
+
+
+class ReachabilityMap:
+    """Precomputed IK feasibility over a regular grid of the workspace.
+
+    Solves every grid point of ``workspace_limits`` for one gripper pitch/roll
+    once, so planners can score large batches of candidate positions with an
+    array lookup instead of an IK solve. Points outside the grid are infeasible.
+    """
+
+    def __init__(self, workspace_limits, joint_limits, pitch=0.0, roll=0.0, resolution=0.01):
+        self.pitch = pitch
+        self.roll = roll
+        self.resolution = resolution
+        self.axes = [np.arange(lo, hi + resolution / 2, resolution)
+                     for lo, hi in (workspace_limits['x'], workspace_limits['y'], workspace_limits['z'])]
+        self.origin = np.array([axis[0] for axis in self.axes])
+        self.shape = tuple(len(axis) for axis in self.axes)
+
+        grid = np.stack(np.meshgrid(*self.axes, indexing="ij"), axis=-1).reshape(-1, 3)
+        targets = np.column_stack([grid, np.full(len(grid), pitch), np.full(len(grid), roll)])
+        solution = solve_ik(targets, joint_limits)
+        self.joints = solution.joints.reshape(self.shape + (len(JOINT_ORDER),)).astype(np.float32)
+        self.feasible = solution.feasible.reshape(self.shape)
+        self.margin = solution.margin.reshape(self.shape).astype(np.float32)
+
+    @property
+    def coverage(self):
+        """Fraction of grid cells with a feasible solution."""
+        return float(self.feasible.mean())
+
+    def _indices(self, points):
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))[:, :3]
+        idx = np.rint((points - self.origin) / self.resolution).astype(np.int64)
+        inside = np.all((idx >= 0) & (idx < np.array(self.shape)), axis=1)
+        return np.clip(idx, 0, np.array(self.shape) - 1), inside
+
+    def lookup(self, points):
+        """(feasible, margin) of the grid cell nearest to each (x, y, z) point."""
+        idx, inside = self._indices(points)
+        cells = (idx[:, 0], idx[:, 1], idx[:, 2])
+        margin = np.where(inside, self.margin[cells], -np.inf)
+        return inside & self.feasible[cells], margin
+
+    def joints_at(self, points):
+        """Precomputed joint angles (degrees, JOINT_ORDER) at the nearest grid cell."""
+        idx, _ = self._indices(points)
+        return self.joints[idx[:, 0], idx[:, 1], idx[:, 2]]
@@ -0,0 +1,195 @@
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from arm_kinematics import JOINT_ORDER
+
+# XM430 profile velocity unit (rpm per register step) and ticks per revolution.
+VELOCITY_UNIT_RPM = 0.229
+TICKS_PER_REV = 4096
+
+
+def min_jerk(s):
+    """Minimum-jerk time scaling: 0 -> 1 with zero velocity and acceleration at both ends."""
+    return s ** 3 * (10 - 15 * s + 6 * s ** 2)
+
+
+class CartesianTrajectory:
+    """Straight-line segments between (x, y, z, pitch, roll) waypoints.
+
+    Each segment gets a minimum-jerk time profile, so the gripper comes to rest
+    at every waypoint. Segment durations follow from the average ``linear_speed``
+    (m/s) and ``angular_speed`` (deg/s), whichever is slower.
+    """
+
+    def __init__(self, waypoints, linear_speed=0.1, angular_speed=60.0, min_segment_time=0.2):
+        self.waypoints = np.atleast_2d(np.asarray(waypoints, dtype=np.float64))
+        if self.waypoints.shape[1] == 4:
+            self.waypoints = np.column_stack([self.waypoints, np.zeros(len(self.waypoints))])
+        if self.waypoints.shape[1] != 5 or len(self.waypoints) < 2:
+            raise ValueError("Need at least two (x, y, z, pitch[, roll]) waypoints")
+        deltas = np.diff(self.waypoints, axis=0)
+        linear = np.linalg.norm(deltas[:, :3], axis=1) / linear_speed
+        angular = np.abs(deltas[:, 3:]).max(axis=1) / angular_speed
+        self.durations = np.maximum(np.maximum(linear, angular), min_segment_time)
+        self.times = np.concatenate([[0.0], np.cumsum(self.durations)])
+
+    @property
+    def duration(self):
+        return float(self.times[-1])
+
+    def sample(self, rate_hz):
+        """Poses at a fixed rate: returns (times (M,), poses (M, 5)), ending exactly on the last waypoint."""
+        steps = max(1, int(np.ceil(self.duration * rate_hz)))
+        times = np.minimum(np.arange(steps + 1) / rate_hz, self.duration)
+        segment = np.clip(np.searchsorted(self.times, times, side="right") - 1, 0, len(self.durations) - 1)
+        s = min_jerk(np.clip((times - self.times[segment]) / self.durations[segment], 0.0, 1.0))
+        start = self.waypoints[segment]
+        poses = start + s[:, None] * (self.waypoints[segment + 1] - start)
+        return times, poses
+
+
+class TrajectoryReport:
+    """Timing and tracking statistics of one trajectory run.
+
+    Tracking error is the distance in degrees between each joint's present
+    position and the setpoint sent one control period earlier.
+    """
+
+    def __init__(self, steps, rate_hz):
+        self.steps = steps
+        self.rate_hz = rate_hz
+        self.sent = 0
+        self.missed_deadlines = 0
+        self.max_lateness = 0.0
+        self.duration = 0.0
+        self.read_failures = 0
+        self.cancelled = False
+        self.settled = None  # MotionHandle of the final setpoint (a cancelled Future if cancelled first)
+        self._errors = []
+
+    def record_error(self, errors):
+        self._errors.append(errors)
+
+    def tracking_error(self):
+        """{joint: {"rms": deg, "max": deg}} over all measured steps."""
+        if not self._errors:
+            return {}
+        errors = np.abs(np.array(self._errors))
+        return {joint: {"rms": float(np.sqrt(np.mean(errors[:, i] ** 2))), "max": float(errors[:, i].max())}
+                for i, joint in enumerate(JOINT_ORDER)}
+
+    def stats(self):
+        return {
+            "steps": self.steps,
+            "sent": self.sent,
+            "rate_hz": self.rate_hz,
+            "duration": round(self.duration, 3),
+            "missed_deadlines": self.missed_deadlines,
+            "max_lateness_ms": round(self.max_lateness * 1000.0, 2),
+            "read_failures": self.read_failures,
+            "cancelled": self.cancelled,
+            "tracking_error_deg": self.tracking_error(),
+        }
+
+
+class TrajectoryExecutor:
+    """Streams a CartesianTrajectory to the arm at a fixed control rate.
+
+    IK for every step is solved in one batch before the arm moves, so an
+    infeasible path is rejected up front. Each control period sends goal
+    velocity and position for all joints in one sync write, then reads the
+    present positions back in one sync read to measure tracking error. If the
+    loop falls behind it skips to the step that is due now and counts the
+    skipped ones as missed deadlines. ``cancel()`` ends the stream before its
+    next step.
+    """
+
+    def __init__(self, arm, rate_hz=50.0, measure=True):
+        self.arm = arm
+        self.rate_hz = rate_hz
+        self.measure = measure
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Stop stream() before its next step (or before it starts); the arm keeps the last goal sent."""
+        self._cancel.set()
+
+    def plan(self, trajectory):
+        """(times, joints) for every control step; raises ValueError if any step is infeasible."""
+        times, poses = trajectory.sample(self.rate_hz)
+        solution = self.arm.inverse_kinematics_batch(poses)
+        if not solution.feasible.all():
+            bad = np.flatnonzero(~solution.feasible)
+            raise ValueError(f"{len(bad)} of {len(poses)} trajectory steps are infeasible "
+                             f"(first at t={times[bad[0]]:.2f} s, pose {np.round(poses[bad[0]], 3).tolist()})")
+        return times, solution.joints
+
+    def _velocities(self, previous, current):
+        # Profile velocity that covers this step's distance in one control period.
+        ticks = np.abs(current - previous) * TICKS_PER_REV / 360.0
+        rpm = ticks * self.rate_hz * 60.0 / TICKS_PER_REV
+        return np.clip(np.ceil(rpm / VELOCITY_UNIT_RPM), 1, 1023)
+
+    def run(self, trajectory, approach_speed=200):
+        """Execute a trajectory and return its TrajectoryReport.
+
+        The arm first moves to the start pose at ``approach_speed`` and waits
+        for it to arrive; streaming starts from there.
+        """
+        times, joints = self.plan(trajectory)
+        self.approach(joints, approach_speed).result()
+        return self.stream(times, joints)
+
+    def approach(self, joints, speed=200):
+        """Move to the first step of a plan; returns its MotionHandle."""
+        return self.arm.move_joints(dict(zip(JOINT_ORDER, joints[0])), speed)
+
+    def stream(self, times, joints):
+        """Stream a plan from its first step, which the arm should already be at."""
+        report = TrajectoryReport(len(times), self.rate_hz)
+        primaries = [self.arm.servo_ids([joint])[0] for joint in JOINT_ORDER]
+        period = 1.0 / self.rate_hz
+        start = time.perf_counter()
+        previous, step = 0, 1
+        while step < len(times):
+            if self._cancel.is_set():
+                report.cancelled = True
+                report.settled = Future()
+                report.settled.cancel()
+                break
+            velocities = self._velocities(joints[previous], joints[step])
+            targets = dict(zip(JOINT_ORDER, joints[step]))
+            speeds = dict(zip(JOINT_ORDER, velocities))
+            if step == len(times) - 1:
+                # The last setpoint goes through move_joints so the caller gets a completion handle.
+                report.settled = self.arm.move_joints(targets, speeds)
+            else:
+                self.arm.stream_joints(targets, speeds)
+            report.sent += 1
+
+            if self.measure:
+                state = self.arm.read_state()
+                if state.ok:
+                    present = np.array([self.arm.position_to_degrees(state.positions[servo_id])
+                                        for servo_id in primaries])
+                    report.record_error(present - joints[previous])
+                else:
+                    report.read_failures += 1
+
+            if step == len(times) - 1:
+                break
+            # Sleep until the next step is due; if already late, skip to the step due now.
+            now = time.perf_counter() - start
+            next_step = step + 1
+            report.max_lateness = max(report.max_lateness, now - next_step * period)
+            due = int(now / period)
+            if due > next_step:
+                report.missed_deadlines += due - next_step
+                next_step = min(due, len(times) - 1)
+            else:
+                self._cancel.wait(max(0.0, next_step * period - now))
+            previous, step = step, next_step
+
+        report.duration = time.perf_counter() - start
+        return report
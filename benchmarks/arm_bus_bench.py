@@ -0,0 +1,97 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dynamixel_sim import SimPortHandler, SimPacketHandler
+from WidowX_Arm_Module import WidowX200Arm
+from arm_trajectory import CartesianTrajectory, TrajectoryExecutor
+
+# Benchmark: bus transactions, bytes and wall time per arm operation on the
+# simulated Dynamixel bus, next to the per-servo TxRx pattern the batched calls replaced.
+# Run from the repo root: python3 benchmarks/arm_bus_bench.py [--latency 0.001]
+
+MOVE = {"waist": 20, "shoulder": -30, "elbow": 45, "wrist_angle": 10, "wrist_rotate": 5}
+
+def legacy_move(arm, targets, speed):
+    """One write4ByteTxRx for goal velocity and one for goal position per servo."""
+    for joint, degrees in targets.items():
+        for servo_id, position in arm.joint_goals(joint, degrees).items():
+            arm.packet_handler.write4ByteTxRx(arm.port_handler, servo_id, arm.ADDR_GOAL_VELOCITY, speed)
+            arm.packet_handler.write4ByteTxRx(arm.port_handler, servo_id, arm.ADDR_GOAL_POSITION, position)
+
+def legacy_read(arm):
+    """One read4ByteTxRx of present position per servo."""
+    return {servo_id: arm.packet_handler.read4ByteTxRx(arm.port_handler, servo_id, arm.ADDR_PRESENT_POSITION)[0]
+            for servo_id in arm.servo_ids()}
+
+def legacy_torque(arm, value):
+    for servo_id in arm.servo_ids():
+        arm.packet_handler.write1ByteTxRx(arm.port_handler, servo_id, arm.ADDR_TORQUE_ENABLE, value)
+
+def settle(arm, handle):
+    """Poll until a move has arrived, outside the measured window."""
+    while not handle.done():
+        arm.motion_monitor.update(arm.read_state())
+        time.sleep(0.01)
+
+def measure(arm, port, fn):
+    port.reset_stats()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    elapsed = time.perf_counter() - start
+    stats = port.stats()
+    if hasattr(result, "done"):
+        settle(arm, result)
+    return stats["tx_packets"], stats["rx_packets"], stats["tx_bytes"] + stats["rx_bytes"], elapsed * 1000.0
+
+def prepare_trajectory(arm):
+    """Plan a 0.1 m line and move to its start; returns the measured streaming step."""
+    executor = TrajectoryExecutor(arm, rate_hz=50.0, measure=False)
+    times, joints = executor.plan(CartesianTrajectory([(0.3, 0.0, 0.2, 0, 0), (0.3, 0.1, 0.2, 0, 0)], 0.2))
+    settle(arm, executor.approach(joints))
+    return lambda: executor.stream(times, joints).settled
+
+def main():
+    parser = argparse.ArgumentParser(description="Bus cost of WidowX200Arm operations on the simulated bus.")
+    parser.add_argument("--latency", type=float, default=0.0005, help="seconds added to every transaction")
+    args = parser.parse_args()
+
+    port = SimPortHandler(latency=args.latency)
+    with contextlib.redirect_stdout(io.StringIO()):
+        arm = WidowX200Arm(port_handler=port, packet_handler=SimPacketHandler())
+    arm.MOTION_TIMEOUT = 30.0
+    # Resolve motion handles by hand so background polling does not count against an operation.
+    arm.motion_monitor.threaded = False
+
+    cases = [
+        ("enable (per-servo TxRx)", lambda: legacy_torque(arm, arm.TORQUE_ENABLE)),
+        ("enable", arm.enable),
+        ("enable again (always sent)", arm.enable),
+        ("set_all_speed", lambda: arm.set_all_speed(100)),
+        ("set_all_speed again (shadowed)", lambda: arm.set_all_speed(100)),
+        ("read positions (per-servo TxRx)", lambda: legacy_read(arm)),
+        ("read_state", arm.read_state),
+        ("read_state + velocity/load", lambda: arm.read_state(include_velocity_load=True)),
+        ("move 5 joints (per-servo TxRx)", lambda: legacy_move(arm, MOVE, 300)),
+        ("move_joints 5 joints", lambda: arm.move_joints({j: -d for j, d in MOVE.items()}, 200)),
+        ("move_joints, same speed", lambda: arm.move_joints(MOVE, 200)),
+        ("move_joints, unchanged", lambda: arm.move_joints(MOVE, 200)),
+    ]
+
+    print(f"Simulated bus, {args.latency * 1000:.2f} ms per transaction + wire time at {port.baudrate} bps\n")
+    print(f"{'operation':34s} {'tx pkts':>8s} {'rx pkts':>8s} {'bytes':>8s} {'ms':>9s}")
+    for name, fn in cases:
+        tx, rx, nbytes, ms = measure(arm, port, fn)
+        print(f"{name:34s} {tx:8d} {rx:8d} {nbytes:8d} {ms:9.2f}")
+    # Prepared last: the arm has to be at the trajectory start when streaming begins.
+    tx, rx, nbytes, ms = measure(arm, port, prepare_trajectory(arm))
+    print(f"{'stream 0.1 m trajectory at 50 Hz':34s} {tx:8d} {rx:8d} {nbytes:8d} {ms:9.2f}")
+    print(f"\nRegister shadow: {arm.register_shadow.stats()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dynamixel_sim import SimPortHandler, SimPacketHandler
+from WidowX_Arm_Module import WidowX200Arm
+from arm_client import ArmClient
+
+# Benchmark: how long a PRIORITY_SAFETY command (shutdown) waits on the ArmClient
+# I/O thread while follow_trajectory is streaming, on the simulated bus. It should
+# run at the trajectory's next control step, so the check fails above ~1.5 periods.
+# Run from the repo root: python3 benchmarks/arm_client_bench.py [--rate 50] [--runs 5]
+
+WAYPOINTS = [(0.3, 0.0, 0.2, 0, 0), (0.3, 0.1, 0.2, 0, 0), (0.3, -0.1, 0.2, 0, 0)]
+
+def safety_latency(client, rate_hz, delay):
+    """Start a trajectory, send shutdown() after ``delay`` s; returns (seconds, report)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.enable()
+        client.MoveArm(False, *WAYPOINTS[0], 300).result(timeout=30)
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(
+        report=client.follow_trajectory(WAYPOINTS, linear_speed=0.05, rate_hz=rate_hz)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread.start()
+        time.sleep(delay)
+        start = time.perf_counter()
+        client.shutdown()
+        elapsed = time.perf_counter() - start
+        thread.join()
+    return elapsed, result["report"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Safety command latency during an ArmClient trajectory.")
+    parser.add_argument("--rate", type=float, default=50.0, help="trajectory control rate (Hz)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0005, help="seconds added to every transaction")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        arm = WidowX200Arm(port_handler=SimPortHandler(latency=args.latency), packet_handler=SimPacketHandler())
+    period_ms = 1000.0 / args.rate
+    worst = 0.0
+    with ArmClient(arm) as client:
+        print(f"{'run':>4s} {'shutdown ms':>12s} {'steps sent':>11s} {'cancelled':>10s}")
+        for run in range(args.runs):
+            elapsed, report = safety_latency(client, args.rate, 0.5 + 0.1 * run)
+            worst = max(worst, elapsed * 1000.0)
+            print(f"{run:4d} {elapsed * 1000.0:12.2f} {f'{report.sent}/{report.steps}':>11s} {str(report.cancelled):>10s}")
+    ok = worst <= 1.5 * period_ms
+    print(f"\nWorst {worst:.2f} ms vs control period {period_ms:.2f} ms: {'OK' if ok else 'FAIL'}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from depth_sectors import DepthSectorEstimator, AVOIDANCE_SECTORS
+
+# Benchmark: DepthSectorEstimator vs. the float64 + np.percentile code it replaced.
+# Run from the repo root: python3 benchmarks/depth_sectors_bench.py
+
+WIDTH, HEIGHT = 1280, 720
+ITERATIONS = 100
+
+def make_depth(seed=0):
+    """Synthetic 1280x720 z16 frame: a floor gradient, a box obstacle and 15% holes."""
+    rng = np.random.default_rng(seed)
+    rows = np.linspace(4000, 600, HEIGHT)[:, None]
+    depth = np.repeat(rows, WIDTH, axis=1) + rng.normal(0, 20, (HEIGHT, WIDTH))
+    depth[200:500, 550:750] = 850
+    depth[rng.random((HEIGHT, WIDTH)) < 0.15] = 0
+    return depth.astype(np.uint16)
+
+def legacy_sectors(depth_image):
+    """The original per-cycle computation from main.obstacle_avoidance."""
+    depth_data = depth_image / 1000.0
+    height, width = depth_data.shape
+    left_region = depth_data[:, int(width * 0.2):int(width * 0.4)]
+    right_region = depth_data[:, int(width * 0.6):int(width * 0.8)]
+    center_region = depth_data[:, int(width * 0.4):int(width * 0.6)]
+
+    def get_filtered_distance(region):
+        valid_values = region[region > 0]
+        if valid_values.size == 0:
+            return float('inf')
+        return np.percentile(valid_values, 10)
+
+    return {
+        "left": get_filtered_distance(left_region),
+        "center": get_filtered_distance(center_region),
+        "right": get_filtered_distance(right_region),
+    }
+
+def time_it(fn, depth):
+    fn(depth)  # warm-up
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(depth)
+    return (time.perf_counter() - start) / ITERATIONS * 1000.0
+
+if __name__ == '__main__':
+    depth = make_depth()
+    estimators = {
+        "select": DepthSectorEstimator(AVOIDANCE_SECTORS, method="select"),
+        "histogram": DepthSectorEstimator(AVOIDANCE_SECTORS, method="histogram"),
+        "select, rows 25-75%, stride 2": DepthSectorEstimator(AVOIDANCE_SECTORS, row_band=(0.25, 0.75), stride=2),
+    }
+
+    legacy = legacy_sectors(depth)
+    print("Legacy:    " + ", ".join(f"{k}={v:.3f} m" for k, v in legacy.items()))
+    for name, estimator in estimators.items():
+        readings = estimator.estimate(depth)
+        print(f"{name}: " + ", ".join(f"{k}={r.distance:.3f} m ({r.valid_ratio:.0%} valid)"
+                                      for k, r in readings.items()))
+
+    legacy_ms = time_it(legacy_sectors, depth)
+    print(f"\nLegacy float64 + np.percentile: {legacy_ms:8.3f} ms/frame")
+    for name, estimator in estimators.items():
+        ms = time_it(estimator.estimate, depth)
+        print(f"{name:30s}: {ms:8.3f} ms/frame ({legacy_ms / ms:.1f}x)")
@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import cv2
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from session_log import SessionRecorder
+
+# Per-stage benchmark of the camera_server perception path.
+#
+# Drives the real camera_server functions on synthetic frames (default), a recorded
+# session (--session DIR) or the live camera (--live), and reports latency
+# percentiles and throughput for every stage. Results are saved as JSON; pass
+# --compare OLD.json to flag stages whose median got slower.
+#
+# Run from the repo root (yolov4-tiny.weights must be present):
+#   python3 benchmarks/perception_bench.py --iterations 100 --output perception_bench.json
+
+STAGES = [
+    "wait_for_frames",
+    "align.process",
+    "blobFromImage",
+    "net.forward",
+    "decode+nms",
+    "get_distance",
+    "draw",
+    "imencode_rgb",
+    "render_depth",
+    "imencode_depth",
+    "detect_objects",
+]
+
+def make_synthetic_session(path, frames=20, seed=0):
+    """Write a short session of 1920x1080 color and 1280x720 depth frames."""
+    rng = np.random.default_rng(seed)
+    rows = np.linspace(4000, 600, 720)[:, None]
+    with SessionRecorder(path, chunk_size=frames) as recorder:
+        for i in range(frames):
+            color = rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+            cv2.rectangle(color, (600 + 10 * i, 300), (1100 + 10 * i, 900), (40, 90, 200), -1)
+            depth = np.repeat(rows, 1280, axis=1) + rng.normal(0, 20, (720, 1280))
+            depth[rng.random(depth.shape) < 0.15] = 0
+            recorder.record_frames(color, depth.astype(np.uint16), i / 30.0)
+
+def load_camera_server(session_path):
+    if session_path:
+        os.environ["LOCOBOT_REPLAY"] = session_path
+        os.environ["LOCOBOT_REPLAY_SPEED"] = "0"
+    import camera_server
+    # The benchmark drives the pipeline itself, so stop the shared capture thread.
+    camera_server.start_camera().stop()
+    if camera_server.session_replay is not None:
+        camera_server.pipeline.loop = True
+    return camera_server
+
+def run(cs, iterations, warmup):
+    from frame_hub import FramePacket
+
+    def make_packet(seq, frames):
+        # Same processing setup as the packets the server's FrameHub publishes.
+        return FramePacket(seq, time.time(), frames, cs.align, None, cs.frame_hub.decimation, cs.frame_hub.decimator)
+
+    timings = {stage: [] for stage in STAGES}
+    total = []
+    for i in range(warmup + iterations):
+        sample = {}
+
+        def timed(stage, fn, *args):
+            start = time.perf_counter()
+            result = fn(*args)
+            sample[stage] = time.perf_counter() - start
+            return result
+
+        frame_start = time.perf_counter()
+        frames = timed("wait_for_frames", cs.pipeline.wait_for_frames)
+        frames.keep()
+        packet = make_packet(i + 1, frames)
+
+        aligned = timed("align.process", packet.aligned)
+        color_image = np.asanyarray(aligned.get_color_frame().get_data())
+        depth_frame = aligned.get_depth_frame()
+        height, width, _ = color_image.shape
+
+        blob = timed("blobFromImage", cs.make_blob, color_image)
+        outs = timed("net.forward", cs.run_yolo, blob)
+        decoded = timed("decode+nms", cs.decode_yolo_outputs, outs, width, height,
+                        cs.CONFIDENCE_THRESHOLD, cs.NMS_THRESHOLD)
+        detections = timed("get_distance", cs.build_detections, decoded, depth_frame)
+
+        image = np.array(color_image)
+        timed("draw", cs.draw_detections, image, detections)
+        timed("imencode_rgb", cv2.imencode, '.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 50])
+        depth_colored = timed("render_depth", cs.render_depth, packet)
+        timed("imencode_depth", cv2.imencode, '.jpg', depth_colored, [cv2.IMWRITE_JPEG_QUALITY, 50])
+        frame_time = time.perf_counter() - frame_start
+
+        # End to end on a fresh packet so the cached alignment above is not reused.
+        timed("detect_objects", cs.detect_objects, make_packet(i + 1, frames))
+
+        if i >= warmup:
+            for stage, seconds in sample.items():
+                timings[stage].append(seconds)
+            total.append(frame_time)
+    return timings, total
+
+def summarize(samples):
+    ms = np.asarray(samples) * 1000.0
+    return {
+        "count": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "throughput_hz": float(1000.0 / ms.mean()) if ms.mean() > 0 else float('inf'),
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit', '?')}):")
+    for stage, stats in results["stages"].items():
+        old = baseline["stages"].get(stage)
+        if not old or old["p50_ms"] <= 0:
+            continue
+        change = stats["p50_ms"] / old["p50_ms"] - 1.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"  {stage:16s} p50 {old['p50_ms']:8.2f} -> {stats['p50_ms']:8.2f} ms ({change:+.0%}){flag}")
+        if flag:
+            regressions.append(stage)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage perception benchmark for camera_server.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--session", help="replay a recorded session directory")
+    source.add_argument("--live", action="store_true", help="use the connected RealSense camera")
+    parser.add_argument("--profile", default="inspection", help="capture profile (must include color)")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--output", default="perception_bench.json")
+    parser.add_argument("--compare", help="previous results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed p50 slowdown before flagging")
+    args = parser.parse_args()
+    for name in ("session", "output", "compare"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    os.environ["LOCOBOT_CAPTURE_PROFILE"] = args.profile
+    os.chdir(REPO_ROOT)  # camera_server loads the model files relative to the repo root
+    with tempfile.TemporaryDirectory() as tmp:
+        session_path = args.session
+        if not args.live and not session_path:
+            session_path = os.path.join(tmp, "synthetic")
+            make_synthetic_session(session_path)
+            source = "synthetic"
+        else:
+            source = "live" if args.live else args.session
+
+        cs = load_camera_server(session_path)
+        timings, total = run(cs, args.iterations, args.warmup)
+
+    results = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": source,
+        "profile": args.profile,
+        "iterations": args.iterations,
+        "stages": {stage: summarize(samples) for stage, samples in timings.items() if samples},
+        "frame": summarize(total),
+    }
+
+    print(f"{'stage':16s} {'mean':>8s} {'p50':>8s} {'p90':>8s} {'p99':>8s}   (ms)")
+    for stage, stats in list(results["stages"].items()) + [("frame total", results["frame"])]:
+        print(f"{stage:16s} {stats['mean_ms']:8.2f} {stats['p50_ms']:8.2f} {stats['p90_ms']:8.2f} "
+              f"{stats['p99_ms']:8.2f}")
+    print(f"Throughput: {results['frame']['throughput_hz']:.1f} frames/s (excluding detect_objects)")
+
+    # Compare before saving, in case --output and --compare name the same file.
+    regressions = compare(results, args.compare, args.threshold) if args.compare else []
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to {args.output}")
+
+    if regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
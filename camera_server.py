@@ -1,24 +1,100 @@
-from flask import Flask, Response, render_template_string, request
+from flask import Flask, Response, jsonify, render_template_string, request
 import pyrealsense2 as rs
 import numpy as np
 import cv2
 import threading
 import time
-
-# --- Initialization of RealSense and YOLO --- #
-pipeline = rs.pipeline()
-config = rs.config()
-config.enable_stream(rs.stream.color, 1920, 1080, rs.format.bgr8, 30)
-config.enable_stream(rs.stream.depth, 1280, 720, rs.format.z16, 30)
-pipeline.start(config)
-align = rs.align(rs.stream.color)
-
-# Load YOLO model and class labels
-net = cv2.dnn.readNet("yolov4-tiny.weights", "yolov4-tiny.cfg")
-layer_names = net.getLayerNames()
-output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers()]
-with open("coco.names", "r") as f:
-    classes = f.read().strip().split("\n")
+import os
+from frame_hub import FrameHub
+from detection_worker import Detection, DetectionScheduler, DetectionWorker
+from yolo_decode import decode_yolo_outputs
+from mjpeg_broadcaster import MjpegBroadcaster
+from session_log import SessionReplay
+from capture_profiles import DEFAULT_PROFILE, get_profile, enable_streams, make_decimator
+
+# --- RealSense and YOLO, initialized on first use --- #
+# Importing this module touches no hardware and loads no model: start_camera()
+# opens the camera (or a replay) and load_yolo() reads the network weights.
+capture_profile = None
+session_replay = None
+pipeline = None
+align = None
+frame_hub = None
+net = None
+output_layers = None
+classes = None
+detection_worker = None
+rgb_broadcaster = None
+depth_broadcaster = None
+_init_lock = threading.Lock()
+
+# Detection parameters
+CONFIDENCE_THRESHOLD = 0.3
+NMS_THRESHOLD = 0.4
+
+# Share of wall time YOLO may use, so it cannot starve the obstacle-avoidance loop
+DETECTION_CPU_BUDGET = float(os.environ.get("LOCOBOT_DETECTION_CPU_BUDGET", "0.5"))
+DETECTION_LATENCY_BUDGET = 0.15  # seconds; slower inference means the CPU is contended
+
+def start_camera(profile=None):
+    """Start the camera (or replay) and the shared FrameHub once; returns the hub.
+
+    ``profile`` names a capture profile (see capture_profiles.py); by default it
+    comes from LOCOBOT_CAPTURE_PROFILE. Set LOCOBOT_REPLAY=<session_dir> to serve a
+    recorded session (see session_log.py) instead of the camera;
+    LOCOBOT_REPLAY_SPEED sets the playback rate (0 = unthrottled). Once the camera
+    runs, asking for a different profile raises ValueError.
+    """
+    global capture_profile, session_replay, pipeline, align, frame_hub
+    global detection_worker, rgb_broadcaster, depth_broadcaster
+    with _init_lock:
+        if frame_hub is not None:
+            if profile is not None and get_profile(profile).name != capture_profile.name:
+                raise ValueError(f"Camera already running with capture profile '{capture_profile.name}', "
+                                 f"cannot switch to '{profile}'")
+            return frame_hub
+        capture_profile = get_profile(profile or os.environ.get("LOCOBOT_CAPTURE_PROFILE", DEFAULT_PROFILE))
+        replay_path = os.environ.get("LOCOBOT_REPLAY")
+        if replay_path:
+            session_replay = SessionReplay(replay_path)
+            pipeline = session_replay.pipeline(speed=float(os.environ.get("LOCOBOT_REPLAY_SPEED", "1.0")))
+            pipeline.start()
+            align = session_replay.align()
+            decimator = None
+        else:
+            pipeline = rs.pipeline()
+            config = enable_streams(rs.config(), capture_profile)
+            pipeline.start(config)
+            align = rs.align(rs.stream.color)
+            decimator = make_decimator(capture_profile)
+
+        # A single capture thread owns the pipeline; every consumer reads from the hub.
+        # Alignment and decimation only run (once per frame) when a consumer asks for them.
+        hub = FrameHub(pipeline, align, decimation=capture_profile.decimation, decimator=decimator)
+        hub.start()
+
+        # YOLO runs on its own thread; streams only overlay its latest results.
+        # The worker is started by the first consumer that needs detections.
+        detection_worker = DetectionWorker(hub, detect_objects, detection_scheduler)
+
+        # Each stream type is encoded once per frame and shared by all of its viewers.
+        rgb_broadcaster = MjpegBroadcaster(hub, render_rgb, name="rgb", quality=50)
+        depth_broadcaster = MjpegBroadcaster(hub, render_depth, name="depth", quality=50)
+        frame_hub = hub
+        return frame_hub
+
+def load_yolo():
+    """Load the YOLO network and class labels on first use."""
+    global net, output_layers, classes
+    with _init_lock:
+        if net is None:
+            model = cv2.dnn.readNet("yolov4-tiny.weights", "yolov4-tiny.cfg")
+            layer_names = model.getLayerNames()
+            output_layers = [layer_names[i - 1] for i in model.getUnconnectedOutLayers()]
+            with open("coco.names", "r") as f:
+                classes = f.read().strip().split("\n")
+            net = model
+    return net
 
 # Flask application setup
 app = Flask(__name__)
@@ -41,93 +117,117 @@ html_code = """
 </html>
 """
 
-def get_rgb():
-    frames = pipeline.wait_for_frames()
-    aligned_frames = align.process(frames)
+def make_blob(color_image):
+    """Resize and normalize a BGR image into the 416x416 YOLO input blob."""
+    return cv2.dnn.blobFromImage(color_image, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
+
+def run_yolo(blob):
+    """Run the network on an input blob and return the raw output layers."""
+    model = load_yolo()
+    model.setInput(blob)
+    return model.forward(output_layers)
+
+def build_detections(decoded, depth_frame):
+    """Turn decoded boxes into Detection tuples with the distance at each box center."""
+    load_yolo()  # class labels
+    detections = []
+    for (x, y, w, h), class_id, confidence in zip(decoded["box"].tolist(), decoded["class_id"].tolist(),
+                                                  decoded["score"].tolist()):
+        # Get object distance from depth
+        center_x = x + w // 2
+        center_y = y + h // 2
+        depth_value = depth_frame.get_distance(center_x, center_y)
+        distance_cm = depth_value * 100  # meters to cm
+        detections.append(Detection(str(classes[class_id]), class_id, confidence, (x, y, w, h), distance_cm))
+    return detections
+
+def detect_objects(packet):
+    """Run YOLO on a frame packet and return a list of Detection tuples."""
+    # Per-detection distance needs depth registered to the color image.
+    aligned_frames = packet.aligned()
     color_frame = aligned_frames.get_color_frame()
     depth_frame = aligned_frames.get_depth_frame()
 
     color_image = np.asanyarray(color_frame.get_data())
+    outs = run_yolo(make_blob(color_image))
 
-    # YOLO Detection
-    blob = cv2.dnn.blobFromImage(color_image, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
-    net.setInput(blob)
-    outs = net.forward(output_layers)
-
-    class_ids, confidences, boxes = [], [], []
     height, width, _ = color_image.shape
-
-    for out in outs:
-        for detection in out:
-            scores = detection[5:]
-            class_id = np.argmax(scores)
-            confidence = scores[class_id]
-            if confidence > 0.3:
-                center_x = int(detection[0] * width)
-                center_y = int(detection[1] * height)
-                w = int(detection[2] * width)
-                h = int(detection[3] * height)
-                x = int(center_x - w / 2)
-                y = int(center_y - h / 2)
-                boxes.append([x, y, w, h])
-                confidences.append(float(confidence))
-                class_ids.append(class_id)
-
-    indexes = cv2.dnn.NMSBoxes(boxes, confidences, 0.3, 0.4)
-    for i in range(len(boxes)):
-        if i in indexes:
-            x, y, w, h = boxes[i]
-            label = str(classes[class_ids[i]])
-            confidence = confidences[i]
-            # Get object distance from depth
-            center_x = x + w // 2
-            center_y = y + h // 2
-            depth_value = depth_frame.get_distance(center_x, center_y)
-            distance_cm = depth_value * 100  # meters to cm
-
-            cv2.rectangle(color_image, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.putText(color_image, f"{label} {confidence:.2f} | {distance_cm:.1f} cm", 
-                        (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-    _, rgb_encoded = cv2.imencode('.jpg', color_image, [cv2.IMWRITE_JPEG_QUALITY, 50])
+    decoded = decode_yolo_outputs(outs, width, height, CONFIDENCE_THRESHOLD, NMS_THRESHOLD)
+    return build_detections(decoded, depth_frame)
+
+def draw_detections(image, detections):
+    """Draw detection boxes and labels onto a BGR image in place."""
+    for det in detections:
+        x, y, w, h = det.box
+        cv2.rectangle(image, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cv2.putText(image, f"{det.label} {det.confidence:.2f} | {det.distance_cm:.1f} cm",
+                    (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+# Paces the detection worker that start_camera() creates.
+detection_scheduler = DetectionScheduler(cpu_budget=DETECTION_CPU_BUDGET, latency_budget=DETECTION_LATENCY_BUDGET)
+
+def render_rgb(packet):
+    """Color image of a packet with the latest detections drawn on top."""
+    color_frame = packet.get_color_frame()
+
+    # Copy: the frame buffer is shared with every other consumer of the hub.
+    color_image = np.array(color_frame.get_data())
+
+    result = detection_worker.latest()
+    if result is not None:
+        draw_detections(color_image, result.detections)
+    return color_image
+
+def render_depth(packet):
+    """Colorized depth preview of a packet."""
+    # Decimated raw depth: a preview needs neither full resolution nor color registration.
+    depth_image = packet.decimated_depth()
+    return cv2.applyColorMap(cv2.convertScaleAbs(depth_image, alpha=0.03), cv2.COLORMAP_JET)
+
+def get_rgb(packet=None):
+    if packet is None:
+        hub = start_camera()
+        packet = hub.wait_for_frame(hub.seq)
+    _, rgb_encoded = cv2.imencode('.jpg', render_rgb(packet), [cv2.IMWRITE_JPEG_QUALITY, 50])
     return rgb_encoded
 
-def get_depth():
-    frames = pipeline.wait_for_frames()
-    aligned_frames = align.process(frames)
-    depth_frame = aligned_frames.get_depth_frame()
-    depth_image = np.asanyarray(depth_frame.get_data())
-    depth_colored = cv2.applyColorMap(cv2.convertScaleAbs(depth_image, alpha=0.03), cv2.COLORMAP_JET)
-    _, depth_encoded = cv2.imencode('.jpg', depth_colored, [cv2.IMWRITE_JPEG_QUALITY, 50])
+def get_depth(packet=None):
+    if packet is None:
+        hub = start_camera()
+        packet = hub.wait_for_frame(hub.seq)
+    _, depth_encoded = cv2.imencode('.jpg', render_depth(packet), [cv2.IMWRITE_JPEG_QUALITY, 50])
     return depth_encoded
 
 @app.route('/video_feed_depth')
 def video_feed_depth():
-    def stream_video():
-        while True:
-            frame = get_depth().tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n\r\n')
-    return Response(stream_video(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(depth_broadcaster.stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/video_feed_rgb')
 def video_feed_rgb():
-    def stream_video():
-        while True:
-            frame = get_rgb().tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n\r\n')
-    return Response(stream_video(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    if capture_profile.color is None:
+        return f"Capture profile '{capture_profile.name}' has no color stream.", 404
+    detection_worker.start()
+    return Response(rgb_broadcaster.stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/stream_stats')
+def stream_stats():
+    return jsonify([rgb_broadcaster.stats(), depth_broadcaster.stats()])
+
+@app.route('/detection_stats')
+def detection_stats():
+    return jsonify(detection_worker.stats())
 
 @app.route('/')
 def index():
     return render_template_string(html_code)
 
 def run_server():
+    start_camera()
     app.run(host='0.0.0.0', port=5000, threaded=True)
 
 def start_camera_server():
-    """Start the Flask camera preview server in a new daemon thread."""
+    """Start the camera and the Flask preview server (in a new daemon thread)."""
+    start_camera()
     server_thread = threading.Thread(target=run_server, daemon=True)
     server_thread.start()
     return server_thread
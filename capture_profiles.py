@@ -0,0 +1,44 @@
+from collections import namedtuple
+import pyrealsense2 as rs
+
+# A capture profile picks which RealSense streams run and at what resolution/rate.
+# color/depth are (width, height, fps) or None to leave the stream off. decimation
+# is the factor applied to the depth view shared with navigation consumers
+# (packet.decimated_depth()); 1 means the full-resolution depth image.
+CaptureProfile = namedtuple("CaptureProfile", ["name", "color", "depth", "decimation"])
+
+CAPTURE_PROFILES = {
+    # Full color for detection plus full depth (the original camera_server setup).
+    "inspection": CaptureProfile("inspection", (1920, 1080, 30), (1280, 720, 30), 4),
+    # Obstacle avoidance only: coarse depth, no color stream over USB at all.
+    "navigation": CaptureProfile("navigation", None, (424, 240, 30), 2),
+    # Remote driving: small color preview plus coarse depth.
+    "preview": CaptureProfile("preview", (640, 360, 30), (640, 360, 30), 2),
+}
+
+DEFAULT_PROFILE = "inspection"
+
+def get_profile(name):
+    """Look up a capture profile by name."""
+    try:
+        return CAPTURE_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown capture profile '{name}'. Choose from: {', '.join(CAPTURE_PROFILES)}")
+
+def enable_streams(config, profile):
+    """Enable the streams of ``profile`` on an rs.config."""
+    if profile.color is not None:
+        width, height, fps = profile.color
+        config.enable_stream(rs.stream.color, width, height, rs.format.bgr8, fps)
+    if profile.depth is not None:
+        width, height, fps = profile.depth
+        config.enable_stream(rs.stream.depth, width, height, rs.format.z16, fps)
+    return config
+
+def make_decimator(profile):
+    """RealSense decimation filter for the profile's depth view, or None if not decimating."""
+    if profile.decimation <= 1:
+        return None
+    decimator = rs.decimation_filter()
+    decimator.set_option(rs.option.filter_magnitude, profile.decimation)
+    return decimator
@@ -0,0 +1,106 @@
+from collections import namedtuple
+import numpy as np
+import cv2
+
+# Distance estimate for one sector: distance in meters (inf if no valid pixels) and
+# the fraction of pixels in the sector that carried a depth reading.
+SectorReading = namedtuple("SectorReading", ["distance", "valid_ratio"])
+
+# Column ranges as fractions of the image width.
+AVOIDANCE_SECTORS = {
+    "left": (0.2, 0.4),
+    "center": (0.4, 0.6),
+    "right": (0.6, 0.8),
+}
+
+WALL_FOLLOW_SECTORS = {
+    "left": (0.0, 1 / 3),
+    "center": (1 / 3, 2 / 3),
+    "right": (2 / 3, 1.0),
+}
+
+
+class DepthSectorEstimator:
+    """Low-percentile obstacle distance per vertical sector of a depth image.
+
+    Works directly on the uint16 depth buffer (no float copy of the frame). Each
+    sector is a column range, optionally limited to a band of rows and sampled
+    with a stride. Two ways to get the percentile:
+
+    - ``"select"``: partial selection with ``np.partition``; same value as
+      ``np.percentile`` on the valid pixels, without a full sort.
+    - ``"histogram"``: ``cv2.calcHist`` over the raw uint16 values with
+      ``bin_mm`` resolution; never copies the valid pixels at all.
+    """
+
+    def __init__(self, sectors=None, row_band=(0.0, 1.0), percentile=10, method="select",
+                 depth_scale=0.001, bin_mm=10, max_range_mm=10000, stride=1):
+        if method not in ("select", "histogram"):
+            raise ValueError(f"Unknown percentile method: {method}")
+        self.sectors = dict(sectors if sectors is not None else AVOIDANCE_SECTORS)
+        self.row_band = row_band
+        self.percentile = percentile
+        self.method = method
+        self.depth_scale = depth_scale
+        self.bin_mm = bin_mm
+        self.max_range_mm = max_range_mm
+        self.stride = stride
+        self._slices = {}
+        self._shape = None
+
+    def _sector_slices(self, shape):
+        # Column/row boundaries only depend on the frame shape, so compute them once.
+        if shape != self._shape:
+            height, width = shape
+            r0, r1 = int(height * self.row_band[0]), int(height * self.row_band[1])
+            self._slices = {
+                name: (slice(r0, r1, self.stride), slice(int(width * c0), int(width * c1), self.stride))
+                for name, (c0, c1) in self.sectors.items()
+            }
+            self._shape = shape
+        return self._slices
+
+    def _select(self, region):
+        valid = region[region > 0]
+        if valid.size == 0:
+            return float('inf'), 0
+        # Linear interpolation between the two neighbouring order statistics, as np.percentile does.
+        pos = (valid.size - 1) * self.percentile / 100.0
+        lo = int(pos)
+        hi = min(lo + 1, valid.size - 1)
+        part = np.partition(valid, (lo, hi))
+        value = part[lo] + (pos - lo) * (float(part[hi]) - float(part[lo]))
+        return float(value) * self.depth_scale, valid.size
+
+    def _histogram(self, region):
+        if region.strides[1] != region.itemsize:
+            region = np.ascontiguousarray(region)
+        count = cv2.countNonZero(region)
+        if count == 0:
+            return float('inf'), 0
+        bins = int(np.ceil(self.max_range_mm / self.bin_mm))
+        # Range starts at 1 so zero (no reading) pixels are never counted.
+        hist = cv2.calcHist([region], [0], None, [bins], [1, 1 + bins * self.bin_mm]).ravel()
+        rank = max(1, int(np.ceil(count * self.percentile / 100.0)))
+        cumulative = np.cumsum(hist)
+        if cumulative[-1] < rank:
+            # The requested percentile lies beyond max_range_mm.
+            return self.max_range_mm * self.depth_scale, count
+        idx = int(np.searchsorted(cumulative, rank))
+        # Report the middle of the bin that holds the requested rank.
+        value_mm = 1 + (idx + 0.5) * self.bin_mm
+        return value_mm * self.depth_scale, count
+
+    def estimate(self, depth_image):
+        """Return {sector_name: SectorReading} for a uint16 depth image."""
+        readings = {}
+        measure = self._select if self.method == "select" else self._histogram
+        for name, (rows, cols) in self._sector_slices(depth_image.shape).items():
+            region = depth_image[rows, cols]
+            distance, valid = measure(region)
+            readings[name] = SectorReading(distance, valid / region.size if region.size else 0.0)
+        return readings
+
+    def distances(self, depth_image):
+        """Shortcut returning only {sector_name: distance_m}."""
+        return {name: r.distance for name, r in self.estimate(depth_image).items()}
@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+# Seconds between checks for frames while the FrameHub is stopped.
+HUB_RETRY_INTERVAL = 0.5
+
+# One detected object: box is (x, y, w, h) in color image pixels.
+Detection = namedtuple("Detection", ["label", "class_id", "confidence", "box", "distance_cm"])
+
+
+class DetectionResult:
+    """Detections computed for one frame, stamped with the frame they came from."""
+
+    def __init__(self, seq, frame_timestamp, detections, latency):
+        self.seq = seq
+        self.frame_timestamp = frame_timestamp
+        self.timestamp = time.time()
+        self.detections = detections
+        self.latency = latency
+
+    @property
+    def age(self):
+        """Seconds between the frame being captured and now."""
+        return time.time() - self.frame_timestamp
+
+
+class DetectionScheduler:
+    """Decides how often the detection worker may run inference.
+
+    Inference latency is tracked with an exponential moving average. The interval
+    between runs is chosen so inference occupies at most ``cpu_budget`` of wall
+    time (0.5 = half of the time), capped at ``max_rate_hz``. If ``latency_budget``
+    is set and inference takes longer than that (a sign the CPU is contended),
+    the interval is stretched by the same ratio. Frames in between are skipped
+    and readers keep seeing the previous result.
+    """
+
+    def __init__(self, cpu_budget=0.5, latency_budget=None, max_rate_hz=30.0, min_rate_hz=0.5, smoothing=0.2):
+        self.cpu_budget = cpu_budget
+        self.latency_budget = latency_budget
+        self.max_rate_hz = max_rate_hz
+        self.min_rate_hz = min_rate_hz
+        self.smoothing = smoothing
+        self.latency = None
+        self.interval = 1.0 / max_rate_hz
+        self._next_run = 0.0
+        self._runs = deque(maxlen=64)
+
+    def wait_time(self, now=None):
+        """Seconds until the next inference is allowed (0 if it may run now)."""
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._next_run - now)
+
+    def record(self, latency, started=None):
+        """Feed back the latency of an inference that started at ``started`` (monotonic)."""
+        started = time.monotonic() - latency if started is None else started
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+
+        interval = max(self.latency / self.cpu_budget, 1.0 / self.max_rate_hz)
+        if self.latency_budget and self.latency > self.latency_budget:
+            interval *= self.latency / self.latency_budget
+        self.interval = min(interval, 1.0 / self.min_rate_hz)
+        self._next_run = started + self.interval
+        self._runs.append(started)
+
+    @property
+    def target_rate(self):
+        return 1.0 / self.interval
+
+    @property
+    def effective_rate(self):
+        """Detections per second actually achieved over the recent runs, up to now."""
+        if len(self._runs) < 2:
+            return 0.0
+        span = self._runs[-1] - self._runs[0]
+        if span <= 0:
+            return 0.0
+        # Once the gap since the last run outgrows the mean interval, count it too,
+        # so the rate decays while detection is stalled instead of freezing.
+        gap = time.monotonic() - self._runs[-1]
+        span += max(0.0, gap - span / (len(self._runs) - 1))
+        return (len(self._runs) - 1) / span
+
+    def stats(self):
+        return {
+            "cpu_budget": self.cpu_budget,
+            "latency_budget_ms": self.latency_budget * 1000.0 if self.latency_budget else None,
+            "latency_ms": self.latency * 1000.0 if self.latency is not None else None,
+            "target_rate_hz": self.target_rate,
+            "effective_rate_hz": self.effective_rate,
+        }
+
+
+class DetectionWorker:
+    """Runs object detection on a background thread, always on the newest frame.
+
+    ``detect_fn(packet)`` is called with a FramePacket from ``frame_hub`` and must
+    return a list of Detection tuples. Frames that arrive while inference is busy
+    are skipped rather than queued, so each frame is processed at most once no
+    matter how many clients read the results. An optional DetectionScheduler
+    further limits how often inference runs.
+    """
+
+    def __init__(self, frame_hub, detect_fn, scheduler=None):
+        self.frame_hub = frame_hub
+        self.detect_fn = detect_fn
+        self.scheduler = scheduler
+        self.frames_processed = 0
+        self.frames_skipped = 0
+        self._result = None
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the worker thread; safe to call from several request handlers."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="detection-worker", daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _run(self):
+        last_seq = 0
+        while self._running:
+            if self.scheduler is not None:
+                # Sleep off the budget first, then take whatever frame is newest.
+                delay = self.scheduler.wait_time()
+                if delay > 0:
+                    time.sleep(min(delay, 1.0))
+                    continue
+            try:
+                packet = self.frame_hub.wait_for_frame(last_seq, timeout=1.0)
+            except RuntimeError:
+                if not self.frame_hub.running:
+                    # A stopped hub fails every wait at once; poll slowly until it restarts.
+                    time.sleep(HUB_RETRY_INTERVAL)
+                continue
+            if last_seq:
+                self.frames_skipped += packet.seq - last_seq - 1
+            last_seq = packet.seq
+
+            started = time.monotonic()
+            start = time.perf_counter()
+            try:
+                detections = self.detect_fn(packet)
+            except Exception as e:
+                print(f"DetectionWorker: detection failed on frame {packet.seq}: {e}")
+                continue
+            latency = time.perf_counter() - start
+            if self.scheduler is not None:
+                self.scheduler.record(latency, started)
+            result = DetectionResult(packet.seq, packet.timestamp, detections, latency)
+
+            with self._cond:
+                self._result = result
+                self.frames_processed += 1
+                self._cond.notify_all()
+
+    def stats(self):
+        """Worker counters plus the scheduler's budget and rates, if any."""
+        stats = {"frames_processed": self.frames_processed, "frames_skipped": self.frames_skipped}
+        if self.scheduler is not None:
+            stats.update(self.scheduler.stats())
+        return stats
+
+    def latest(self):
+        """Return the most recent DetectionResult, or None before the first one."""
+        with self._cond:
+            return self._result
+
+    def wait_for_result(self, after_seq=0, timeout=5.0):
+        """Block until a result for a frame newer than ``after_seq`` is available."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._result is None or self._result.seq <= after_seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f"DetectionWorker: no result after seq {after_seq} within {timeout} s")
+                self._cond.wait(remaining)
+            return self._result
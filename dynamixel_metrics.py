@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import Counter, defaultdict
+from dynamixel_sdk import *  # Dynamixel SDK
+
+# Upper bucket bounds of the latency histograms, in milliseconds.
+LATENCY_BUCKETS_MS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128, float('inf'))
+
+# Bits of the XM430 Hardware Error Status register (address 70).
+HARDWARE_ERROR_BITS = {
+    0: "input_voltage",
+    2: "overheating",
+    3: "motor_encoder",
+    4: "electrical_shock",
+    5: "overload",
+}
+
+# Status packet error byte: bit 7 is the hardware alert, the rest an error number.
+STATUS_ERRORS = {
+    1: "result_fail",
+    2: "instruction",
+    3: "crc",
+    4: "data_range",
+    5: "data_length",
+    6: "data_limit",
+    7: "access",
+}
+
+# Packet handler calls that are one bus transaction; the servo ID is the second
+# argument unless the call is a broadcast.
+UNICAST_OPS = (
+    "ping", "reboot", "readTx", "readRx", "readTxRx", "read1ByteTxRx", "read2ByteTxRx", "read4ByteTxRx",
+    "writeTxOnly", "writeTxRx", "write1ByteTxOnly", "write1ByteTxRx", "write2ByteTxOnly", "write2ByteTxRx",
+    "write4ByteTxOnly", "write4ByteTxRx",
+)
+BROADCAST_OPS = ("syncReadTx", "syncWriteTxOnly", "bulkReadTx", "bulkWriteTxOnly", "broadcastPing")
+# Calls that return (data, result) with no status error byte.
+DATA_RESULT_OPS = ("broadcastPing",)
+
+
+def decode_hardware_error(value):
+    """Names of the bits set in a Hardware Error Status register value."""
+    return [name for bit, name in HARDWARE_ERROR_BITS.items() if value & (1 << bit)]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (LATENCY_BUCKETS_MS) with count, mean and max."""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+
+    def percentile(self, p):
+        """Upper bound (ms) of the bucket holding the p-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100.0
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max, 3),
+            "buckets": {("inf" if bound == float('inf') else f"<={bound}ms"): n
+                        for bound, n in zip(LATENCY_BUCKETS_MS, self.buckets)},
+        }
+
+
+class TransactionStats:
+    """Latency histogram and result/error counters for one operation or one servo."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.comm_results = Counter()
+        self.status_errors = Counter()
+        self.hardware_alerts = 0
+        self.last_failure = None
+
+    def record(self, seconds, result, error, result_name):
+        self.latency.record(seconds)
+        self.comm_results[result_name] += 1
+        if result != COMM_SUCCESS:
+            self.last_failure = time.time()
+        if error & 0x80:
+            self.hardware_alerts += 1
+        if error & 0x7F:
+            self.status_errors[STATUS_ERRORS.get(error & 0x7F, str(error & 0x7F))] += 1
+
+    @property
+    def failures(self):
+        return sum(n for name, n in self.comm_results.items() if name != "success")
+
+    def to_dict(self):
+        return {
+            "transactions": self.latency.count,
+            "failures": self.failures,
+            "latency": self.latency.to_dict(),
+            "comm_results": dict(self.comm_results),
+            "status_errors": dict(self.status_errors),
+            "hardware_alerts": self.hardware_alerts,
+            "last_failure": self.last_failure,
+        }
+
+
+class InstrumentedPacketHandler:
+    """Wraps a Dynamixel packet handler and records every bus transaction.
+
+    Each call in UNICAST_OPS / BROADCAST_OPS is timed, and its comm result and
+    status error byte are counted per operation and per servo ID (broadcasts
+    count under BROADCAST_ID; sync-read replies show up per servo as
+    ``readRx``). Everything else is passed through untouched, so the wrapper can
+    be handed to GroupSyncRead/GroupSyncWrite like the original handler.
+    """
+
+    def __init__(self, packet_handler):
+        self._ph = packet_handler
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __getattr__(self, name):
+        attr = getattr(self._ph, name)
+        if name in UNICAST_OPS or name in BROADCAST_OPS:
+            return self._instrumented(name, attr)
+        return attr
+
+    def _instrumented(self, name, fn):
+        def call(port, *args):
+            start = time.perf_counter()
+            ret = fn(port, *args)
+            elapsed = time.perf_counter() - start
+            # Calls return result, (result, error), (data, result, error) or (data, result).
+            if name in DATA_RESULT_OPS:
+                result, error = ret[1], 0
+            elif isinstance(ret, tuple):
+                result, error = ret[-2], ret[-1]
+            else:
+                result, error = ret, 0
+            servo_id = BROADCAST_ID if name in BROADCAST_OPS else args[0]
+            self.record(name, servo_id, elapsed, result, error or 0)
+            return ret
+        return call
+
+    def record(self, operation, servo_id, seconds, result, error=0):
+        result_name = "success" if result == COMM_SUCCESS else self._ph.getTxRxResult(result)
+        with self._lock:
+            self.operations[operation].record(seconds, result, error, result_name)
+            self.servos[servo_id].record(seconds, result, error, result_name)
+
+    def reset(self):
+        with self._lock:
+            self.operations = defaultdict(TransactionStats)
+            self.servos = defaultdict(TransactionStats)
+            self.started = time.time()
+
+    def stats(self):
+        """{"operations": {name: stats}, "servos": {id: stats}} since the last reset()."""
+        with self._lock:
+            return {
+                "since": self.started,
+                "operations": {name: s.to_dict() for name, s in self.operations.items()},
+                "servos": {servo_id: s.to_dict() for servo_id, s in sorted(self.servos.items())},
+            }
+
+    def failing_servos(self, min_failures=1):
+        """Servo IDs with at least ``min_failures`` failed transactions, worst first."""
+        with self._lock:
+            counts = {servo_id: s.failures for servo_id, s in self.servos.items() if servo_id != BROADCAST_ID}
+        return sorted((i for i, n in counts.items() if n >= min_failures), key=lambda i: -counts[i])
+
+    def slowest_servos(self, n=3):
+        """[(servo_id, p99_ms)] of the servos with the slowest replies."""
+        with self._lock:
+            p99 = [(servo_id, s.latency.percentile(99)) for servo_id, s in self.servos.items()
+                   if servo_id != BROADCAST_ID and s.latency.count]
+        return sorted(p99, key=lambda item: -item[1])[:n]
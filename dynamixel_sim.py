@@ -0,0 +1,290 @@
+import threading
+import time
+from collections import Counter
+from dynamixel_sdk import *  # Dynamixel SDK
+from dynamixel_sdk.protocol2_packet_handler import Protocol2PacketHandler
+
+# XM430-W350 control table entries the simulation models.
+ADDR_MODEL_NUMBER = 0
+ADDR_FIRMWARE_VERSION = 6
+ADDR_ID = 7
+ADDR_TORQUE_ENABLE = 64
+ADDR_HARDWARE_ERROR_STATUS = 70
+ADDR_PROFILE_VELOCITY = 112
+ADDR_GOAL_POSITION = 116
+ADDR_MOVING = 122
+ADDR_PRESENT_LOAD = 126
+ADDR_PRESENT_VELOCITY = 128
+ADDR_PRESENT_POSITION = 132
+CONTROL_TABLE_SIZE = 700
+
+XM430_MODEL_NUMBER = 1020
+VELOCITY_UNIT_RPM = 0.229
+MAX_VELOCITY = 210  # no-load speed of an XM430-W350 at 12 V, in 0.229 rpm units
+ERRBIT_ALERT = 0x80
+ERRNUM_INSTRUCTION = 0x02
+
+INSTRUCTION_NAMES = {
+    INST_PING: "ping", INST_READ: "read", INST_WRITE: "write", INST_REG_WRITE: "reg_write",
+    INST_ACTION: "action", INST_FACTORY_RESET: "factory_reset", INST_REBOOT: "reboot",
+    INST_SYNC_READ: "sync_read", INST_FAST_SYNC_READ: "fast_sync_read", INST_SYNC_WRITE: "sync_write",
+    INST_BULK_READ: "bulk_read", INST_FAST_BULK_READ: "fast_bulk_read", INST_BULK_WRITE: "bulk_write",
+}
+
+
+class SimServo:
+    """Register table of one simulated XM430 plus a simple motion model.
+
+    With torque on, present position moves toward goal position at the profile
+    velocity (0 means MAX_VELOCITY); present velocity and the moving flag follow.
+    Set ``online`` to False to make the servo stop answering, or write a value to
+    the hardware error status register to raise the alert bit in its replies.
+    """
+
+    def __init__(self, dxl_id, position=2048, model_number=XM430_MODEL_NUMBER):
+        self.id = dxl_id
+        self.online = True
+        self.registers = bytearray(CONTROL_TABLE_SIZE)
+        self.set_value(ADDR_MODEL_NUMBER, 2, model_number)
+        self.set_value(ADDR_FIRMWARE_VERSION, 1, 46)
+        self.set_value(ADDR_ID, 1, dxl_id)
+        self.set_value(ADDR_GOAL_POSITION, 4, position, signed=True)
+        self.set_value(ADDR_PRESENT_POSITION, 4, position, signed=True)
+        self._position = float(position)
+        self._updated = time.monotonic()
+
+    def value(self, addr, length, signed=False):
+        return int.from_bytes(self.registers[addr:addr + length], "little", signed=signed)
+
+    def set_value(self, addr, length, value, signed=False):
+        self.registers[addr:addr + length] = int(value).to_bytes(length, "little", signed=signed)
+
+    def read(self, addr, length):
+        self.advance()
+        return list(self.registers[addr:addr + length])
+
+    def write(self, addr, data):
+        self.advance()
+        self.registers[addr:addr + len(data)] = bytes(data)
+
+    @property
+    def error(self):
+        return ERRBIT_ALERT if self.value(ADDR_HARDWARE_ERROR_STATUS, 1) else 0
+
+    def advance(self, now=None):
+        """Move the present position on to ``now``."""
+        now = time.monotonic() if now is None else now
+        dt, self._updated = now - self._updated, now
+        goal = self.value(ADDR_GOAL_POSITION, 4, signed=True)
+        velocity = 0
+        if self.value(ADDR_TORQUE_ENABLE, 1) and self._position != goal:
+            units = self.value(ADDR_PROFILE_VELOCITY, 4) or MAX_VELOCITY
+            units = min(units, MAX_VELOCITY)
+            ticks_per_s = units * VELOCITY_UNIT_RPM / 60.0 * 4096
+            step = ticks_per_s * dt
+            if abs(goal - self._position) <= step:
+                self._position = float(goal)
+            else:
+                direction = 1 if goal > self._position else -1
+                self._position += direction * step
+                velocity = direction * units
+        self.set_value(ADDR_PRESENT_POSITION, 4, round(self._position), signed=True)
+        self.set_value(ADDR_PRESENT_VELOCITY, 4, velocity, signed=True)
+        self.set_value(ADDR_MOVING, 1, 1 if velocity else 0)
+
+    def reboot(self):
+        self.set_value(ADDR_HARDWARE_ERROR_STATUS, 1, 0)
+        self.set_value(ADDR_TORQUE_ENABLE, 1, 0)
+
+
+class SimPortHandler:
+    """Drop-in replacement for dynamixel_sdk.PortHandler backed by simulated servos.
+
+    Instruction packets written by the real Protocol 2.0 encoder are decoded and
+    applied to the register table of each addressed SimServo, and their status
+    packets are queued for ``readPort``. Every transaction costs ``latency``
+    seconds, plus the wire time of its bytes at the baud rate if ``wire_time`` is
+    set. Packets and bytes are counted in both directions, per instruction.
+    """
+
+    def __init__(self, port_name="sim", servo_ids=range(1, 10), latency=0.0, wire_time=True, baudrate=1000000):
+        self.port_name = port_name
+        self.baudrate = baudrate
+        self.latency = latency
+        self.wire_time = wire_time
+        self.servos = {dxl_id: SimServo(dxl_id) for dxl_id in servo_ids}
+        self.is_open = False
+        self.is_using = False
+        self.packet_start_time = 0.0
+        self.packet_timeout = 0.0
+        self._codec = Protocol2PacketHandler()
+        self._rx = bytearray()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    # --- PortHandler interface --- #
+    def openPort(self):
+        self.is_open = True
+        return True
+
+    def closePort(self):
+        self.is_open = False
+
+    def clearPort(self):
+        self._rx.clear()
+
+    def setPortName(self, port_name):
+        self.port_name = port_name
+
+    def getPortName(self):
+        return self.port_name
+
+    def setBaudRate(self, baudrate):
+        self.baudrate = baudrate
+        return True
+
+    def getBaudRate(self):
+        return self.baudrate
+
+    def getBytesAvailable(self):
+        return len(self._rx)
+
+    def readPort(self, length):
+        data = bytes(self._rx[:length])
+        del self._rx[:length]
+        return data
+
+    def writePort(self, packet):
+        packet = list(packet)
+        with self._lock:
+            self.tx_packets += 1
+            self.tx_bytes += len(packet)
+            replies = self._handle(packet)
+            rx_bytes = sum(len(reply) for reply in replies)
+            self.rx_packets += len(replies)
+            self.rx_bytes += rx_bytes
+            for reply in replies:
+                self._rx.extend(reply)
+        delay = self.latency
+        if self.wire_time:
+            delay += (len(packet) + rx_bytes) * 10.0 / self.baudrate
+        if delay > 0:
+            time.sleep(delay)
+        return len(packet)
+
+    def setPacketTimeout(self, packet_length):
+        self.packet_start_time = time.monotonic()
+        self.packet_timeout = 0.0
+
+    def setPacketTimeoutMillis(self, msec):
+        self.packet_start_time = time.monotonic()
+        self.packet_timeout = msec / 1000.0
+
+    def isPacketTimeout(self):
+        # Replies are queued the moment a packet is written, so an empty buffer
+        # means the servo is not going to answer.
+        return not self._rx
+
+    # --- Simulation --- #
+    def reset_stats(self):
+        self.tx_packets = 0
+        self.tx_bytes = 0
+        self.rx_packets = 0
+        self.rx_bytes = 0
+        self.instructions = Counter()
+
+    def stats(self):
+        return {
+            "tx_packets": self.tx_packets,
+            "tx_bytes": self.tx_bytes,
+            "rx_packets": self.rx_packets,
+            "rx_bytes": self.rx_bytes,
+            "instructions": dict(self.instructions),
+        }
+
+    def _status(self, servo, params=(), error=None):
+        params = list(params)
+        length = len(params) + 4
+        packet = [0xFF, 0xFF, 0xFD, 0x00, servo.id, DXL_LOBYTE(length), DXL_HIBYTE(length), INST_STATUS,
+                  servo.error if error is None else error] + params + [0, 0]
+        packet = self._codec.addStuffing(packet)
+        total = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H]) + 7
+        crc = self._codec.updateCRC(0, packet, total - 2)
+        packet[total - 2] = DXL_LOBYTE(crc)
+        packet[total - 1] = DXL_HIBYTE(crc)
+        return bytes(packet[:total])
+
+    def _online(self, dxl_id):
+        servo = self.servos.get(dxl_id)
+        return servo if servo is not None and servo.online else None
+
+    def _handle(self, packet):
+        packet = self._codec.removeStuffing(packet)
+        dxl_id = packet[PKT_ID]
+        length = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
+        instruction = packet[PKT_INSTRUCTION]
+        params = packet[PKT_PARAMETER0:PKT_PARAMETER0 + length - 3]
+        self.instructions[INSTRUCTION_NAMES.get(instruction, hex(instruction))] += 1
+
+        if instruction == INST_SYNC_WRITE:
+            addr, size = DXL_MAKEWORD(params[0], params[1]), DXL_MAKEWORD(params[2], params[3])
+            for i in range(4, len(params), size + 1):
+                servo = self._online(params[i])
+                if servo:
+                    servo.write(addr, params[i + 1:i + 1 + size])
+            return []
+        if instruction == INST_BULK_WRITE:
+            i = 0
+            while i < len(params):
+                addr, size = DXL_MAKEWORD(params[i + 1], params[i + 2]), DXL_MAKEWORD(params[i + 3], params[i + 4])
+                servo = self._online(params[i])
+                if servo:
+                    servo.write(addr, params[i + 5:i + 5 + size])
+                i += 5 + size
+            return []
+        if instruction == INST_SYNC_READ:
+            addr, size = DXL_MAKEWORD(params[0], params[1]), DXL_MAKEWORD(params[2], params[3])
+            return [self._status(servo, servo.read(addr, size))
+                    for servo in map(self._online, params[4:]) if servo]
+        if instruction == INST_BULK_READ:
+            replies = []
+            for i in range(0, len(params), 5):
+                servo = self._online(params[i])
+                if servo:
+                    addr, size = DXL_MAKEWORD(params[i + 1], params[i + 2]), DXL_MAKEWORD(params[i + 3], params[i + 4])
+                    replies.append(self._status(servo, servo.read(addr, size)))
+            return replies
+        if instruction == INST_PING and dxl_id == BROADCAST_ID:
+            return [self._status(servo, servo.read(ADDR_MODEL_NUMBER, 2) + servo.read(ADDR_FIRMWARE_VERSION, 1))
+                    for servo in self.servos.values() if servo.online]
+
+        servo = self._online(dxl_id)
+        if servo is None:
+            return []  # Unknown or offline ID (or an unsupported broadcast): no reply.
+        if instruction == INST_PING:
+            return [self._status(servo, servo.read(ADDR_MODEL_NUMBER, 2) + servo.read(ADDR_FIRMWARE_VERSION, 1))]
+        if instruction == INST_READ:
+            addr, size = DXL_MAKEWORD(params[0], params[1]), DXL_MAKEWORD(params[2], params[3])
+            return [self._status(servo, servo.read(addr, size))]
+        if instruction == INST_WRITE:
+            servo.write(DXL_MAKEWORD(params[0], params[1]), params[2:])
+            return [self._status(servo)]
+        if instruction == INST_REBOOT:
+            servo.reboot()
+            return [self._status(servo)]
+        return [self._status(servo, error=ERRNUM_INSTRUCTION)]
+
+
+class SimPacketHandler(Protocol2PacketHandler):
+    """The real Protocol 2.0 packet handler, counting transactions per instruction.
+
+    Pair it with a SimPortHandler; it works unchanged with a real PortHandler too.
+    """
+
+    def __init__(self, protocol_version=2.0):
+        super().__init__()
+        self.transactions = Counter()
+
+    def txPacket(self, port, txpacket):
+        self.transactions[INSTRUCTION_NAMES.get(txpacket[PKT_INSTRUCTION], hex(txpacket[PKT_INSTRUCTION]))] += 1
+        return super().txPacket(port, txpacket)
@@ -1,32 +1,43 @@
 import pykobuki
 import time
 
-# Initialize the robot
+# Initialize the robot. Its safety reflex stops the base on the very sensor packet
+# that reports a bump or a cliff, then queues an event for this script.
 kobuki = pykobuki.Kobuki()
+kobuki.configure_safety(bumper="stop", cliff="stop", wheel_drop="lock")
 
 # Set forward speed and rotation speed
 linear_speed = 0.2
 angular_speed = 0.0
 
+kobuki.move(linear_speed, angular_speed)
 while True:
-    # Read sensor data
-    sensors = kobuki.read_sensor_data()
+    # Wait for the reflex instead of polling the sensors
+    event = kobuki.wait_for_safety_event(timeout=1.0)
+    if event is None:
+        continue
+    if not event['triggered']:
+        # The wheels are back on the ground; drive on
+        if event['sensor'] == 'wheel_drop':
+            kobuki.move(linear_speed, angular_speed)
+        continue
 
-    # If any bumper is pressed, reverse and rotate
-    if sensors['bumper_left'] or sensors['bumper_center'] or sensors['bumper_right']:
-        print("Bumper pressed! Reversing and rotating.")
+    # If any bumper is pressed, reverse and rotate (the reflex only allows backing away)
+    if event['sensor'] == 'bumper':
+        print(f"Bumper pressed! Reflex stopped the base ({event['latency_ms']} ms). Reversing and rotating.")
         kobuki.move(-linear_speed, 3.14 / 1.8)  # Reverse and rotate
-        time.sleep(2)
+        time.sleep(2)  # The reflex keeps watching the sensors meanwhile
 
-    # If a cliff is detected, stop and reverse
-    elif sensors['cliff_left'] or sensors['cliff_center'] or sensors['cliff_right']:
-        print("Cliff detected! Reversing.")
+    # If a cliff is detected, reverse
+    elif event['sensor'] == 'cliff':
+        print(f"Cliff detected! Reflex stopped the base ({event['latency_ms']} ms). Reversing.")
         kobuki.move(-linear_speed, 0.0)  # Reverse without rotation
         time.sleep(1)
 
-    # Continue moving forward if no obstacle is detected
-    else:
-        kobuki.move(linear_speed, angular_speed)
-    
-    # Pause for a short time to allow sensor data to update
-    time.sleep(0.1)
+    # A wheel drop means the robot was lifted or a wheel is hanging; stay stopped until it clears
+    elif event['sensor'] == 'wheel_drop':
+        print("Wheel drop! Waiting for the wheels to touch down.")
+        continue
+
+    # The reflex cancelled the forward command; resume it
+    kobuki.move(linear_speed, angular_speed)
@@ -1,30 +1,36 @@
 import pykobuki
 import time
 
-# Initialize the robot
+# Initialize the robot. Its safety reflex stops the base on the very sensor packet
+# that reports a bump or a cliff, then queues an event for this script.
 kobuki = pykobuki.Kobuki()
+kobuki.configure_safety(bumper="stop", cliff="stop", wheel_drop="lock")
 
 # Set forward speed and rotation speed
 linear_speed = 0.2
 angular_speed = 0.0
 
+kobuki.move(linear_speed, angular_speed)
 while True:
-    # Read sensor data
-    sensors = kobuki.read_sensor_data()
+    # Handle every event queued since the last pass
+    for event in kobuki.read_safety_events():
+        if not event['triggered']:
+            continue
 
-    # If a bumper is pressed, reverse and rotate
-    if sensors['bumper_left'] or sensors['bumper_center'] or sensors['bumper_right']:
-        print("Bumper pressed! Reversing and rotating.")
-        kobuki.move(-linear_speed, 3.14 / 1.8)  # Reverse and rotate
-        time.sleep(2)
+        # If a bumper is pressed, reverse and rotate
+        if event['sensor'] == 'bumper':
+            print("Bumper pressed! Reversing and rotating.")
+            kobuki.move(-linear_speed, 3.14 / 1.8)  # Reverse and rotate
+            time.sleep(2)
 
-    # If a cliff is detected, stop and reverse
-    elif sensors['cliff_left'] or sensors['cliff_center'] or sensors['cliff_right']:
-        print("Cliff detected! Reversing.")
-        kobuki.move(-linear_speed, 0.0)  # Reverse without rotation
-        time.sleep(1)
+        # If a cliff is detected, reverse
+        elif event['sensor'] == 'cliff':
+            print("Cliff detected! Reversing.")
+            kobuki.move(-linear_speed, 0.0)  # Reverse without rotation
+            time.sleep(1)
 
-    # Continue moving forward
-    else:
+        # Continue along the path
         kobuki.move(linear_speed, angular_speed)
-    time.sleep(0.1)
+
+    # Path updates go here; the reflex covers the sensors in between
+    kobuki.wait_for_sensor_data()
@@ -2,37 +2,31 @@ import pykobuki
 import time
 import random
 
-# Initialize the robot
+# Initialize the robot. Its safety reflex stops the base on the very sensor packet
+# that reports a bump or a cliff, then queues an event for this script.
 kobuki = pykobuki.Kobuki()
+kobuki.configure_safety(bumper="stop", cliff="stop", wheel_drop="lock")
 
 # Set the movement parameters
 linear_speed = 0.2
 angular_speed = 3.14 / 2  # 90-degree turn speed
 
+def avoid():
+    kobuki.move(-linear_speed, 0)  # Reverse
+    time.sleep(1)
+    kobuki.move(0, random.choice([-angular_speed, angular_speed]))  # Rotate randomly
+    time.sleep(1)
+
 while True:
-    # Read sensor data
-    sensors = kobuki.read_sensor_data()
+    # Move in a random direction for 2 seconds, unless the reflex reports an event first
+    direction = random.choice([0, 1])  # 0 for forward, 1 for reverse
+    kobuki.move(linear_speed if direction == 0 else -linear_speed, 0)
+    event = kobuki.wait_for_safety_event(timeout=2.0)
 
     # If any bumper is pressed or cliff is detected, avoid and change direction
-    if sensors['bumper_left'] or sensors['bumper_center'] or sensors['bumper_right']:
-        print("Obstacle detected! Changing direction.")
-        kobuki.move(-linear_speed, 0)  # Reverse
-        time.sleep(1)
-        kobuki.move(0, random.choice([-angular_speed, angular_speed]))  # Rotate randomly
-        time.sleep(1)
-
-    elif sensors['cliff_left'] or sensors['cliff_center'] or sensors['cliff_right']:
-        print("Cliff detected! Changing direction.")
-        kobuki.move(-linear_speed, 0)  # Reverse
-        time.sleep(1)
-        kobuki.move(0, random.choice([-angular_speed, angular_speed]))  # Rotate randomly
-        time.sleep(1)
-
-    # Continue moving in a random direction
-    else:
-        direction = random.choice([0, 1])  # 0 for forward, 1 for reverse
-        if direction == 0:
-            kobuki.move(linear_speed, 0)  # Move forward
-        else:
-            kobuki.move(-linear_speed, 0)  # Move backward
-        time.sleep(2)  # Move for 2 seconds before changing direction
+    if event is not None and event['triggered']:
+        if event['sensor'] == 'bumper':
+            print("Obstacle detected! Changing direction.")
+        elif event['sensor'] == 'cliff':
+            print("Cliff detected! Changing direction.")
+        avoid()
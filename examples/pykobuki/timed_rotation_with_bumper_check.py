@@ -1,29 +1,35 @@
 import pykobuki
+import math
 import time
 
-# Initialize the robot
+# Initialize the robot. Its safety reflex stops the base on the very sensor packet
+# that reports a bump, then queues an event for this script.
 kobuki = pykobuki.Kobuki()
+kobuki.configure_safety(bumper="stop")
 
-# Set the rotation speed and duration
-angular_speed = 3.14 / 2  # 90-degree turn speed
-rotation_time = 3  # Rotate for 3 seconds
+# Set the rotation speed, the heading to turn to and a timeout in case it is never reached
+angular_speed = 3.14 / 2  # 90 degrees per second
+target_heading = math.pi / 2  # Turn 90 degrees to the left (below pi, since theta wraps around)
+rotation_timeout = 5  # Give up after 5 seconds
 
-start_time = time.time()
-while True:
-    # Check if rotation time has passed
-    if time.time() - start_time < rotation_time:
-        # Rotate the robot
-        kobuki.move(0, angular_speed)
-    else:
-        # Stop rotating after the specified time
-        kobuki.move(0, 0)
+kobuki.reset_odometry()
+kobuki.move(0, angular_speed)
+end_time = time.monotonic() + rotation_timeout
+while time.monotonic() < end_time:
+    # The odometry pose updates on every sensor packet; check it once per packet
+    kobuki.wait_for_sensor_data()
+    if kobuki.get_pose().theta >= target_heading:
         break
 
-    # Check if any bumper is pressed during the rotation
-    sensors = kobuki.read_sensor_data()
-    if sensors['bumper_left'] or sensors['bumper_center'] or sensors['bumper_right']:
-        print("Bumper pressed! Reversing.")
-        kobuki.move(-0.2, 0)  # Reverse for 1 second
-        time.sleep(1)
+    for event in kobuki.read_safety_events():
+        if event['triggered'] and event['sensor'] == 'bumper':
+            print("Bumper pressed! Reversing.")
+            kobuki.move(-0.2, 0)  # Reverse for 1 second (straight back, so the heading holds)
+            time.sleep(1)
+            kobuki.move(0, angular_speed)  # Resume the rotation
+else:
+    print(f"Heading target not reached within {rotation_timeout} s.")
 
-    time.sleep(0.1)  # Small delay to allow sensor data to update
+# Stop rotating
+kobuki.move(0, 0)
+print(f"Heading after rotation: {kobuki.get_pose().theta:.2f} rad (target {target_heading:.2f} rad)")
@@ -1,48 +1,47 @@
-from flask import Flask, Response, render_template_string, request
-import pyrealsense2 as rs
-import numpy as np
-import cv2
+from flask import Flask, Response, jsonify, render_template_string, request
 import time
 import threading
 import pykobuki
 import os
+import sys
 import random
 
-app = Flask(__name__)
-
-# Initialize RealSense pipeline
-pipeline = rs.pipeline()
-config = rs.config()
-config.enable_stream(rs.stream.color, 1920, 1080, rs.format.bgr8, 30)
-config.enable_stream(rs.stream.depth, 1280, 720, rs.format.z16, 30)
-pipeline.start(config)
-
-# Align depth to color
-align = rs.align(rs.stream.color)
+# Share the capture pipeline and perception code with camera_server.py at the repo root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import camera_server
+from depth_sectors import DepthSectorEstimator, AVOIDANCE_SECTORS, WALL_FOLLOW_SECTORS
+from velocity_arbiter import VelocityArbiter, PRIORITY_SAFETY, PRIORITY_TELEOP, PRIORITY_AUTONOMY
 
-# Load YOLO model
-net = cv2.dnn.readNet("yolov4-tiny.weights", "yolov4-tiny.cfg")
-layer_names = net.getLayerNames()
-output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers()]
+# The demo streams and navigates on depth only, so skip the color stream entirely
+# (and never load YOLO).
+frame_hub = camera_server.start_camera(os.environ.get("LOCOBOT_CAPTURE_PROFILE", "navigation"))
+depth_broadcaster = camera_server.depth_broadcaster
+session_replay = camera_server.session_replay
 
-# Load COCO class labels
-with open("coco.names", "r") as f:
-    classes = f.read().strip().split("\n")
+app = Flask(__name__)
 
-# Detection & Obstacle Avoidance Parameters
-confidence_threshold = 0.3
-nms_threshold = 0.4
+# Obstacle Avoidance Parameters
 LEFT_THRESHOLD = 1
 RIGHT_THRESHOLD = 1
 CENTER_THRESHOLD = 0.7
 
 ROBOT_SPEED = 1/4
 
+# 10th-percentile distance per sector, computed on the raw uint16 depth buffer
+avoidance_sectors = DepthSectorEstimator(AVOIDANCE_SECTORS, percentile=10, method="histogram")
+wall_follow_sectors = DepthSectorEstimator(WALL_FOLLOW_SECTORS, percentile=10, method="histogram")
+
 # Movement control toggle (default OFF)
 movement_enabled = False  
 
 stuck_direction = "Left"
 
+# Seconds each source's last command stays in force; key repeat refreshes teleop while a key is held.
+TELEOP_TIMEOUT = 0.3
+AUTONOMY_TIMEOUT = 0.5
+SAFETY_TIMEOUT = 0.5
+BACKOFF_SPEED = -0.1
+
 def adjust_thresholds_for_speed():
     global LEFT_THRESHOLD, RIGHT_THRESHOLD, CENTER_THRESHOLD
     # Increase thresholds as speed increases
@@ -55,176 +54,122 @@ def adjust_thresholds_for_speed():
         LEFT_THRESHOLD = 0.6
         RIGHT_THRESHOLD = 0.6
 
-def get_rgb():
-    frames = pipeline.wait_for_frames()
-    aligned_frames = align.process(frames)
-    color_frame = aligned_frames.get_color_frame()
-    depth_frame = aligned_frames.get_depth_frame()
-
-    color_image = np.asanyarray(color_frame.get_data())
-
-    # YOLO Detection
-    blob = cv2.dnn.blobFromImage(color_image, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
-    net.setInput(blob)
-    outs = net.forward(output_layers)
-
-    class_ids, confidences, boxes = [], [], []
-    height, width, _ = color_image.shape
-
-    for out in outs:
-        for detection in out:
-            scores = detection[5:]
-            class_id = np.argmax(scores)
-            confidence = scores[class_id]
-            if confidence > confidence_threshold:
-                center_x = int(detection[0] * width)
-                center_y = int(detection[1] * height)
-                w = int(detection[2] * width)
-                h = int(detection[3] * height)
-                x = int(center_x - w / 2)
-                y = int(center_y - h / 2)
-                boxes.append([x, y, w, h])
-                confidences.append(float(confidence))
-                class_ids.append(class_id)
-
-    indexes = cv2.dnn.NMSBoxes(boxes, confidences, confidence_threshold, nms_threshold)
-
-    for i in range(len(boxes)):
-        if i in indexes:
-            x, y, w, h = boxes[i]
-            label = str(classes[class_ids[i]])
-            confidence = confidences[i]
-
-            # Get object distance
-            center_x = x + w // 2
-            center_y = y + h // 2
-            depth_value = depth_frame.get_distance(center_x, center_y)  # Meters
-            distance_cm = depth_value * 100  # Convert to cm
-
-            cv2.rectangle(color_image, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.putText(color_image, f"{label} {confidence:.2f} | {distance_cm:.1f} cm", 
-                        (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-    _, rgb_encoded = cv2.imencode('.jpg', color_image, [cv2.IMWRITE_JPEG_QUALITY, 50])
-    return rgb_encoded
-
-def get_depth():
-    frames = pipeline.wait_for_frames()
-    aligned_frames = align.process(frames)
-    depth_frame = aligned_frames.get_depth_frame()
-    depth_image = np.asanyarray(depth_frame.get_data())
-    depth_colored = cv2.applyColorMap(cv2.convertScaleAbs(depth_image, alpha=0.03), cv2.COLORMAP_JET)
-    _, depth_encoded = cv2.imencode('.jpg', depth_colored, [cv2.IMWRITE_JPEG_QUALITY, 50])
-    return depth_encoded
-
 def obstacle_avoidance():
     global movement_enabled, ROBOT_SPEED, stuck_direction
+    seq = 0
     while True:
         adjust_thresholds_for_speed()  # Adjust thresholds based on speed
 
         if not movement_enabled:
-            robot.move(0, 0)
+            # Withdraw instead of sending stop commands; the arbiter stops the base once.
+            arbiter.release("autonomy")
             time.sleep(0.1)
             continue
 
-        frames = pipeline.wait_for_frames()
-        depth_frame = frames.get_depth_frame()
-        depth_data = np.asanyarray(depth_frame.get_data()) / 1000.0  # Convert mm to meters
-
-        height, width = depth_data.shape
-        # Adjust the width percentages to focus more on the center
-        left_region = depth_data[:, int(width * 0.2):int(width * 0.4)]  # Smaller left region (20%-40%)
-        right_region = depth_data[:, int(width * 0.6):int(width * 0.8)]  # Smaller right region (60%-80%)
-        center_region = depth_data[:, int(width * 0.4):int(width * 0.6)]  # Center region (40%-60%)
+        packet = frame_hub.wait_for_frame(seq)
+        seq = packet.seq
+        depth_image = packet.decimated_depth()
 
-        def get_filtered_distance(region):
-            valid_values = region[region > 0]  # Remove invalid (zero) depth readings
-            if valid_values.size == 0:
-                return float('inf')  # No valid depth, assume no obstacle
-            return np.percentile(valid_values, 10)  # Use 10th percentile to reduce noise
-
-        left_dist = get_filtered_distance(left_region)
-        right_dist = get_filtered_distance(right_region)
-        center_dist = get_filtered_distance(center_region)
+        # Sectors focus on the center: left 20%-40%, center 40%-60%, right 60%-80%
+        distances = avoidance_sectors.distances(depth_image)
+        left_dist = distances["left"]
+        right_dist = distances["right"]
+        center_dist = distances["center"]
 
         print(f"Left: {left_dist:.2f} m, Right: {right_dist:.2f} m, Center: {center_dist:.2f} m")
 
         if center_dist < CENTER_THRESHOLD:
             print("Obstacle ahead! Turning!")
             if stuck_direction == "left":
-                robot.move(0, 1)
+                arbiter.command("autonomy", 0, 1)
             elif stuck_direction == "right":
-                robot.move(0, -1)
+                arbiter.command("autonomy", 0, -1)
             else:
                 stuck_direction = random.choice(["left", "right"])
                 if stuck_direction == "left":
-                    robot.move(0, 1)
+                    arbiter.command("autonomy", 0, 1)
                 elif stuck_direction == "right":
-                    robot.move(0, -1)
+                    arbiter.command("autonomy", 0, -1)
                 else:
                     print("An act of god has happened")
         elif left_dist < LEFT_THRESHOLD:
             print("Obstacle on left! Turning right!")
-            robot.move(ROBOT_SPEED, -1)
+            arbiter.command("autonomy", ROBOT_SPEED, -1)
         elif right_dist < RIGHT_THRESHOLD:
             print("Obstacle on right! Turning left!")
-            robot.move(ROBOT_SPEED, 1)
+            arbiter.command("autonomy", ROBOT_SPEED, 1)
         else:
             print("Path clear! Moving forward!")
-            robot.move(ROBOT_SPEED, 0)
+            arbiter.command("autonomy", ROBOT_SPEED, 0)
             stuck_direction = "skibidi"
 
         time.sleep(0.1)
 
 def follow_left_wall(target_distance=0.9):
     global movement_enabled, ROBOT_SPEED
+    seq = 0
 
     while True:
         adjust_thresholds_for_speed()  # Adjust obstacle thresholds dynamically
 
         if not movement_enabled:
-            robot.move(0, 0)
+            # Withdraw instead of sending stop commands; the arbiter stops the base once.
+            arbiter.release("autonomy")
             time.sleep(0.1)
             continue
 
-        frames = pipeline.wait_for_frames()
-        depth_frame = frames.get_depth_frame()
-        depth_data = np.asanyarray(depth_frame.get_data()) / 1000.0  # Convert mm to meters
-
-        height, width = depth_data.shape
+        packet = frame_hub.wait_for_frame(seq)
+        seq = packet.seq
+        depth_image = packet.decimated_depth()
 
-        def get_filtered_distance(region):
-            valid_values = region[region > 0]  # Remove invalid (zero) depth readings
-            if valid_values.size == 0:
-                return float('inf')  # No valid depth, assume open space
-            return np.percentile(valid_values, 10)  # Use 10th percentile to filter noise
-
-        # Compute distances for left, right, and center
-        left_dist = get_filtered_distance(depth_data[:, :width // 3])
-        right_dist = get_filtered_distance(depth_data[:, -width // 3:])
-        center_dist = get_filtered_distance(depth_data[:, width // 3: 2 * width // 3])
+        # Compute distances for left, right, and center thirds
+        distances = wall_follow_sectors.distances(depth_image)
+        left_dist = distances["left"]
+        right_dist = distances["right"]
+        center_dist = distances["center"]
 
         print(f"Left: {left_dist:.2f}m, Center: {center_dist:.2f}m, Right: {right_dist:.2f}m")
 
         if center_dist < CENTER_THRESHOLD:
             # Obstacle ahead! Turn right
             print("Obstacle ahead! Turning right.")
-            robot.move(0, -1)
+            arbiter.command("autonomy", 0, -1)
         elif left_dist > target_distance + 0.1:
             # Too far from the left wall, turn left
             print("Too far from wall! Turning left.")
-            robot.move(ROBOT_SPEED, 1)
+            arbiter.command("autonomy", ROBOT_SPEED, 1)
         elif left_dist < target_distance - 0.1:
             # Too close to the left wall, turn right slightly
             print("Too close to wall! Adjusting right.")
-            robot.move(ROBOT_SPEED, -0.5)
+            arbiter.command("autonomy", ROBOT_SPEED, -0.5)
         else:
             # Maintain distance and move forward
             print("Following left wall.")
-            robot.move(ROBOT_SPEED, 0)
+            arbiter.command("autonomy", ROBOT_SPEED, 0)
 
         time.sleep(0.1)
 
+def safety_monitor():
+    """Turns pykobuki safety reflex events into safety commands for the arbiter.
+
+    The reflex has already stopped the base on the packet that triggered it and
+    blocks forward motion while a bumper or cliff is active; this backs away from
+    a bump or cliff for one safety timeout, after which teleop and autonomy take
+    over again. A wheel drop is left to the reflex, which locks the base.
+    """
+    while True:
+        event = robot.wait_for_safety_event()
+        if event is None:
+            continue
+        # The reflex cancels the base command on a stop or lock, so the arbiter has
+        # to send the winning command again, even one equal to what it sent last.
+        arbiter.resync()
+        if not event["triggered"]:
+            continue
+        print(f"Safety: {event['sensor']} -> {event['action']} (reflex latency {event['latency_ms']} ms)")
+        if event["sensor"] in ("bumper", "cliff"):
+            arbiter.command("safety", BACKOFF_SPEED, 0)  # live for SAFETY_TIMEOUT
+
 @app.route('/toggle_movement')
 def toggle_movement():
     global movement_enabled
@@ -233,11 +178,15 @@ def toggle_movement():
 
 @app.route('/video_feed')
 def video_feed():
-    def stream_video():
-        while True:
-            frame = get_depth().tobytes()
-            yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame + b'\r\n\r\n')
-    return Response(stream_video(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(depth_broadcaster.stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/stream_stats')
+def stream_stats():
+    return jsonify(depth_broadcaster.stats())
+
+@app.route('/drive_stats')
+def drive_stats():
+    return jsonify(arbiter=arbiter.stats(), safety=robot.safety_stats())
 
 @app.route('/set_speed')
 def set_speed():
@@ -253,13 +202,13 @@ def set_speed():
 def control():
     action = request.args.get('action')
     if action == "w":
-        robot.move(ROBOT_SPEED, 0)  # Move forward
+        arbiter.command("teleop", ROBOT_SPEED, 0)  # Move forward
     elif action == "a":
-        robot.move(0, 1)  # Turn left
+        arbiter.command("teleop", 0, 1)  # Turn left
     elif action == "s":
-        robot.move(-ROBOT_SPEED, 0)  # Move backward
+        arbiter.command("teleop", -ROBOT_SPEED, 0)  # Move backward
     elif action == "d":
-        robot.move(0, -1)  # Turn right
+        arbiter.command("teleop", 0, -1)  # Turn right
     return f"Robot action {action}"
 
 html_code = """
@@ -325,7 +274,17 @@ flask_thread = threading.Thread(target=start_flask)
 flask_thread.daemon = True
 flask_thread.start()
 
-robot = pykobuki.Kobuki("/dev/kobuki")
+robot = session_replay.kobuki() if session_replay else pykobuki.Kobuki("/dev/kobuki")
+
+# Every move command goes through the arbiter: safety beats teleop beats autonomy.
+arbiter = VelocityArbiter(robot, rate_hz=20.0)
+arbiter.add_source("safety", PRIORITY_SAFETY, timeout=SAFETY_TIMEOUT)
+arbiter.add_source("teleop", PRIORITY_TELEOP, timeout=TELEOP_TIMEOUT)
+arbiter.add_source("autonomy", PRIORITY_AUTONOMY, timeout=AUTONOMY_TIMEOUT)
+arbiter.start()
+
+safety_thread = threading.Thread(target=safety_monitor, daemon=True)
+safety_thread.start()
 
 # obstacle_avoidance()
 follow_left_wall()
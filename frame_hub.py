@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+
+
+class FramePacket:
+    """One captured frameset plus the sequence number and host time it arrived at.
+
+    Frames are raw: depth is in its own sensor geometry. Consumers that need depth
+    registered to color call ``aligned()``, which runs the alignment once for the
+    packet and shares the result with every other consumer of the same frame.
+    ``decimated_depth()`` works the same way for the reduced-resolution depth view.
+    """
+
+    def __init__(self, seq, timestamp, frames, aligner=None, align_lock=None, decimation=1, decimator=None,
+                 decimate_lock=None):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frames = frames
+        # The processing blocks are shared by every packet of a hub, so each has a
+        # hub-wide lock, held only around its process() call. The per-packet locks
+        # make the views compute once; each view has its own so neither waits on the other.
+        self._aligner = aligner
+        self._align_lock = align_lock if align_lock is not None else threading.Lock()
+        self._aligned_once = threading.Lock()
+        self._aligned = None
+        self._decimation = decimation
+        self._decimator = decimator
+        self._decimate_lock = decimate_lock if decimate_lock is not None else threading.Lock()
+        self._decimated_once = threading.Lock()
+        self._decimated = None
+
+    def get_color_frame(self):
+        return self.frames.get_color_frame()
+
+    def get_depth_frame(self):
+        return self.frames.get_depth_frame()
+
+    def aligned(self):
+        """Return the frameset with depth aligned to color, computing it on first use."""
+        if self._aligned is None:
+            if self._aligner is None:
+                raise RuntimeError("FramePacket: no aligner configured for this frame source")
+            with self._aligned_once:
+                if self._aligned is None:
+                    with self._align_lock:
+                        aligned_frames = self._aligner.process(self.frames)
+                    aligned_frames.keep()
+                    self._aligned = aligned_frames
+        return self._aligned
+
+    def decimated_depth(self):
+        """Return the depth image reduced by the hub's decimation factor, computed on first use.
+
+        Uses the RealSense decimation filter when one is configured (median of each
+        block, ignoring holes), otherwise plain striding.
+        """
+        if self._decimated is None:
+            with self._decimated_once:
+                if self._decimated is None:
+                    depth_frame = self.get_depth_frame()
+                    if self._decimation <= 1:
+                        image = np.asanyarray(depth_frame.get_data())
+                    elif self._decimator is not None:
+                        with self._decimate_lock:
+                            decimated_frame = self._decimator.process(depth_frame)
+                        decimated_frame.keep()
+                        image = np.asanyarray(decimated_frame.get_data())
+                    else:
+                        image = np.asanyarray(depth_frame.get_data())[::self._decimation, ::self._decimation]
+                    self._decimated = image
+        return self._decimated
+
+
+class FrameHub:
+    """Owns a RealSense pipeline and fans every frameset out to any number of readers.
+
+    A single capture thread calls ``wait_for_frames()`` and publishes each frameset
+    into a small ring buffer. Readers never touch the pipeline: they ask for the
+    newest packet (optionally newer than the last sequence number they saw), so a
+    slow viewer cannot steal frames from the control loop.
+    """
+
+    def __init__(self, pipeline, align=None, buffer_size=4, timeout_ms=5000, decimation=1, decimator=None):
+        self.pipeline = pipeline
+        self.align = align
+        self.decimation = decimation
+        self.decimator = decimator
+        # Processing blocks are shared by all packets, so each runs one call at a time.
+        self._align_lock = threading.Lock()
+        self._decimate_lock = threading.Lock()
+        self.timeout_ms = timeout_ms
+        self._buffer = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the capture thread (the pipeline must already be started)."""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="frame-hub", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the capture thread and wake up any waiting readers."""
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout_ms / 1000.0)
+            self._thread = None
+
+    def _capture_loop(self):
+        while self._running:
+            try:
+                frames = self.pipeline.wait_for_frames(self.timeout_ms)
+            except RuntimeError as e:
+                # wait_for_frames raises on timeout; keep going unless we were stopped.
+                if self._running:
+                    print(f"FrameHub: {e}")
+                continue
+            # Detach the frameset from the SDK's frame pool so it can sit in the buffer.
+            frames.keep()
+            with self._cond:
+                self._seq += 1
+                self._buffer.append(FramePacket(self._seq, time.time(), frames, self.align, self._align_lock,
+                                                self.decimation, self.decimator, self._decimate_lock))
+                self._cond.notify_all()
+
+    @property
+    def running(self):
+        """True while the capture thread is publishing (between start() and stop())."""
+        return self._running
+
+    @property
+    def seq(self):
+        """Sequence number of the newest published frameset (0 before the first one)."""
+        return self._seq
+
+    def latest(self):
+        """Return the newest FramePacket without blocking, or None if nothing arrived yet."""
+        with self._cond:
+            return self._buffer[-1] if self._buffer else None
+
+    def wait_for_frame(self, after_seq=0, timeout=5.0):
+        """Block until a packet newer than ``after_seq`` exists and return the newest one.
+
+        Raises RuntimeError if no new frame arrives within ``timeout`` seconds, and
+        right away if the hub is stopped (check ``running`` to tell the two apart).
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._buffer or self._buffer[-1].seq <= after_seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    raise RuntimeError(f"FrameHub: no new frame after seq {after_seq} within {timeout} s")
+                self._cond.wait(remaining)
+            return self._buffer[-1]
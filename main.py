@@ -1,38 +1,31 @@
 import time
-import numpy as np
-import pyrealsense2 as rs
 import pykobuki
-from camera_server import pipeline, align, start_camera_server
+import os
+
+import camera_server
+from depth_sectors import DepthSectorEstimator, AVOIDANCE_SECTORS
 
 # Define any obstacle avoidance specific constants and functions here
 ROBOT_SPEED = 0.01
 
-# Initialize your robot
-robot = pykobuki.Kobuki("/dev/kobuki")
+# 10th-percentile distance per sector, straight from the uint16 depth buffer
+sector_estimator = DepthSectorEstimator(AVOIDANCE_SECTORS, percentile=10, method="histogram")
 
-def obstacle_avoidance():
+def obstacle_avoidance(frame_hub):
     global ROBOT_SPEED
+    seq = 0
     while True:
-        frames = pipeline.wait_for_frames()
-        depth_frame = frames.get_depth_frame()
-        depth_data = np.asanyarray(depth_frame.get_data()) / 1000.0  # Convert mm to meters
-        height, width = depth_data.shape
+        packet = frame_hub.wait_for_frame(seq)
+        seq = packet.seq
+        depth_image = packet.decimated_depth()
+        height, width = depth_image.shape
 
         print(height,width)
 
-        left_region = depth_data[:, int(width * 0.2):int(width * 0.4)]
-        right_region = depth_data[:, int(width * 0.6):int(width * 0.8)]
-        center_region = depth_data[:, int(width * 0.4):int(width * 0.6)]
-
-        def get_filtered_distance(region):
-            valid_values = region[region > 0]
-            if valid_values.size == 0:
-                return float('inf')
-            return np.percentile(valid_values, 10)
-
-        left_dist = get_filtered_distance(left_region)
-        right_dist = get_filtered_distance(right_region)
-        center_dist = get_filtered_distance(center_region)
+        distances = sector_estimator.distances(depth_image)
+        left_dist = distances["left"]
+        right_dist = distances["right"]
+        center_dist = distances["center"]
         print(f"Left: {left_dist:.2f} m, Right: {right_dist:.2f} m, Center: {center_dist:.2f} m")
 
         # Write algo here
@@ -40,9 +33,16 @@ def obstacle_avoidance():
         time.sleep(0.1)
 
 if __name__ == '__main__':
-    start_camera_server()
-    
+    # Avoidance only needs coarse depth. The camera starts here, not at import;
+    # YOLO is never loaded because nothing here asks for detections.
+    frame_hub = camera_server.start_camera(os.environ.get("LOCOBOT_CAPTURE_PROFILE", "navigation"))
+    camera_server.start_camera_server()
+
+    # Initialize your robot (a recorded stand-in when replaying a session)
+    session_replay = camera_server.session_replay
+    robot = session_replay.kobuki() if session_replay else pykobuki.Kobuki("/dev/kobuki")
+
     try:
-        obstacle_avoidance()
+        obstacle_avoidance(frame_hub)
     except KeyboardInterrupt:
         pass
@@ -0,0 +1,131 @@
+import itertools
+import threading
+import time
+import cv2
+
+# Seconds between checks for frames while the FrameHub is stopped.
+HUB_RETRY_INTERVAL = 0.5
+
+
+class StreamClient:
+    """One viewer of a broadcast: holds only the newest undelivered frame."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self):
+        self.id = next(self._ids)
+        self.connected_at = time.time()
+        self.delivered = 0
+        self.dropped = 0
+        self._frame = None
+
+    def stats(self):
+        return {
+            "id": self.id,
+            "connected_for": round(time.time() - self.connected_at, 1),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+class MjpegBroadcaster:
+    """Encodes each frame of one stream type once and hands the bytes to every client.
+
+    ``render_fn(packet)`` turns a FramePacket into a BGR image. The encoder thread
+    only runs while at least one client is subscribed. Each client has a single
+    slot: if it has not picked up the previous frame when a new one is encoded,
+    the old one is replaced and counted as dropped, so slow clients never queue.
+    """
+
+    def __init__(self, frame_hub, render_fn, name="stream", quality=50):
+        self.frame_hub = frame_hub
+        self.render_fn = render_fn
+        self.name = name
+        self.quality = quality
+        self.frames_encoded = 0
+        self._clients = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def subscribe(self):
+        """Register a new client and make sure the encoder thread is running."""
+        client = StreamClient()
+        with self._cond:
+            self._clients[client.id] = client
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"mjpeg-{self.name}", daemon=True)
+                self._thread.start()
+        return client
+
+    def unsubscribe(self, client):
+        with self._cond:
+            self._clients.pop(client.id, None)
+            self._cond.notify_all()
+
+    def _run(self):
+        seq = 0
+        while True:
+            with self._cond:
+                if not self._clients:
+                    # Nobody is watching: stop encoding until the next subscribe().
+                    self._thread = None
+                    return
+            try:
+                packet = self.frame_hub.wait_for_frame(seq, timeout=1.0)
+            except RuntimeError:
+                if not self.frame_hub.running:
+                    # wait_for_frame fails at once on a stopped hub; don't spin until it restarts.
+                    time.sleep(HUB_RETRY_INTERVAL)
+                continue
+            seq = packet.seq
+
+            try:
+                image = self.render_fn(packet)
+                ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            except Exception as e:
+                print(f"MjpegBroadcaster[{self.name}]: failed to render frame {seq}: {e}")
+                continue
+            if not ok:
+                continue
+            frame = encoded.tobytes()
+
+            with self._cond:
+                self.frames_encoded += 1
+                for client in self._clients.values():
+                    if client._frame is not None:
+                        client.dropped += 1
+                    client._frame = frame
+                self._cond.notify_all()
+
+    def next_frame(self, client, timeout=5.0):
+        """Block until a frame newer than the client's last one is available and take it."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while client._frame is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f"MjpegBroadcaster[{self.name}]: no frame within {timeout} s")
+                self._cond.wait(remaining)
+            frame, client._frame = client._frame, None
+            client.delivered += 1
+            return frame
+
+    def stream(self):
+        """Generator of multipart MJPEG chunks for a Flask Response."""
+        client = self.subscribe()
+        try:
+            while True:
+                frame = self.next_frame(client)
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n\r\n')
+        finally:
+            self.unsubscribe(client)
+
+    def stats(self):
+        """Encoder and per-client counters for this stream."""
+        with self._cond:
+            return {
+                "stream": self.name,
+                "frames_encoded": self.frames_encoded,
+                "clients": [client.stats() for client in self._clients.values()],
+            }
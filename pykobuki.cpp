@@ -1,33 +1,601 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h> // for automatic STL conversions
+#include <pybind11/numpy.h> // for structured sensor history arrays
 #include <string>
 #include <stdexcept>
 #include <thread>
 #include <chrono>
 #include <cmath> // For M_PI
 #include <memory>
-#include <iomanip> // For std::fixed and std::setprecision
-#include <sstream> // For std::ostringstream
+#include <cstdio> // For std::snprintf
+#include <cstring> // For std::memcpy
 #include <unordered_map>
+#include <vector>
+#include <mutex>
+#include <condition_variable>
+#include <cstdint>
+#include <algorithm>
+#include <deque>
 
 // Include the Kobuki headers and ECL exceptions.
 #include <kobuki_core/kobuki.hpp>
 #include <ecl/exceptions/standard_exception.hpp>
+#include <ecl/sigslots.hpp>
 
 namespace py = pybind11;
 
+// Bits of the packed flag fields in SensorRecord (same layout as the CoreSensors packet).
+constexpr uint8_t BUMPER_RIGHT = 0x01, BUMPER_CENTER = 0x02, BUMPER_LEFT = 0x04;
+constexpr uint8_t CLIFF_RIGHT = 0x01, CLIFF_CENTER = 0x02, CLIFF_LEFT = 0x04;
+constexpr uint8_t WHEEL_DROP_RIGHT = 0x01, WHEEL_DROP_LEFT = 0x02;
+constexpr uint8_t BUTTON0 = 0x01, BUTTON1 = 0x02, BUTTON2 = 0x04;
+constexpr uint8_t OVERCURRENT_LEFT = 0x01, OVERCURRENT_RIGHT = 0x02;
+
+// One CoreSensors packet as received: numeric fields, bit-packed flags, its arrival
+// order and host time. 40 bytes; also the element type of the NumPy history arrays.
+struct SensorRecord
+{
+    uint64_t seq;
+    double host_time; // when the driver delivered the parsed packet; steady clock seconds, like time.monotonic()
+    uint16_t time_stamp;
+    uint16_t left_encoder;
+    uint16_t right_encoder;
+    int8_t left_pwm;
+    int8_t right_pwm;
+    uint8_t bumper;       // BUMPER_* bits
+    uint8_t cliff;        // CLIFF_* bits
+    uint8_t wheel_drop;   // WHEEL_DROP_* bits
+    uint8_t buttons;      // BUTTON* bits
+    uint8_t charger;
+    uint8_t over_current; // OVERCURRENT_* bits
+    float battery_voltage; // volts
+};
+
+static SensorRecord make_record(const kobuki::CoreSensors::Data &data, uint64_t seq = 0, double host_time = 0.0)
+{
+    SensorRecord record;
+    record.seq = seq;
+    record.host_time = host_time;
+    record.time_stamp = data.time_stamp;
+    record.left_encoder = data.left_encoder;
+    record.right_encoder = data.right_encoder;
+    record.left_pwm = static_cast<int8_t>(data.left_pwm);
+    record.right_pwm = static_cast<int8_t>(data.right_pwm);
+    record.bumper = data.bumper;
+    record.cliff = data.cliff;
+    record.wheel_drop = data.wheel_drop;
+    record.buttons = data.buttons;
+    record.charger = data.charger;
+    record.over_current = data.over_current;
+    record.battery_voltage = data.battery * 0.1f;
+    return record;
+}
+
+// Seconds on the steady clock (CLOCK_MONOTONIC on Linux, like time.monotonic()).
+static double monotonic_now()
+{
+    return std::chrono::duration<double>(std::chrono::steady_clock::now().time_since_epoch()).count();
+}
+
+// Bounded ring of the most recent per-packet records (sensor samples, poses).
+// The Kobuki driver thread pushes one record per packet; readers copy records out by
+// sequence number, so a slow reader only loses the oldest ones.
+template <typename Record>
+class RecordRing
+{
+public:
+    explicit RecordRing(size_t capacity) : samples_(capacity > 0 ? capacity : 1) {}
+
+    // Store a record under the next sequence number, wake every waiting reader and
+    // return the sequence number.
+    uint64_t push(Record record)
+    {
+        uint64_t seq;
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            seq = record.seq = next_seq_++;
+            samples_[seq % samples_.size()] = record;
+        }
+        ready_.notify_all();
+        return seq;
+    }
+
+    // Copy the samples from sequence number `cursor` on (oldest first, at most `max_samples`
+    // unless 0) into `out` and return the cursor to continue from. Samples that were
+    // overwritten before being read are added to `lost`.
+    uint64_t read_since(uint64_t cursor, size_t max_samples, std::vector<Record> &out, uint64_t &lost) const
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        uint64_t oldest = next_seq_ > samples_.size() ? next_seq_ - samples_.size() : 0;
+        if (cursor < oldest)
+        {
+            lost += oldest - cursor;
+            cursor = oldest;
+        }
+        uint64_t end = next_seq_;
+        if (max_samples > 0 && end - cursor > max_samples)
+            end = cursor + max_samples;
+        out.reserve(out.size() + (end - cursor));
+        for (; cursor < end; ++cursor)
+            out.push_back(samples_[cursor % samples_.size()]);
+        return cursor;
+    }
+
+    // Copy the newest `count` samples (all buffered ones if 0), oldest first, into `out`.
+    void latest(size_t count, std::vector<Record> &out) const
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        size_t buffered = static_cast<size_t>(std::min<uint64_t>(next_seq_, samples_.size()));
+        if (count == 0 || count > buffered)
+            count = buffered;
+        out.reserve(out.size() + count);
+        for (uint64_t seq = next_seq_ - count; seq < next_seq_; ++seq)
+            out.push_back(samples_[seq % samples_.size()]);
+    }
+
+    // Block until a sample with sequence number >= `seq` exists or `timeout` seconds pass
+    // (a negative timeout waits forever). Returns false on timeout.
+    bool wait_for(uint64_t seq, double timeout) const
+    {
+        std::unique_lock<std::mutex> lock(mutex_);
+        auto arrived = [&] { return next_seq_ > seq; };
+        if (timeout < 0)
+        {
+            ready_.wait(lock, arrived);
+            return true;
+        }
+        return ready_.wait_for(lock, std::chrono::duration<double>(timeout), arrived);
+    }
+
+    // Sequence number the next packet will get (= packets received so far).
+    uint64_t next_seq() const
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        return next_seq_;
+    }
+
+    size_t capacity() const { return samples_.size(); }
+
+private:
+    mutable std::mutex mutex_;
+    mutable std::condition_variable ready_;
+    std::vector<Record> samples_;
+    uint64_t next_seq_ = 0;
+};
+
+using SensorRing = RecordRing<SensorRecord>;
+
+// Kobuki wheel geometry.
+constexpr double TICK_TO_RAD = 0.002436916871363930187454; // encoder tick -> wheel rotation (rad)
+constexpr double WHEEL_RADIUS = 0.035;                     // m
+constexpr double WHEELBASE = 0.23;                         // m
+
+// Planar pose of the base after one sensor packet, and its velocity.
+struct Pose
+{
+    uint64_t seq;     // sequence number of the sensor packet it was integrated from
+    double host_time; // delivery time of that packet (time.monotonic() seconds)
+    double x;         // m
+    double y;         // m
+    double theta;     // rad, in [-pi, pi]
+    double v;         // m/s
+    double w;         // rad/s
+};
+
+// Normalizes an angle to [-pi, pi].
+static double wrap_angle(double angle)
+{
+    return std::atan2(std::sin(angle), std::cos(angle));
+}
+
+// Dead-reckoning odometry integrated on the driver thread from every sensor packet.
+// Encoder deltas are taken modulo 2^16, so counter wraparound is harmless. With
+// `use_gyro` the heading change comes from the gyro instead of the wheel difference,
+// which does not drift with wheel slip.
+class Odometry
+{
+public:
+    Odometry(size_t history, bool use_gyro) : history_(history), use_gyro_(use_gyro) {}
+
+    // Integrate one packet; `heading` is the gyro heading (rad) at that packet.
+    void update(const SensorRecord &record, double heading)
+    {
+        Pose pose;
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            if (initialized_)
+            {
+                double left = static_cast<int16_t>(static_cast<uint16_t>(record.left_encoder - last_left_)) *
+                              TICK_TO_RAD * WHEEL_RADIUS;
+                double right = static_cast<int16_t>(static_cast<uint16_t>(record.right_encoder - last_right_)) *
+                               TICK_TO_RAD * WHEEL_RADIUS;
+                double distance = 0.5 * (left + right);
+                double turn = use_gyro_ ? wrap_angle(heading - last_heading_) : (right - left) / WHEELBASE;
+
+                // Midpoint rule: move along the average heading of the step.
+                double direction = pose_.theta + 0.5 * turn;
+                pose_.x += distance * std::cos(direction);
+                pose_.y += distance * std::sin(direction);
+                pose_.theta = wrap_angle(pose_.theta + turn);
+
+                // The Kobuki timestamp counts milliseconds and wraps at 2^16 too.
+                double dt = static_cast<uint16_t>(record.time_stamp - last_time_stamp_) * 0.001;
+                if (dt > 0)
+                {
+                    pose_.v = distance / dt;
+                    pose_.w = turn / dt;
+                }
+            }
+            initialized_ = true;
+            last_left_ = record.left_encoder;
+            last_right_ = record.right_encoder;
+            last_time_stamp_ = record.time_stamp;
+            last_heading_ = heading;
+            pose_.seq = record.seq;
+            pose_.host_time = record.host_time;
+            pose = pose_;
+        }
+        // One pose per sensor packet, so the history numbers poses like the sensor ring.
+        history_.push(pose);
+    }
+
+    // Move the pose to (x, y, theta) without touching the encoder references.
+    void reset(double x, double y, double theta)
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        pose_.x = x;
+        pose_.y = y;
+        pose_.theta = wrap_angle(theta);
+        pose_.v = 0.0;
+        pose_.w = 0.0;
+    }
+
+    void set_use_gyro(bool use_gyro)
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        use_gyro_ = use_gyro;
+    }
+
+    Pose pose() const
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        return pose_;
+    }
+
+    const RecordRing<Pose> &history() const { return history_; }
+
+private:
+    mutable std::mutex mutex_;
+    RecordRing<Pose> history_;
+    bool use_gyro_;
+    bool initialized_ = false;
+    Pose pose_ = {0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0};
+    uint16_t last_left_ = 0;
+    uint16_t last_right_ = 0;
+    uint16_t last_time_stamp_ = 0;
+    double last_heading_ = 0.0;
+};
+
+// What the safety reflex does while a sensor is triggered.
+enum class ReflexAction
+{
+    Off,   // ignore the sensor
+    Limit, // cap forward speed at the limit speed; the requested command resumes afterwards
+    Stop,  // stop at once and cancel the request; only reversing and turning are allowed
+    Lock,  // stop at once and cancel the request; no motion is allowed
+};
+
+static const char *reflex_action_name(ReflexAction action)
+{
+    switch (action)
+    {
+    case ReflexAction::Limit:
+        return "limit";
+    case ReflexAction::Stop:
+        return "stop";
+    case ReflexAction::Lock:
+        return "lock";
+    default:
+        return "off";
+    }
+}
+
+static ReflexAction parse_reflex_action(const std::string &name)
+{
+    if (name == "off")
+        return ReflexAction::Off;
+    if (name == "limit")
+        return ReflexAction::Limit;
+    if (name == "stop")
+        return ReflexAction::Stop;
+    if (name == "lock")
+        return ReflexAction::Lock;
+    throw std::invalid_argument("Unknown safety action '" + name + "' (expected off, limit, stop or lock)");
+}
+
+// Sensors the reflex watches.
+enum SafetySensor
+{
+    SAFETY_BUMPER,
+    SAFETY_CLIFF,
+    SAFETY_WHEEL_DROP,
+    SAFETY_SENSOR_COUNT
+};
+static const char *const SAFETY_SENSOR_NAMES[SAFETY_SENSOR_COUNT] = {"bumper", "cliff", "wheel_drop"};
+
+// A sensor becoming triggered, or clearing after the hold time.
+struct SafetyEvent
+{
+    uint64_t seq;     // sensor packet that caused it
+    double host_time; // delivery time of that packet (time.monotonic() seconds)
+    double latency;   // packet delivery -> setBaseControl() returned (s); < 0 if no command was needed
+    SafetySensor sensor;
+    uint8_t bits;     // sensor bits in the packet
+    ReflexAction action;
+    bool triggered;   // false: the sensor has been clear for the hold time
+};
+
+// Filters every base command and reacts to bumper, cliff and wheel-drop bits on the
+// driver thread, in the same callback that receives the packet, so a stop does not
+// wait for Python. Events are queued for Python to consume.
+class SafetyReflex
+{
+public:
+    explicit SafetyReflex(size_t max_events = 256) : max_events_(max_events)
+    {
+        actions_[SAFETY_BUMPER] = ReflexAction::Stop;
+        actions_[SAFETY_CLIFF] = ReflexAction::Stop;
+        actions_[SAFETY_WHEEL_DROP] = ReflexAction::Lock;
+    }
+
+    void attach(kobuki::Kobuki *base)
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        base_ = base;
+    }
+
+    void configure(bool enabled, ReflexAction bumper, ReflexAction cliff, ReflexAction wheel_drop,
+                   double limit_speed, double hold_time)
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        enabled_ = enabled;
+        actions_[SAFETY_BUMPER] = bumper;
+        actions_[SAFETY_CLIFF] = cliff;
+        actions_[SAFETY_WHEEL_DROP] = wheel_drop;
+        limit_speed_ = limit_speed;
+        hold_time_ = hold_time;
+        for (int i = 0; i < SAFETY_SENSOR_COUNT; ++i)
+        {
+            if (!enabled_ || actions_[i] == ReflexAction::Off)
+                latched_[i] = false;
+        }
+        send_locked();
+    }
+
+    // A velocity command from Python; passes through the active restrictions.
+    void command(double linear, double angular)
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        requested_linear_ = linear;
+        requested_angular_ = angular;
+        send_locked();
+    }
+
+    // Driver thread: check one packet and restrict the base if a sensor has triggered.
+    void update(const SensorRecord &record)
+    {
+        const uint8_t bits[SAFETY_SENSOR_COUNT] = {record.bumper, record.cliff, record.wheel_drop};
+        std::vector<SafetyEvent> events;
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            if (!enabled_)
+                return;
+            bool stop = false;
+            bool changed = false;
+            for (int i = 0; i < SAFETY_SENSOR_COUNT; ++i)
+            {
+                if (actions_[i] == ReflexAction::Off)
+                    continue;
+                if (bits[i])
+                {
+                    last_seen_[i] = record.host_time;
+                    if (!latched_[i])
+                    {
+                        latched_[i] = true;
+                        changed = true;
+                        stop = stop || actions_[i] != ReflexAction::Limit;
+                        events.push_back({record.seq, record.host_time, -1.0, static_cast<SafetySensor>(i), bits[i],
+                                          actions_[i], true});
+                    }
+                }
+                else if (latched_[i] && record.host_time - last_seen_[i] >= hold_time_)
+                {
+                    latched_[i] = false;
+                    changed = true;
+                    events.push_back({record.seq, record.host_time, -1.0, static_cast<SafetySensor>(i), 0,
+                                      actions_[i], false});
+                }
+            }
+            if (!changed)
+                return;
+            if (stop)
+            {
+                // Cancel the request: the base stays stopped until the next move().
+                requested_linear_ = 0.0;
+                requested_angular_ = 0.0;
+            }
+            bool sent = send_locked();
+            if (sent)
+            {
+                // Measured from host_time, stamped when the driver delivered the parsed packet, so the
+                // serial transfer, the driver's parsing and the base's own reaction are not included.
+                double latency = monotonic_now() - record.host_time;
+                for (SafetyEvent &event : events)
+                {
+                    if (event.triggered)
+                        event.latency = latency;
+                }
+                if (stop || limited_locked())
+                {
+                    ++interventions_;
+                    last_latency_ = latency;
+                    max_latency_ = std::max(max_latency_, latency);
+                    total_latency_ += latency;
+                }
+            }
+            for (const SafetyEvent &event : events)
+            {
+                if (event.triggered)
+                    ++triggers_;
+                if (events_.size() >= max_events_)
+                {
+                    events_.pop_front();
+                    ++events_dropped_;
+                }
+                events_.push_back(event);
+            }
+        }
+        event_ready_.notify_all();
+    }
+
+    // Move every queued event into `out`; with `timeout` >= 0 first wait up to that long
+    // for one to arrive (negative waits forever).
+    void take_events(std::vector<SafetyEvent> &out, size_t max_events, double timeout)
+    {
+        std::unique_lock<std::mutex> lock(mutex_);
+        auto queued = [&] { return !events_.empty(); };
+        if (timeout < 0)
+            event_ready_.wait(lock, queued);
+        else if (timeout > 0)
+            event_ready_.wait_for(lock, std::chrono::duration<double>(timeout), queued);
+        while (!events_.empty() && (max_events == 0 || out.size() < max_events))
+        {
+            out.push_back(events_.front());
+            events_.pop_front();
+        }
+    }
+
+    py::dict stats() const
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        py::dict result;
+        py::dict active;
+        py::dict actions;
+        for (int i = 0; i < SAFETY_SENSOR_COUNT; ++i)
+        {
+            active[SAFETY_SENSOR_NAMES[i]] = latched_[i];
+            actions[SAFETY_SENSOR_NAMES[i]] = reflex_action_name(actions_[i]);
+        }
+        result["enabled"] = enabled_;
+        result["actions"] = actions;
+        result["active"] = active;
+        result["limit_speed"] = limit_speed_;
+        result["hold_time"] = hold_time_;
+        result["triggers"] = triggers_;
+        result["interventions"] = interventions_;
+        result["queued_events"] = events_.size();
+        result["dropped_events"] = events_dropped_;
+        result["requested"] = py::make_tuple(requested_linear_, requested_angular_);
+        result["applied"] = py::make_tuple(applied_linear_, applied_angular_);
+        py::dict latency;
+        latency["last_ms"] = last_latency_ * 1000.0;
+        latency["mean_ms"] = interventions_ ? total_latency_ / interventions_ * 1000.0 : 0.0;
+        latency["max_ms"] = max_latency_ * 1000.0;
+        result["latency"] = latency;
+        return result;
+    }
+
+private:
+    // Most restrictive command allowed by the latched sensors.
+    void filter_locked(double &linear, double &angular) const
+    {
+        for (int i = 0; i < SAFETY_SENSOR_COUNT; ++i)
+        {
+            if (!latched_[i])
+                continue;
+            switch (actions_[i])
+            {
+            case ReflexAction::Lock:
+                linear = 0.0;
+                angular = 0.0;
+                break;
+            case ReflexAction::Stop:
+                linear = std::min(linear, 0.0);
+                break;
+            case ReflexAction::Limit:
+                linear = std::min(linear, limit_speed_);
+                break;
+            default:
+                break;
+            }
+        }
+    }
+
+    bool limited_locked() const
+    {
+        return applied_linear_ != requested_linear_ || applied_angular_ != requested_angular_;
+    }
+
+    // Hand the filtered request to the driver if it differs from what was last applied.
+    bool send_locked()
+    {
+        double linear = requested_linear_;
+        double angular = requested_angular_;
+        filter_locked(linear, angular);
+        if (base_ == nullptr || (has_applied_ && linear == applied_linear_ && angular == applied_angular_))
+            return false;
+        base_->setBaseControl(linear, angular);
+        applied_linear_ = linear;
+        applied_angular_ = angular;
+        has_applied_ = true;
+        return true;
+    }
+
+    mutable std::mutex mutex_;
+    std::condition_variable event_ready_;
+    kobuki::Kobuki *base_ = nullptr;
+    bool enabled_ = true;
+    ReflexAction actions_[SAFETY_SENSOR_COUNT];
+    double limit_speed_ = 0.05;
+    double hold_time_ = 0.5;
+    bool latched_[SAFETY_SENSOR_COUNT] = {false, false, false};
+    double last_seen_[SAFETY_SENSOR_COUNT] = {0.0, 0.0, 0.0};
+    double requested_linear_ = 0.0;
+    double requested_angular_ = 0.0;
+    double applied_linear_ = 0.0;
+    double applied_angular_ = 0.0;
+    bool has_applied_ = false;
+    std::deque<SafetyEvent> events_;
+    size_t max_events_;
+    uint64_t events_dropped_ = 0;
+    uint64_t triggers_ = 0;
+    uint64_t interventions_ = 0;
+    double last_latency_ = 0.0;
+    double max_latency_ = 0.0;
+    double total_latency_ = 0.0;
+};
+
 class PyKobuki
 {
 public:
     // Constructor: initializes the Kobuki robot.
-    PyKobuki(const std::string &device = "/dev/kobuki")
+    // Every CoreSensors packet is captured into a ring of `buffer_size` samples
+    // (about 10 s at the base's 50 Hz with the default) and integrated into the
+    // odometry, whose pose history has the same size.
+    PyKobuki(const std::string &device = "/dev/kobuki", size_t buffer_size = 512, bool use_gyro = true)
+        : sensor_ring_(buffer_size), odometry_(buffer_size, use_gyro),
+          slot_stream_data_(&PyKobuki::on_stream_data, *this)
     {
         kobuki_ = std::make_unique<kobuki::Kobuki>();
+        safety_.attach(kobuki_.get());
 
         // Set up parameters.
         kobuki::Parameters parameters;
         parameters.device_port = device;
 
+        // Hook the driver's per-packet signal before the driver thread starts.
+        slot_stream_data_.connect(parameters.sigslots_namespace + "/stream_data");
+
         // Attempt to initialize the robot.
         try
         {
@@ -40,41 +608,144 @@ public:
     }
 
     // Command the robot to move with specified linear and angular velocities.
+    // The safety reflex may stop or limit the command while a sensor is triggered.
     void move(double linear, double angular)
     {
-        kobuki_->setBaseControl(linear, angular);
+        safety_.command(linear, angular);
     }
 
     // Helper function to format floating-point numbers to two decimal places.
-    std::string format_float(double value) const
+    static std::string format_float(double value)
     {
-        std::ostringstream oss;
-        oss << std::fixed << std::setprecision(2) << value;
-        return oss.str();
+        char buffer[32];
+        std::snprintf(buffer, sizeof(buffer), "%.2f", value);
+        return buffer;
     }
 
     // Read sensor data from the robot.
     // Returns a Python dictionary containing formatted sensor readings.
     py::dict read_sensor_data() const
     {
-        kobuki::CoreSensors::Data data = kobuki_->getCoreSensorData();
+        return sensor_dict(make_record(kobuki_->getCoreSensorData()));
+    }
+
+    // The latest sensor packet as a compact SensorRecord (numeric battery voltage, packed flags).
+    SensorRecord read_sensor_record() const
+    {
+        return make_record(kobuki_->getCoreSensorData(), 0, monotonic_now());
+    }
+
+    // Every sensor packet received since the previous call (oldest first, at most
+    // `max_samples` unless 0), as dictionaries with the read_sensor_data() keys
+    // plus "seq" and "host_time". The ring is copied without holding the GIL.
+    py::list read_sensor_stream(size_t max_samples = 0)
+    {
+        std::vector<SensorRecord> samples = drain(max_samples);
+        py::list result;
+        for (const SensorRecord &sample : samples)
+            result.append(sample_dict(sample));
+        return result;
+    }
+
+    // Like read_sensor_stream(), but as one NumPy structured array of SensorRecord rows.
+    py::array_t<SensorRecord> read_sensor_array(size_t max_samples = 0)
+    {
+        return to_array(drain(max_samples));
+    }
+
+    // The newest `count` buffered packets (all of them if 0) as a NumPy structured array,
+    // oldest first. Does not consume anything from read_sensor_stream().
+    py::array_t<SensorRecord> sensor_history(size_t count = 0) const
+    {
+        std::vector<SensorRecord> samples;
+        {
+            py::gil_scoped_release release;
+            sensor_ring_.latest(count, samples);
+        }
+        return to_array(samples);
+    }
+
+    // Block (without holding the GIL) until the next sensor packet arrives and return it,
+    // or None after `timeout` seconds (a negative timeout waits forever).
+    // Does not consume anything from read_sensor_stream().
+    py::object wait_for_sensor_data(double timeout = 1.0)
+    {
+        std::vector<SensorRecord> samples;
+        {
+            py::gil_scoped_release release;
+            uint64_t seq = sensor_ring_.next_seq();
+            uint64_t lost = 0;
+            if (sensor_ring_.wait_for(seq, timeout))
+                sensor_ring_.read_since(seq, 1, samples, lost);
+        }
+        if (samples.empty())
+            return py::none();
+        return sample_dict(samples.front());
+    }
+
+    // Latest odometry pose.
+    Pose get_pose() const
+    {
+        return odometry_.pose();
+    }
+
+    // The newest `count` odometry poses (all buffered ones if 0) as a NumPy structured array,
+    // oldest first; one pose per sensor packet.
+    py::array_t<Pose> pose_history(size_t count = 0) const
+    {
+        std::vector<Pose> poses;
+        {
+            py::gil_scoped_release release;
+            odometry_.history().latest(count, poses);
+        }
+        return to_array(poses);
+    }
+
+    // Set the odometry pose (e.g. back to the origin) without moving the robot.
+    void reset_odometry(double x = 0.0, double y = 0.0, double theta = 0.0)
+    {
+        odometry_.reset(x, y, theta);
+    }
+
+    // Choose between gyro heading (default) and wheel-difference heading for odometry.
+    void set_odometry_gyro(bool enabled)
+    {
+        odometry_.set_use_gyro(enabled);
+    }
+
+    // Counters of the sensor stream.
+    py::dict sensor_stream_stats() const
+    {
+        std::lock_guard<std::mutex> lock(stream_mutex_);
+        uint64_t received = sensor_ring_.next_seq();
+        py::dict result;
+        result["received"] = received;
+        result["pending"] = std::min<uint64_t>(received - stream_cursor_, sensor_ring_.capacity());
+        result["dropped"] = stream_lost_;
+        result["capacity"] = sensor_ring_.capacity();
+        return result;
+    }
+
+    // Converts one packet into the dictionary returned by read_sensor_data().
+    static py::dict sensor_dict(const SensorRecord &data)
+    {
         py::dict result;
 
         result["time_stamp"] = data.time_stamp;
 
         // Bumper flags
-        result["bumper_left"] = static_cast<bool>(data.bumper & 0x04);
-        result["bumper_center"] = static_cast<bool>(data.bumper & 0x02);
-        result["bumper_right"] = static_cast<bool>(data.bumper & 0x01);
+        result["bumper_left"] = static_cast<bool>(data.bumper & BUMPER_LEFT);
+        result["bumper_center"] = static_cast<bool>(data.bumper & BUMPER_CENTER);
+        result["bumper_right"] = static_cast<bool>(data.bumper & BUMPER_RIGHT);
 
         // Wheel drop flags
-        result["wheel_drop_left"] = static_cast<bool>(data.wheel_drop & 0x02);
-        result["wheel_drop_right"] = static_cast<bool>(data.wheel_drop & 0x01);
+        result["wheel_drop_left"] = static_cast<bool>(data.wheel_drop & WHEEL_DROP_LEFT);
+        result["wheel_drop_right"] = static_cast<bool>(data.wheel_drop & WHEEL_DROP_RIGHT);
 
         // Cliff sensors
-        result["cliff_left"] = static_cast<bool>(data.cliff & 0x04);
-        result["cliff_center"] = static_cast<bool>(data.cliff & 0x02);
-        result["cliff_right"] = static_cast<bool>(data.cliff & 0x01);
+        result["cliff_left"] = static_cast<bool>(data.cliff & CLIFF_LEFT);
+        result["cliff_center"] = static_cast<bool>(data.cliff & CLIFF_CENTER);
+        result["cliff_right"] = static_cast<bool>(data.cliff & CLIFF_RIGHT);
 
         // Encoders
         result["left_encoder"] = data.left_encoder;
@@ -85,31 +756,133 @@ public:
         result["right_pwm"] = static_cast<int>(data.right_pwm);
 
         // Button flags
-        result["button0"] = static_cast<bool>(data.buttons & 0x01);
-        result["button1"] = static_cast<bool>(data.buttons & 0x02);
-        result["button2"] = static_cast<bool>(data.buttons & 0x04);
+        result["button0"] = static_cast<bool>(data.buttons & BUTTON0);
+        result["button1"] = static_cast<bool>(data.buttons & BUTTON1);
+        result["button2"] = static_cast<bool>(data.buttons & BUTTON2);
 
         // Charger state
         result["charger_state"] = data.charger;
 
         // Battery voltage (formatted)
-        result["battery_voltage"] = format_float(data.battery * 0.1);
+        result["battery_voltage"] = format_float(data.battery_voltage);
 
         // Overcurrent flags
-        result["overcurrent_left"] = static_cast<bool>(data.over_current & 0x01);
-        result["overcurrent_right"] = static_cast<bool>(data.over_current & 0x02);
+        result["overcurrent_left"] = static_cast<bool>(data.over_current & OVERCURRENT_LEFT);
+        result["overcurrent_right"] = static_cast<bool>(data.over_current & OVERCURRENT_RIGHT);
 
         return result;
     }
 
+    // A streamed sample: the read_sensor_data() keys plus its sequence number and host time.
+    static py::dict sample_dict(const SensorRecord &sample)
+    {
+        py::dict result = sensor_dict(sample);
+        result["seq"] = sample.seq;
+        result["host_time"] = sample.host_time;
+        return result;
+    }
+
+    // Configure the safety reflex: one action ("off", "limit", "stop" or "lock") per sensor,
+    // the forward speed cap for "limit", and how long a sensor must read clear before its
+    // restriction is lifted.
+    void configure_safety(bool enabled, const std::string &bumper, const std::string &cliff,
+                          const std::string &wheel_drop, double limit_speed, double hold_time)
+    {
+        safety_.configure(enabled, parse_reflex_action(bumper), parse_reflex_action(cliff),
+                          parse_reflex_action(wheel_drop), limit_speed, hold_time);
+    }
+
+    // Every queued safety event (oldest first, at most `max_events` unless 0).
+    py::list read_safety_events(size_t max_events = 0)
+    {
+        std::vector<SafetyEvent> events;
+        {
+            py::gil_scoped_release release;
+            safety_.take_events(events, max_events, 0.0);
+        }
+        py::list result;
+        for (const SafetyEvent &event : events)
+            result.append(event_dict(event));
+        return result;
+    }
+
+    // Block (without holding the GIL) until a safety event is queued and return it,
+    // or None after `timeout` seconds (a negative timeout waits forever).
+    py::object wait_for_safety_event(double timeout = 1.0)
+    {
+        std::vector<SafetyEvent> events;
+        {
+            py::gil_scoped_release release;
+            safety_.take_events(events, 1, timeout);
+        }
+        if (events.empty())
+            return py::none();
+        return event_dict(events.front());
+    }
+
+    // Safety reflex configuration, state and reaction time (packet delivery to setBaseControl()).
+    py::dict safety_stats() const
+    {
+        return safety_.stats();
+    }
+
     // Shutdown the robot.
     void shutdown()
     {
-        kobuki_->setBaseControl(0, 0);
+        safety_.command(0, 0);
         kobuki_->disable();
     }
 
 private:
+    // Called on the Kobuki driver thread after every parsed packet.
+    void on_stream_data()
+    {
+        SensorRecord record = make_record(kobuki_->getCoreSensorData(), 0, monotonic_now());
+        record.seq = sensor_ring_.push(record);
+        safety_.update(record);
+        odometry_.update(record, kobuki_->getHeading());
+    }
+
+    // Copies the packets since the previous drain out of the ring without holding the GIL.
+    std::vector<SensorRecord> drain(size_t max_samples)
+    {
+        std::vector<SensorRecord> samples;
+        py::gil_scoped_release release;
+        std::lock_guard<std::mutex> lock(stream_mutex_);
+        stream_cursor_ = sensor_ring_.read_since(stream_cursor_, max_samples, samples, stream_lost_);
+        return samples;
+    }
+
+    static py::dict event_dict(const SafetyEvent &event)
+    {
+        py::dict result;
+        result["sensor"] = SAFETY_SENSOR_NAMES[event.sensor];
+        result["triggered"] = event.triggered;
+        result["bits"] = event.bits;
+        result["action"] = reflex_action_name(event.action);
+        result["seq"] = event.seq;
+        result["host_time"] = event.host_time;
+        result["latency_ms"] = event.latency < 0 ? py::object(py::none()) : py::object(py::float_(event.latency * 1000.0));
+        return result;
+    }
+
+    template <typename Record>
+    static py::array_t<Record> to_array(const std::vector<Record> &samples)
+    {
+        py::array_t<Record> result(static_cast<py::ssize_t>(samples.size()));
+        if (!samples.empty())
+            std::memcpy(result.mutable_data(), samples.data(), samples.size() * sizeof(Record));
+        return result;
+    }
+
+    // Declared before kobuki_ so the driver thread is stopped before they are destroyed.
+    SensorRing sensor_ring_;
+    mutable std::mutex stream_mutex_;
+    uint64_t stream_cursor_ = 0;
+    uint64_t stream_lost_ = 0;
+    Odometry odometry_;
+    SafetyReflex safety_;
+    ecl::Slot<> slot_stream_data_;
     std::unique_ptr<kobuki::Kobuki> kobuki_;
 };
 
@@ -117,14 +890,116 @@ PYBIND11_MODULE(pykobuki, m)
 {
     m.doc() = "Python wrapper for the Kobuki robot using libkobuki";
 
+    // Element type of the NumPy sensor history arrays.
+    PYBIND11_NUMPY_DTYPE(SensorRecord, seq, host_time, time_stamp, left_encoder, right_encoder, left_pwm, right_pwm,
+                         bumper, cliff, wheel_drop, buttons, charger, over_current, battery_voltage);
+    PYBIND11_NUMPY_DTYPE(Pose, seq, host_time, x, y, theta, v, w);
+
+    // Bits of the packed flag fields.
+    m.attr("BUMPER_RIGHT") = BUMPER_RIGHT;
+    m.attr("BUMPER_CENTER") = BUMPER_CENTER;
+    m.attr("BUMPER_LEFT") = BUMPER_LEFT;
+    m.attr("CLIFF_RIGHT") = CLIFF_RIGHT;
+    m.attr("CLIFF_CENTER") = CLIFF_CENTER;
+    m.attr("CLIFF_LEFT") = CLIFF_LEFT;
+    m.attr("WHEEL_DROP_RIGHT") = WHEEL_DROP_RIGHT;
+    m.attr("WHEEL_DROP_LEFT") = WHEEL_DROP_LEFT;
+    m.attr("BUTTON0") = BUTTON0;
+    m.attr("BUTTON1") = BUTTON1;
+    m.attr("BUTTON2") = BUTTON2;
+    m.attr("OVERCURRENT_LEFT") = OVERCURRENT_LEFT;
+    m.attr("OVERCURRENT_RIGHT") = OVERCURRENT_RIGHT;
+
+    // Wheel geometry used by the odometry.
+    m.attr("TICK_TO_RAD") = TICK_TO_RAD;
+    m.attr("WHEEL_RADIUS") = WHEEL_RADIUS;
+    m.attr("WHEELBASE") = WHEELBASE;
+
+    // Bind the odometry pose.
+    py::class_<Pose>(m, "Pose")
+        .def_readonly("seq", &Pose::seq)
+        .def_readonly("host_time", &Pose::host_time)
+        .def_readonly("x", &Pose::x)
+        .def_readonly("y", &Pose::y)
+        .def_readonly("theta", &Pose::theta)
+        .def_readonly("v", &Pose::v)
+        .def_readonly("w", &Pose::w)
+        .def("__iter__", [](const Pose &p) { return py::iter(py::make_tuple(p.x, p.y, p.theta, p.v, p.w)); },
+             "Unpack as (x, y, theta, v, w).")
+        .def("__repr__", [](const Pose &p) {
+            char buffer[160];
+            std::snprintf(buffer, sizeof(buffer), "Pose(x=%.4f, y=%.4f, theta=%.4f, v=%.3f, w=%.3f)",
+                          p.x, p.y, p.theta, p.v, p.w);
+            return std::string(buffer);
+        });
+
+    // Bind the compact sensor record.
+    py::class_<SensorRecord>(m, "SensorRecord")
+        .def_readonly("seq", &SensorRecord::seq)
+        .def_readonly("host_time", &SensorRecord::host_time)
+        .def_readonly("time_stamp", &SensorRecord::time_stamp)
+        .def_readonly("left_encoder", &SensorRecord::left_encoder)
+        .def_readonly("right_encoder", &SensorRecord::right_encoder)
+        .def_readonly("left_pwm", &SensorRecord::left_pwm)
+        .def_readonly("right_pwm", &SensorRecord::right_pwm)
+        .def_readonly("bumper", &SensorRecord::bumper)
+        .def_readonly("cliff", &SensorRecord::cliff)
+        .def_readonly("wheel_drop", &SensorRecord::wheel_drop)
+        .def_readonly("buttons", &SensorRecord::buttons)
+        .def_readonly("charger", &SensorRecord::charger)
+        .def_readonly("over_current", &SensorRecord::over_current)
+        .def_readonly("battery_voltage", &SensorRecord::battery_voltage)
+        .def("to_dict", &PyKobuki::sample_dict,
+             "The record as a read_sensor_stream() dictionary.")
+        .def("__repr__", [](const SensorRecord &r) {
+            char buffer[160];
+            std::snprintf(buffer, sizeof(buffer),
+                          "SensorRecord(seq=%llu, time_stamp=%u, bumper=%u, cliff=%u, wheel_drop=%u, battery_voltage=%.1f)",
+                          static_cast<unsigned long long>(r.seq), r.time_stamp, r.bumper, r.cliff, r.wheel_drop,
+                          r.battery_voltage);
+            return std::string(buffer);
+        });
+
     // Bind the PyKobuki class.
     py::class_<PyKobuki>(m, "Kobuki")
-        .def(py::init<const std::string &>(), py::arg("device") = "/dev/kobuki",
+        .def(py::init<const std::string &, size_t, bool>(), py::arg("device") = "/dev/kobuki",
+             py::arg("buffer_size") = 512, py::arg("use_gyro") = true,
              "Create a Kobuki object and establish a connection to the robot.")
         .def("move", &PyKobuki::move,
              "Command the robot to move with specified linear and angular velocities.")
         .def("read_sensor_data", &PyKobuki::read_sensor_data,
              "Read sensor data (e.g., bumpers, wheel drop, cliff sensors, etc.) from the robot.")
+        .def("read_sensor_stream", &PyKobuki::read_sensor_stream, py::arg("max_samples") = 0,
+             "Return every sensor packet received since the previous call, oldest first.")
+        .def("wait_for_sensor_data", &PyKobuki::wait_for_sensor_data, py::arg("timeout") = 1.0,
+             "Block until the next sensor packet arrives and return it (None on timeout).")
+        .def("sensor_stream_stats", &PyKobuki::sensor_stream_stats,
+             "Counters of the sensor stream: received, pending, dropped and capacity.")
+        .def("read_sensor_record", &PyKobuki::read_sensor_record,
+             "Read the latest sensor packet as a compact SensorRecord.")
+        .def("read_sensor_array", &PyKobuki::read_sensor_array, py::arg("max_samples") = 0,
+             "Return every sensor packet received since the previous call as a NumPy structured array.")
+        .def("sensor_history", &PyKobuki::sensor_history, py::arg("count") = 0,
+             "Return the newest buffered sensor packets as a NumPy structured array, oldest first.")
+        .def("get_pose", &PyKobuki::get_pose,
+             "Return the latest odometry pose (x, y, theta, v, w).")
+        .def("pose_history", &PyKobuki::pose_history, py::arg("count") = 0,
+             "Return the newest odometry poses as a NumPy structured array, oldest first.")
+        .def("reset_odometry", &PyKobuki::reset_odometry, py::arg("x") = 0.0, py::arg("y") = 0.0,
+             py::arg("theta") = 0.0,
+             "Set the odometry pose without moving the robot.")
+        .def("set_odometry_gyro", &PyKobuki::set_odometry_gyro, py::arg("enabled"),
+             "Use the gyro (True) or the wheel difference (False) for the odometry heading.")
+        .def("configure_safety", &PyKobuki::configure_safety, py::arg("enabled") = true,
+             py::arg("bumper") = "stop", py::arg("cliff") = "stop", py::arg("wheel_drop") = "lock",
+             py::arg("limit_speed") = 0.05, py::arg("hold_time") = 0.5,
+             "Configure the safety reflex that stops or limits the base on bumper, cliff and wheel-drop events.")
+        .def("read_safety_events", &PyKobuki::read_safety_events, py::arg("max_events") = 0,
+             "Return every queued safety event, oldest first.")
+        .def("wait_for_safety_event", &PyKobuki::wait_for_safety_event, py::arg("timeout") = 1.0,
+             "Block until a safety event is queued and return it (None on timeout).")
+        .def("safety_stats", &PyKobuki::safety_stats,
+             "Safety reflex configuration, active sensors, counters and reflex reaction latency.")
         .def("shutdown", &PyKobuki::shutdown,
              "Shutdown the robot.");
 }
\ No newline at end of file
@@ -0,0 +1,773 @@
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+import cv2
+
+# On-disk session layout (one directory per session):
+#
+#   session.json          metadata: stream shapes/dtypes, chunk size, frames per chunk
+#                         (rewritten when a chunk opens and every flush_interval while recording)
+#   times_00000.npy       float64 capture time of each frame in the chunk
+#   color_00000.npy       (chunk_size, H, W, 3) uint8 color frames
+#   depth_00000.npy       (chunk_size, H, W) uint16 depth frames (z16, depth_scale m/unit)
+#   kobuki.jsonl          {"t": time, "data": read_sensor_data() dict} or {"t": time, "move": [linear, angular]}
+#   arm.jsonl             {"t": time, "command": name, "args": [...], "kwargs": {...}} per line
+#
+# Frame chunks are plain .npy files written through np.lib.format.open_memmap, so a
+# replay maps them with np.load(mmap_mode='r') and hands out views without copying.
+
+SESSION_VERSION = 1
+
+# Sensor dict keys behind each pykobuki safety reflex sensor.
+SAFETY_SENSORS = {
+    "bumper": ("bumper_left", "bumper_center", "bumper_right"),
+    "cliff": ("cliff_left", "cliff_center", "cliff_right"),
+    "wheel_drop": ("wheel_drop_left", "wheel_drop_right"),
+}
+
+# Kobuki geometry of pykobuki's odometry, for the replayed pose.
+TICK_TO_RAD = 0.002436916871363930187454
+WHEEL_RADIUS = 0.035
+WHEELBASE = 0.23
+
+# dtype of pykobuki.SensorRecord rows (read_sensor_array(), sensor_history()), padding included.
+SENSOR_RECORD_DTYPE = np.dtype({
+    "names": ["seq", "host_time", "time_stamp", "left_encoder", "right_encoder", "left_pwm", "right_pwm",
+              "bumper", "cliff", "wheel_drop", "buttons", "charger", "over_current", "battery_voltage"],
+    "formats": ["<u8", "<f8", "<u2", "<u2", "<u2", "i1", "i1", "u1", "u1", "u1", "u1", "u1", "u1", "<f4"],
+    "offsets": [0, 8, 16, 18, 20, 22, 23, 24, 25, 26, 27, 28, 29, 32],
+    "itemsize": 40,
+})
+
+# Sensor dict flag keys packed into each SensorRecord bit field (pykobuki's bit constants).
+SENSOR_FLAGS = {
+    "bumper": {"bumper_left": 0x04, "bumper_center": 0x02, "bumper_right": 0x01},
+    "cliff": {"cliff_left": 0x04, "cliff_center": 0x02, "cliff_right": 0x01},
+    "wheel_drop": {"wheel_drop_left": 0x02, "wheel_drop_right": 0x01},
+    "buttons": {"button0": 0x01, "button1": 0x02, "button2": 0x04},
+    "over_current": {"overcurrent_left": 0x01, "overcurrent_right": 0x02},
+}
+
+# dtype of pykobuki.Kobuki.pose_history().
+POSE_DTYPE = np.dtype([("seq", "<u8"), ("host_time", "<f8"), ("x", "<f8"), ("y", "<f8"),
+                       ("theta", "<f8"), ("v", "<f8"), ("w", "<f8")])
+
+
+def sensor_record_row(data, seq, host_time):
+    """SENSOR_RECORD_DTYPE tuple of a read_sensor_data() dict."""
+    flags = {field: sum(bit for key, bit in bits.items() if data.get(key)) for field, bits in SENSOR_FLAGS.items()}
+    return (seq, host_time, data.get("time_stamp", 0), data.get("left_encoder", 0), data.get("right_encoder", 0),
+            data.get("left_pwm", 0), data.get("right_pwm", 0), flags["bumper"], flags["cliff"], flags["wheel_drop"],
+            flags["buttons"], data.get("charger_state", 0), flags["over_current"],
+            float(data.get("battery_voltage", 0.0)))
+
+
+def sensor_record_dict(row):
+    """read_sensor_stream() dict of one SENSOR_RECORD_DTYPE row (what SensorRecord.to_dict() returns)."""
+    data = {"time_stamp": int(row["time_stamp"])}
+    for field in ("bumper", "wheel_drop", "cliff"):
+        data.update({key: bool(row[field] & bit) for key, bit in SENSOR_FLAGS[field].items()})
+    data.update({"left_encoder": int(row["left_encoder"]), "right_encoder": int(row["right_encoder"]),
+                 "left_pwm": int(row["left_pwm"]), "right_pwm": int(row["right_pwm"])})
+    data.update({key: bool(row["buttons"] & bit) for key, bit in SENSOR_FLAGS["buttons"].items()})
+    data["charger_state"] = int(row["charger"])
+    data["battery_voltage"] = f"{float(row['battery_voltage']):.2f}"
+    data.update({key: bool(row["over_current"] & bit) for key, bit in SENSOR_FLAGS["over_current"].items()})
+    data.update({"seq": int(row["seq"]), "host_time": float(row["host_time"])})
+    return data
+
+
+class SessionRecorder:
+    """Writes timestamped frames, Kobuki sensor data and arm commands to a session directory."""
+
+    def __init__(self, path, chunk_size=60, depth_scale=0.001, flush_interval=1.0):
+        self.path = path
+        self.chunk_size = chunk_size
+        # Seconds between flushes of the open chunk and its frame count to session.json,
+        # so a crash loses at most this much of the recording.
+        self.flush_interval = flush_interval
+        os.makedirs(path, exist_ok=True)
+        self._meta = {
+            "version": SESSION_VERSION,
+            "chunk_size": chunk_size,
+            "depth_scale": depth_scale,
+            "streams": {},
+            "chunks": [],
+        }
+        self._chunk = None
+        self._count = 0
+        self._flushed = 0.0
+        self._lock = threading.Lock()
+        self._kobuki_log = open(os.path.join(path, "kobuki.jsonl"), "a")
+        self._arm_log = open(os.path.join(path, "arm.jsonl"), "a")
+        self._attached = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open_chunk(self, images):
+        index = len(self._meta["chunks"])
+        chunk = {"times": np.lib.format.open_memmap(self._file("times", index), mode="w+",
+                                                    dtype=np.float64, shape=(self.chunk_size,))}
+        for name, image in images.items():
+            if image is not None:
+                self._meta["streams"].setdefault(name, {"shape": list(image.shape), "dtype": str(image.dtype)})
+        # Every stream seen so far gets a file, so one that skips a frame keeps its place.
+        for name, stream in self._meta["streams"].items():
+            chunk[name] = np.lib.format.open_memmap(self._file(name, index), mode="w+",
+                                                    dtype=np.dtype(stream["dtype"]),
+                                                    shape=(self.chunk_size,) + tuple(stream["shape"]))
+        self._meta["chunks"].append(0)
+        self._chunk = chunk
+        self._count = 0
+        self._write_meta()
+        self._flushed = time.monotonic()
+
+    def _flush_chunk(self):
+        for array in self._chunk.values():
+            array.flush()
+        self._kobuki_log.flush()
+        self._arm_log.flush()
+        self._meta["chunks"][-1] = self._count
+        self._write_meta()
+        self._flushed = time.monotonic()
+
+    def _close_chunk(self):
+        if self._chunk is None:
+            return
+        self._flush_chunk()
+        self._chunk = None
+
+    def _file(self, name, index):
+        return os.path.join(self.path, f"{name}_{index:05d}.npy")
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, "session.json"), "w") as f:
+            json.dump(self._meta, f, indent=2)
+
+    def record_frames(self, color_image=None, depth_image=None, timestamp=None):
+        """Append one frame (either stream may be None if it is not being recorded)."""
+        images = {"color": color_image, "depth": depth_image}
+        with self._lock:
+            if self._chunk is not None and any(image is not None and name not in self._chunk
+                                               for name, image in images.items()):
+                # A stream that started mid-chunk gets its file in a fresh chunk.
+                self._close_chunk()
+            if self._chunk is None:
+                self._open_chunk(images)
+            self._chunk["times"][self._count] = timestamp if timestamp is not None else time.time()
+            if color_image is not None:
+                self._chunk["color"][self._count] = color_image
+            if depth_image is not None:
+                self._chunk["depth"][self._count] = depth_image
+            self._count += 1
+            if self._count == self.chunk_size:
+                self._close_chunk()
+            elif time.monotonic() - self._flushed >= self.flush_interval:
+                self._flush_chunk()
+
+    def record_packet(self, packet):
+        """Append the raw color and depth frames of a FramePacket."""
+        color_frame = packet.get_color_frame()
+        depth_frame = packet.get_depth_frame()
+        self.record_frames(np.asanyarray(color_frame.get_data()) if color_frame else None,
+                           np.asanyarray(depth_frame.get_data()) if depth_frame else None,
+                           packet.timestamp)
+
+    def record_kobuki(self, sensor_data, timestamp=None):
+        t = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            self._kobuki_log.write(json.dumps({"t": t, "data": sensor_data}) + "\n")
+
+    def record_kobuki_move(self, linear, angular, timestamp=None):
+        t = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            self._kobuki_log.write(json.dumps({"t": t, "move": [linear, angular]}) + "\n")
+
+    def record_arm_command(self, command, *args, **kwargs):
+        with self._lock:
+            self._arm_log.write(json.dumps({"t": time.time(), "command": command,
+                                            "args": list(args), "kwargs": kwargs}) + "\n")
+
+    def attach(self, frame_hub):
+        """Record every new packet published by ``frame_hub`` until close()."""
+        def run():
+            seq = 0
+            while self._attached is not None:
+                try:
+                    packet = frame_hub.wait_for_frame(seq, timeout=1.0)
+                except RuntimeError:
+                    if not frame_hub.running:
+                        time.sleep(0.5)  # a stopped hub fails every wait at once
+                    continue
+                seq = packet.seq
+                self.record_packet(packet)
+
+        self._attached = threading.Thread(target=run, name="session-recorder", daemon=True)
+        self._attached.start()
+
+    def close(self):
+        thread, self._attached = self._attached, None
+        if thread is not None:
+            thread.join(timeout=5.0)
+        with self._lock:
+            self._close_chunk()
+            self._write_meta()
+            self._kobuki_log.close()
+            self._arm_log.close()
+
+
+class RecordingKobuki:
+    """Wraps a pykobuki.Kobuki and logs every sensor read and move command."""
+
+    def __init__(self, robot, recorder):
+        self.robot = robot
+        self.recorder = recorder
+
+    def move(self, linear, angular):
+        self.recorder.record_kobuki_move(linear, angular)
+        self.robot.move(linear, angular)
+
+    def read_sensor_data(self):
+        data = self.robot.read_sensor_data()
+        self.recorder.record_kobuki(data)
+        return data
+
+    def read_sensor_stream(self, max_samples=0):
+        samples = self.robot.read_sensor_stream(max_samples)
+        for data in samples:
+            self.recorder.record_kobuki(data)
+        return samples
+
+    def wait_for_sensor_data(self, timeout=1.0):
+        return self.robot.wait_for_sensor_data(timeout)
+
+    def sensor_stream_stats(self):
+        return self.robot.sensor_stream_stats()
+
+    def read_sensor_record(self):
+        record = self.robot.read_sensor_record()
+        self.recorder.record_kobuki(record.to_dict())
+        return record
+
+    def read_sensor_array(self, max_samples=0):
+        samples = self.robot.read_sensor_array(max_samples)
+        for row in samples:
+            self.recorder.record_kobuki(sensor_record_dict(row))
+        return samples
+
+    def sensor_history(self, count=0):
+        return self.robot.sensor_history(count)
+
+    def configure_safety(self, *args, **kwargs):
+        return self.robot.configure_safety(*args, **kwargs)
+
+    def read_safety_events(self, max_events=0):
+        return self.robot.read_safety_events(max_events)
+
+    def wait_for_safety_event(self, timeout=1.0):
+        return self.robot.wait_for_safety_event(timeout)
+
+    def safety_stats(self):
+        return self.robot.safety_stats()
+
+    def get_pose(self):
+        return self.robot.get_pose()
+
+    def pose_history(self, count=0):
+        return self.robot.pose_history(count)
+
+    def reset_odometry(self, x=0.0, y=0.0, theta=0.0):
+        self.robot.reset_odometry(x, y, theta)
+
+    def set_odometry_gyro(self, enabled):
+        self.robot.set_odometry_gyro(enabled)
+
+    def shutdown(self):
+        self.robot.shutdown()
+
+
+class RecordingArm:
+    """Wraps a WidowX200Arm and logs each method call as an arm command."""
+
+    def __init__(self, arm, recorder):
+        self._arm = arm
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attr = getattr(self._arm, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def call(*args, **kwargs):
+            self._recorder.record_arm_command(name, *args, **kwargs)
+            return attr(*args, **kwargs)
+        return call
+
+
+# -------------------- REPLAY --------------------
+
+class ReplayClock:
+    """Session time during a replay, driven by the frames the pipeline has delivered."""
+
+    def __init__(self, start_time):
+        self.time = start_time
+
+    def now(self):
+        return self.time
+
+
+class ReplayFrame:
+    """Stands in for rs.video_frame / rs.depth_frame over a memory-mapped image."""
+
+    def __init__(self, data, timestamp, depth_scale=None):
+        self._data = data
+        self._timestamp = timestamp
+        self._depth_scale = depth_scale
+
+    def __bool__(self):
+        return self._data is not None
+
+    def get_data(self):
+        return self._data
+
+    def get_width(self):
+        return self._data.shape[1]
+
+    def get_height(self):
+        return self._data.shape[0]
+
+    def get_timestamp(self):
+        return self._timestamp * 1000.0  # RealSense reports milliseconds
+
+    def get_distance(self, x, y):
+        return float(self._data[y, x]) * self._depth_scale
+
+    def keep(self):
+        pass
+
+
+class ReplayFrameset:
+    """Stands in for rs.composite_frame: one color and/or depth frame."""
+
+    def __init__(self, color, depth, timestamp, depth_scale):
+        self._color = ReplayFrame(color, timestamp)
+        self._depth = ReplayFrame(depth, timestamp, depth_scale)
+
+    def get_color_frame(self):
+        return self._color
+
+    def get_depth_frame(self):
+        return self._depth
+
+    def keep(self):
+        pass
+
+
+class ReplayAlign:
+    """Stands in for rs.align(rs.stream.color) on recorded frames.
+
+    Recordings have no camera intrinsics, so depth is resized (nearest neighbour)
+    onto the color image grid. Good enough for per-detection distance lookups in
+    tests and profiling, not a true reprojection.
+    """
+
+    def process(self, frameset):
+        color = frameset.get_color_frame()
+        depth = frameset.get_depth_frame()
+        if not color or not depth:
+            return frameset
+        resized = cv2.resize(np.asarray(depth.get_data()), (color.get_width(), color.get_height()),
+                             interpolation=cv2.INTER_NEAREST)
+        return ReplayFrameset(color.get_data(), resized, frameset._color._timestamp, depth._depth_scale)
+
+
+class ReplayPipeline:
+    """Stands in for rs.pipeline, serving recorded framesets from a session.
+
+    ``speed`` is the playback rate relative to the recording (1.0 = real time);
+    ``None`` or 0 delivers frames as fast as they are requested.
+    """
+
+    def __init__(self, session, speed=1.0, loop=False):
+        self.session = session
+        self.speed = speed
+        self.loop = loop
+        self._index = 0
+        self._wall_start = None
+
+    def start(self, config=None):
+        self._index = 0
+        self._wall_start = time.monotonic()
+
+    def stop(self):
+        self._wall_start = None
+
+    def wait_for_frames(self, timeout_ms=5000):
+        if self._index >= self.session.frame_count:
+            if not self.loop or self.session.frame_count == 0:
+                time.sleep(timeout_ms / 1000.0)
+                raise RuntimeError("Frame didn't arrive within %d (end of recorded session)" % timeout_ms)
+            self._index = 0
+            self._wall_start = time.monotonic()
+
+        frameset = self.session.frameset(self._index)
+        t = self.session.frame_time(self._index)
+        if self.speed:
+            due = self._wall_start + (t - self.session.start_time) / self.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.session.clock.time = t
+        self._index += 1
+        return frameset
+
+
+class ReplaySensorRecord:
+    """Stands in for pykobuki.SensorRecord: one SENSOR_RECORD_DTYPE row with attribute access."""
+
+    def __init__(self, row):
+        self._row = row
+
+    def __getattr__(self, name):
+        if name in SENSOR_RECORD_DTYPE.names:
+            return self._row[name].item()
+        raise AttributeError(name)
+
+    def to_dict(self):
+        return sensor_record_dict(self._row)
+
+
+class ReplayPose:
+    """Stands in for pykobuki.Pose: unpacks as x, y, theta, v, w."""
+
+    def __init__(self, seq=0, host_time=0.0, x=0.0, y=0.0, theta=0.0, v=0.0, w=0.0):
+        self.seq = seq
+        self.host_time = host_time
+        self.x = x
+        self.y = y
+        self.theta = theta
+        self.v = v
+        self.w = w
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.theta, self.v, self.w))
+
+    def __repr__(self):
+        return f"Pose(x={self.x:.4f}, y={self.y:.4f}, theta={self.theta:.4f}, v={self.v:.3f}, w={self.w:.3f})"
+
+
+def _wrap_angle(angle):
+    return math.atan2(math.sin(angle), math.cos(angle))
+
+
+class ReplayKobuki:
+    """Stands in for pykobuki.Kobuki: serves recorded sensor dicts at the replay time.
+
+    Odometry is integrated from the encoder ticks of the recorded dicts as they
+    become due. Recordings have no gyro, so the heading always comes from the
+    wheels, and only the packets the application read were recorded.
+    """
+
+    def __init__(self, session, buffer_size=512):
+        self.session = session
+        self.commands = []
+        self.buffer_size = buffer_size
+        self.odometry_gyro = True
+        self._pose = ReplayPose()
+        self._pose_history = deque(maxlen=buffer_size)
+        self._odometry_index = 0
+        self._last_ticks = None  # (left_encoder, right_encoder, time_stamp) of the previous record
+        self._stream_index = 0
+        self._safety_index = 0
+        self._safety_events = []
+        self._safety_active = dict.fromkeys(SAFETY_SENSORS, False)
+        self._safety_last_seen = dict.fromkeys(SAFETY_SENSORS, 0.0)
+        self.configure_safety()
+
+    def move(self, linear, angular):
+        self.commands.append((self.session.clock.now(), linear, angular))
+
+    def read_sensor_data(self):
+        records = self.session.kobuki_records
+        if not records:
+            return {}
+        i = bisect.bisect_right(self.session.kobuki_times, self.session.clock.now()) - 1
+        return dict(records[max(i, 0)]["data"])
+
+    def _due(self):
+        return bisect.bisect_right(self.session.kobuki_times, self.session.clock.now())
+
+    def read_sensor_stream(self, max_samples=0):
+        """Recorded sensor dicts that became due since the previous call."""
+        start, end = self._stream_index, self._due()
+        if max_samples:
+            end = min(end, start + max_samples)
+        self._stream_index = max(start, end)
+        return [dict(r["data"]) for r in self.session.kobuki_records[start:end]]
+
+    def wait_for_sensor_data(self, timeout=1.0):
+        """The next recorded sensor dict to become due, or None after ``timeout`` seconds."""
+        due = self._due()
+        deadline = None if timeout is None or timeout < 0 else time.monotonic() + timeout
+        while due >= len(self.session.kobuki_records) or self._due() <= due:
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(0.005)
+        return dict(self.session.kobuki_records[due]["data"])
+
+    def _sensor_array(self, start, end):
+        records = self.session.kobuki_records
+        return np.array([sensor_record_row(records[i]["data"], records[i]["data"].get("seq", i), records[i]["t"])
+                         for i in range(start, end)], dtype=SENSOR_RECORD_DTYPE)
+
+    def read_sensor_record(self):
+        """The recorded packet at the replay time as a SensorRecord stand-in (seq 0, like pykobuki)."""
+        records = self.session.kobuki_records
+        if not records:
+            return ReplaySensorRecord(np.zeros((), dtype=SENSOR_RECORD_DTYPE))
+        record = records[max(self._due() - 1, 0)]
+        return ReplaySensorRecord(np.array(sensor_record_row(record["data"], 0, record["t"]),
+                                           dtype=SENSOR_RECORD_DTYPE))
+
+    def read_sensor_array(self, max_samples=0):
+        """read_sensor_stream() as a structured array; both share one read position."""
+        start, end = self._stream_index, self._due()
+        if max_samples:
+            end = min(end, start + max_samples)
+        self._stream_index = max(start, end)
+        return self._sensor_array(start, end)
+
+    def sensor_history(self, count=0):
+        end = self._due()
+        count = min(count or self.buffer_size, self.buffer_size)
+        return self._sensor_array(max(end - count, 0), end)
+
+    def sensor_stream_stats(self):
+        received = self._due()
+        return {"received": received, "pending": received - self._stream_index, "dropped": 0,
+                "capacity": len(self.session.kobuki_records)}
+
+    def configure_safety(self, enabled=True, bumper="stop", cliff="stop", wheel_drop="lock",
+                         limit_speed=0.05, hold_time=0.5):
+        """Which sensors produce safety events; the replay has no base to stop, so no latency."""
+        self.safety_actions = {"bumper": bumper, "cliff": cliff, "wheel_drop": wheel_drop} if enabled else {}
+        self.safety_hold_time = hold_time
+
+    def _scan_safety(self):
+        end = self._due()
+        for seq in range(self._safety_index, end):
+            record = self.session.kobuki_records[seq]
+            for sensor, keys in SAFETY_SENSORS.items():
+                action = self.safety_actions.get(sensor, "off")
+                # Keys run left to right, i.e. from the highest flag bit down.
+                bits = sum(1 << (len(keys) - 1 - i) for i, key in enumerate(keys) if record["data"].get(key))
+                if action == "off":
+                    continue
+                if bits:
+                    self._safety_last_seen[sensor] = record["t"]
+                    if self._safety_active[sensor]:
+                        continue
+                    triggered = True
+                elif self._safety_active[sensor] and record["t"] - self._safety_last_seen[sensor] >= self.safety_hold_time:
+                    # Like the reflex, a sensor only clears after staying clear for the hold time.
+                    triggered = False
+                else:
+                    continue
+                self._safety_active[sensor] = triggered
+                self._safety_events.append({"sensor": sensor, "triggered": triggered, "bits": bits,
+                                            "action": action, "seq": seq, "host_time": record["t"],
+                                            "latency_ms": None})
+        self._safety_index = max(self._safety_index, end)
+
+    def read_safety_events(self, max_events=0):
+        """Bumper, cliff and wheel-drop transitions in the recorded sensor dicts since the last call."""
+        self._scan_safety()
+        count = max_events or len(self._safety_events)
+        events, self._safety_events = self._safety_events[:count], self._safety_events[count:]
+        return events
+
+    def wait_for_safety_event(self, timeout=1.0):
+        deadline = None if timeout is None or timeout < 0 else time.monotonic() + timeout
+        while True:
+            events = self.read_safety_events(1)
+            if events:
+                return events[0]
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(0.005)
+
+    def safety_stats(self):
+        return {"enabled": bool(self.safety_actions), "actions": dict(self.safety_actions),
+                "hold_time": self.safety_hold_time, "active": dict(self._safety_active), "queued_events": len(self._safety_events)}
+
+    def _integrate(self):
+        end = self._due()
+        pose = self._pose
+        for seq in range(self._odometry_index, end):
+            record = self.session.kobuki_records[seq]
+            data = record["data"]
+            ticks = (data.get("left_encoder", 0), data.get("right_encoder", 0), data.get("time_stamp", 0))
+            if self._last_ticks is not None:
+                # Counters wrap at 2^16; take the difference as a signed 16-bit value.
+                left, right = (((now - before + 0x8000) & 0xFFFF) - 0x8000
+                               for now, before in zip(ticks[:2], self._last_ticks[:2]))
+                left *= TICK_TO_RAD * WHEEL_RADIUS
+                right *= TICK_TO_RAD * WHEEL_RADIUS
+                distance = 0.5 * (left + right)
+                turn = (right - left) / WHEELBASE
+                direction = pose.theta + 0.5 * turn
+                pose.x += distance * math.cos(direction)
+                pose.y += distance * math.sin(direction)
+                pose.theta = _wrap_angle(pose.theta + turn)
+                dt = ((ticks[2] - self._last_ticks[2]) & 0xFFFF) * 0.001
+                if dt > 0:
+                    pose.v = distance / dt
+                    pose.w = turn / dt
+            self._last_ticks = ticks
+            pose.seq = data.get("seq", seq)
+            pose.host_time = record["t"]
+            self._pose_history.append((pose.seq, pose.host_time, pose.x, pose.y, pose.theta, pose.v, pose.w))
+        self._odometry_index = max(self._odometry_index, end)
+
+    def get_pose(self):
+        """Odometry pose integrated up to the replay time."""
+        self._integrate()
+        pose = self._pose
+        return ReplayPose(pose.seq, pose.host_time, pose.x, pose.y, pose.theta, pose.v, pose.w)
+
+    def pose_history(self, count=0):
+        self._integrate()
+        poses = list(self._pose_history)[-count:] if count else list(self._pose_history)
+        return np.array(poses, dtype=POSE_DTYPE)
+
+    def reset_odometry(self, x=0.0, y=0.0, theta=0.0):
+        self._integrate()
+        self._pose.x, self._pose.y, self._pose.theta = x, y, _wrap_angle(theta)
+        self._pose.v = self._pose.w = 0.0
+
+    def set_odometry_gyro(self, enabled):
+        """Kept for the API; the replayed heading always comes from the wheels."""
+        self.odometry_gyro = enabled
+
+    def shutdown(self):
+        self.move(0, 0)
+
+
+class ReplayArm:
+    """Stands in for WidowX200Arm: accepts any command and logs it with the replay time."""
+
+    def __init__(self, session):
+        self._session = session
+        self.commands = []
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            self.commands.append((self._session.clock.now(), name, args, kwargs))
+        return call
+
+
+class SessionReplay:
+    """Read access to a recorded session directory."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "session.json")) as f:
+            self.meta = json.load(f)
+        self.depth_scale = self.meta["depth_scale"]
+
+        # Map every chunk; nothing is read from disk until a frame is touched.
+        self._chunks = []
+        self._offsets = []
+        total = 0
+        for index, count in enumerate(self.meta["chunks"]):
+            if count == 0:
+                continue
+            chunk = {"times": np.load(self._file("times", index), mmap_mode="r")[:count]}
+            for name in self.meta["streams"]:
+                # Chunks recorded before a stream started have no file for it.
+                if os.path.exists(self._file(name, index)):
+                    chunk[name] = np.load(self._file(name, index), mmap_mode="r")[:count]
+            self._chunks.append(chunk)
+            self._offsets.append(total)
+            total += count
+        self.frame_count = total
+
+        kobuki_log = self._read_jsonl("kobuki.jsonl")
+        self.kobuki_records = [r for r in kobuki_log if "data" in r]
+        self.kobuki_times = [r["t"] for r in self.kobuki_records]
+        self.kobuki_moves = [(r["t"], *r["move"]) for r in kobuki_log if "move" in r]
+        self.arm_records = self._read_jsonl("arm.jsonl")
+
+        self.start_time = self.frame_time(0) if total else (self.kobuki_times[0] if self.kobuki_times else 0.0)
+        self.clock = ReplayClock(self.start_time)
+
+    def _file(self, name, index):
+        return os.path.join(self.path, f"{name}_{index:05d}.npy")
+
+    def _read_jsonl(self, name):
+        path = os.path.join(self.path, name)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _locate(self, index):
+        chunk = bisect.bisect_right(self._offsets, index) - 1
+        return self._chunks[chunk], index - self._offsets[chunk]
+
+    def frame_time(self, index):
+        chunk, i = self._locate(index)
+        return float(chunk["times"][i])
+
+    def frameset(self, index):
+        chunk, i = self._locate(index)
+        color = chunk["color"][i] if "color" in chunk else None
+        depth = chunk["depth"][i] if "depth" in chunk else None
+        return ReplayFrameset(color, depth, float(chunk["times"][i]), self.depth_scale)
+
+    def framesets(self):
+        """Yield (index, frameset) for every recorded frame, advancing the replay clock.
+
+        Unlike the pipeline, nothing is skipped: use this for deterministic offline runs.
+        """
+        for index in range(self.frame_count):
+            frameset = self.frameset(index)
+            self.clock.time = self.frame_time(index)
+            yield index, frameset
+
+    def pipeline(self, speed=1.0, loop=False):
+        return ReplayPipeline(self, speed, loop)
+
+    def align(self):
+        return ReplayAlign()
+
+    def kobuki(self):
+        return ReplayKobuki(self)
+
+    def arm(self):
+        return ReplayArm(self)
+
+
+# Record the camera for a while: python3 session_log.py <session_dir> [seconds]
+if __name__ == '__main__':
+    import sys
+    from camera_server import start_camera
+
+    frame_hub = start_camera()
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    with SessionRecorder(sys.argv[1]) as recorder:
+        recorder.attach(frame_hub)
+        time.sleep(duration)
+    print(f"Recorded {duration:.0f} s to {sys.argv[1]}")
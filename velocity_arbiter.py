@@ -0,0 +1,157 @@
+import threading
+import time
+
+# Source priorities: lower wins while its command is live.
+PRIORITY_SAFETY = 0    # bumper / cliff stops
+PRIORITY_TELEOP = 1    # operator keys
+PRIORITY_AUTONOMY = 2  # obstacle avoidance, wall following
+
+
+class CommandSource:
+    """One named producer of velocity commands and its latest command."""
+
+    def __init__(self, name, priority, timeout):
+        self.name = name
+        self.priority = priority
+        self.timeout = timeout  # seconds a command stays live; None = until released
+        self.command = None     # (linear, angular)
+        self.stamp = 0.0
+        self.commands = 0
+
+    def live(self, now):
+        if self.command is None:
+            return False
+        return self.timeout is None or now - self.stamp <= self.timeout
+
+
+class VelocityArbiter:
+    """Single writer of ``Kobuki.move`` for several prioritized command sources.
+
+    Sources post commands with ``command()`` from any thread; each command stays
+    live for its source's timeout, or until ``release()``. One output thread
+    wakes at ``rate_hz``, picks the live command of the highest-priority source
+    (ties go to the newest) and sends it, or (0, 0) when nothing is live. A
+    command equal to the last one sent is not sent again; the Kobuki driver
+    keeps repeating the last base command by itself. The pykobuki safety reflex
+    cancels that command on a stop or lock, so call ``resync()`` on every safety
+    event to have the winner sent again even if it did not change.
+    """
+
+    def __init__(self, robot, rate_hz=20.0):
+        self.robot = robot
+        self.period = 1.0 / rate_hz
+        self.sources = {}
+        self.sent = 0
+        self.suppressed = 0
+        self.last_sent = None
+        self.active_source = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._running = False
+
+    def add_source(self, name, priority, timeout=0.5):
+        """Register a command source; ``timeout`` None keeps its commands until released."""
+        with self._lock:
+            self.sources[name] = CommandSource(name, priority, timeout)
+        return name
+
+    def command(self, name, linear, angular):
+        """Post ``name``'s latest velocity command; it overrides lower-priority sources while live."""
+        with self._lock:
+            source = self.sources[name]
+            source.command = (float(linear), float(angular))
+            source.stamp = time.monotonic()
+            source.commands += 1
+            urgent = self.active_source is None or source.priority <= self.sources[self.active_source].priority
+        if urgent:
+            self._wake.set()  # don't wait out the period for a command that changes the output
+
+    def release(self, name):
+        """Withdraw ``name``'s command so lower-priority sources take over."""
+        with self._lock:
+            self.sources[name].command = None
+        self._wake.set()
+
+    def resync(self):
+        """Forget the last command sent, so the next step sends the winner even if it is unchanged.
+
+        For when the base command changed behind the arbiter, e.g. the safety reflex cancelled it.
+        """
+        self.last_sent = None
+        self._wake.set()
+
+    def select(self, now=None):
+        """(source name, (linear, angular)) that wins now, or (None, (0.0, 0.0))."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            live = [s for s in self.sources.values() if s.live(now)]
+            if not live:
+                return None, (0.0, 0.0)
+            winner = min(live, key=lambda s: (s.priority, -s.stamp))
+            return winner.name, winner.command
+
+    def step(self, now=None):
+        """Send the winning command if it differs from the last one sent; returns it."""
+        name, command = self.select(now)
+        self.active_source = name
+        if command == self.last_sent:
+            self.suppressed += 1
+            return command
+        self.robot.move(*command)
+        self.last_sent = command
+        self.sent += 1
+        return command
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="velocity-arbiter", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Stop the output thread and leave the base stopped."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._running = False
+        if thread is not None:
+            self._wake.set()
+            thread.join(timeout)
+        self.robot.move(0.0, 0.0)
+        self.last_sent = (0.0, 0.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while self._running:
+            self.step()
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()  # fell behind; don't burst to catch up
+                delay = 0.0
+            self._wake.wait(delay)
+            if self._wake.is_set():
+                self._wake.clear()
+                next_tick = time.monotonic()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            sources = {s.name: {"priority": s.priority, "commands": s.commands, "live": s.live(now),
+                                "command": s.command}
+                       for s in self.sources.values()}
+        return {
+            "sent": self.sent,
+            "suppressed": self.suppressed,
+            "active_source": self.active_source,
+            "last_sent": self.last_sent,
+            "sources": sources,
+        }
@@ -0,0 +1,57 @@
+import numpy as np
+import cv2
+
+# Structured record for decoded detections: box is (x, y, w, h) in image pixels.
+DETECTION_DTYPE = np.dtype([
+    ("box", np.int32, (4,)),
+    ("class_id", np.int32),
+    ("score", np.float32),
+])
+
+
+def decode_yolo_outputs(outs, width, height, conf_threshold=0.3, nms_threshold=0.4, class_aware=False):
+    """Decode raw YOLO output layers into a structured array of detections.
+
+    ``outs`` is the list returned by ``net.forward(output_layers)``; each array has
+    rows of (cx, cy, w, h, objectness, class scores...). Every step runs on whole
+    arrays: the best class per row, the confidence threshold, box scaling and NMS.
+    With ``class_aware=True`` boxes of different classes never suppress each other.
+
+    Returns an array of DETECTION_DTYPE sorted by descending score.
+    """
+    rows = np.concatenate([np.asarray(out).reshape(-1, out.shape[-1]) for out in outs])
+    scores = rows[:, 5:]
+
+    # Threshold on the best class score first so argmax only runs on survivors.
+    keep = scores.max(axis=1) > conf_threshold
+    rows = rows[keep]
+    scores = scores[keep]
+    if rows.shape[0] == 0:
+        return np.empty(0, dtype=DETECTION_DTYPE)
+
+    class_ids = scores.argmax(axis=1)
+    confidences = scores[np.arange(scores.shape[0]), class_ids]
+
+    # Same truncation as int() in the per-row loop this replaces.
+    center_x = np.trunc(rows[:, 0] * width)
+    center_y = np.trunc(rows[:, 1] * height)
+    w = np.trunc(rows[:, 2] * width)
+    h = np.trunc(rows[:, 3] * height)
+    boxes = np.stack([np.trunc(center_x - w / 2), np.trunc(center_y - h / 2), w, h], axis=1).astype(np.int32)
+
+    nms_boxes = boxes
+    if class_aware:
+        # Shift each class into its own disjoint region so NMS never compares across classes.
+        span = int((boxes[:, :2] + boxes[:, 2:]).max() - boxes[:, :2].min()) + 1
+        nms_boxes = boxes.copy()
+        nms_boxes[:, :2] += (class_ids * span)[:, None].astype(np.int32)
+
+    indexes = cv2.dnn.NMSBoxes(nms_boxes.tolist(), confidences.astype(float).tolist(),
+                               conf_threshold, nms_threshold)
+    indexes = np.asarray(indexes, dtype=np.int64).reshape(-1)
+
+    result = np.empty(indexes.size, dtype=DETECTION_DTYPE)
+    result["box"] = boxes[indexes]
+    result["class_id"] = class_ids[indexes]
+    result["score"] = confidences[indexes]
+    return result